@@ -1 +1,25 @@
-from . import agent
+"""
+AI Journalist: ADK agents for article editing and the services around them.
+
+Importing the package only loads `.env`; `ai_journalist.agent` (google.adk,
+the agent graph and its instructions) is imported on first access, so the
+servers and CLIs start without it. See ai_journalist/startup.py.
+"""
+
+import importlib
+import logging
+
+try:
+    from dotenv import load_dotenv
+    if load_dotenv():
+        # Plain getLogger: log.get_logger would configure output on import
+        logging.getLogger(__name__).debug("Loaded environment variables from .env file")
+except ImportError:
+    # dotenv not installed, environment variables should be set manually
+    pass
+
+
+def __getattr__(name):
+    if name == 'agent':
+        return importlib.import_module(f'{__name__}.agent')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
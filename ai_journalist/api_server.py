@@ -1,48 +1,188 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+import atexit
+import logging
 import os
-from ai_journalist.runner import process_article
-from ai_journalist.tools.markup_blocks import markup_article_blocks
+import time
+from ai_journalist.cache import (
+    cache_bypass_requested,
+    get_or_run,
+    get_response_cache,
+    response_cache_key,
+)
+from ai_journalist.batch import BatchValidationError, parse_batch_request, rewrite_blocks
+from ai_journalist.context_builder import request_context
+from ai_journalist.document_cache import DocumentDeltaError, resolve_document_blocks
+from ai_journalist.improve_article import IMPROVE_SECTION_INSTRUCTION, article_text, improve_sections
+from ai_journalist.log import bind_request_id, get_logger
+from ai_journalist.metrics import CONTENT_TYPE, http_in_flight, observe_request, render_metrics, route_label
+from ai_journalist.prompts import (
+    IMPROVE_ARTICLE_PROMPT,
+    build_chat_prompt,
+    build_insert_prompt,
+    build_rewrite_prompt,
+)
+from ai_journalist.responses import (
+    chat_response,
+    improve_article_response,
+    insert_block_response,
+    pending_updates_response,
+    rewrite_block_response,
+    segment_edit_response,
+)
+from ai_journalist.runner import process_article, stream_article
+from ai_journalist.single_flight import get_single_flight
+from ai_journalist.startup import LAZY_INIT, WARMUP_PATH_PREFIX, is_warm, shutdown, status, warmup
+from ai_journalist.streaming import SSE_HEADERS, SSE_MIMETYPE, sse_stream
 
 app = Flask(__name__)
 CORS(app)
+logger = get_logger(__name__)
+
+@app.before_request
+def assign_request_id():
+    # Every log line of this request carries the same ID
+    request.environ['ai_journalist.request_id'] = bind_request_id(request.headers.get('X-Request-ID'))
+
+@app.before_request
+def start_request_timer():
+    request.environ['ai_journalist.started'] = time.perf_counter()
+    http_in_flight.inc(route=route_label(request.url_rule and request.url_rule.rule))
+
+@app.before_request
+def warm_up_on_first_use():
+    # With AI_LAZY_INIT the agents are built by the first API request
+    if request.path.startswith(WARMUP_PATH_PREFIX) and not is_warm():
+        warmup()
+
+@app.after_request
+def echo_request_id(response):
+    response.headers['X-Request-ID'] = request.environ.get('ai_journalist.request_id', '')
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    started = request.environ.get('ai_journalist.started')
+    if started is None:
+        return response
+    method, route, status = request.method, route_label(request.url_rule and request.url_rule.rule), response.status_code
+
+    # Streamed bodies are still being sent here; finish timing when the body is closed
+    def finish():
+        http_in_flight.dec(route=route)
+        observe_request(method, route, status, time.perf_counter() - started)
+
+    response.call_on_close(finish)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'service': 'ai-journalist'})
+    return jsonify({'status': 'ok', 'service': 'ai-journalist', **status()})
+
+@app.route('/api/v1/warmup', methods=['POST'])
+def warmup_agents():
+    """Build the agents and the runner pool now instead of on the first request"""
+    return jsonify(warmup())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: request latency, agent/tool timings, tokens, caches"""
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+@app.route('/api/v1/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the response cache"""
+    cache = get_response_cache()
+    stats = cache.stats() if cache else {'enabled': False}
+    return jsonify({**stats, 'singleFlight': get_single_flight().stats()})
+
+@app.route('/api/v1/documents/<document_id>/pending-updates', methods=['GET'])
+def pending_updates(document_id):
+    """Segment updates queued for a document and not yet applied"""
+    from ai_journalist.runner_pool import get_runner_pool
+    
+    since = request.args.get('since', 0, type=int)
+    updates = get_runner_pool().pending_segment_updates(document_id, request.args.get('segmentId'), since)
+    return jsonify(pending_updates_response(document_id, updates, since))
 
 @app.route('/api/v1/rewrite-block', methods=['POST'])
 def rewrite_block():
     """Rewrite a specific block"""
     data = request.json
     block_id = data.get('blockId')
+    document_id = data.get('documentId')
     content = data.get('content')
     instruction = data.get('instruction')
-    context = data.get('context', '')
+    context = request_context(data)
     
-    prompt = f"""You are a journalistic AI assistant. Use your tools to rewrite this text block.
-
-Context (surrounding text):
-{context}
+    prompt = build_rewrite_prompt(content, instruction, context)
+    
+    try:
+        # Use agent through process_article (agent has segment_editor sub-agent for text editing)
+        result, cache_status = get_or_run(
+            get_response_cache(),
+            response_cache_key('rewrite', content, instruction, context, document_id, block_id),
+            lambda: process_article(prompt, document_id=document_id, block_id=block_id, priority='high'),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        response = jsonify(rewrite_block_response(result, block_id, instruction))
+        response.headers['X-Cache'] = cache_status
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-Text to rewrite:
-{content}
+@app.route('/api/v1/rewrite-block/stream', methods=['POST'])
+def rewrite_block_stream():
+    """Rewrite a specific block, streaming progress as Server-Sent Events"""
+    data = request.json
+    block_id = data.get('blockId')
+    instruction = data.get('instruction')
+    prompt = build_rewrite_prompt(data.get('content'), instruction, request_context(data))
+    
+    payloads = stream_article(prompt, document_id=data.get('documentId'), block_id=block_id, priority='high')
+    frames = sse_stream(payloads, lambda result: rewrite_block_response(result, block_id, instruction))
+    return Response(stream_with_context(frames), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
 
-Instruction: {instruction}
+@app.route('/api/v1/rewrite-block/direct', methods=['POST'])
+def rewrite_block_direct():
+    """Rewrite a specific block with the segment_editor agent alone (no root-agent round-trips)"""
+    from ai_journalist.segment_editing import edit_segment, parse_segment_edit_request, segment_edit_cache_context
+    
+    data = request.json or {}
+    try:
+        editor_input = parse_segment_edit_request(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    block_id = data.get('blockId')
+    instruction = data['instruction']
+    try:
+        result, cache_status = get_or_run(
+            get_response_cache(),
+            response_cache_key('segment-edit', data['content'], instruction, segment_edit_cache_context(editor_input),
+                               data.get('documentId'), block_id),
+            lambda: edit_segment(editor_input),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        if result.get('status') == 'error':
+            return jsonify({'error': result.get('error')}), 500
+        response = jsonify(segment_edit_response(result, block_id, instruction))
+        response.headers['X-Cache'] = cache_status
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-Please use your segment_editor tool if needed to improve the text, then return ONLY the rewritten text, no explanations."""
+@app.route('/api/v1/rewrite-blocks', methods=['POST'])
+def rewrite_blocks_batch():
+    """Rewrite many blocks concurrently with a bounded parallelism cap"""
+    try:
+        items, document_id, max_parallel = parse_batch_request(request.json or {})
+    except BatchValidationError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
-        # Use agent through process_article (agent has segment_editor sub-agent for text editing)
-        result = process_article(prompt)
-        response_text = result.get('response', result.get('response_text', '')).strip()
-        
-        return jsonify({
-            'newContent': response_text,
-            'note': f'Rewritten: {instruction[:50]}...',
-            'blockId': block_id,
-            'tokensUsed': result.get('tokens_used', 0)
-        })
+        bypass = cache_bypass_requested(request.headers)
+        return jsonify(rewrite_blocks(items, document_id, max_parallel, bypass_cache=bypass))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -51,147 +191,125 @@ def insert_block():
     """Insert new block after specified block"""
     data = request.json
     insert_after = data.get('insertAfter')
+    document_id = data.get('documentId')
     instruction = data.get('instruction')
-    context = data.get('context', '')
+    context = request_context(data, 'insertAfter', insert=True)
     
-    prompt = f"""You are a journalistic AI assistant. Use your tools to write new content.
-
-Context (surrounding text):
-{context}
-
-Instruction: {instruction}
-
-Please use your segment_editor tool to create well-written content that fits the context, then return ONLY the new content, no explanations."""
+    prompt = build_insert_prompt(instruction, context)
     
     try:
         # Use agent through process_article (agent has segment_editor sub-agent for content creation)
-        result = process_article(prompt)
-        response_text = result.get('response', result.get('response_text', '')).strip()
-        
-        return jsonify({
-            'newContent': response_text,
-            'note': f'Inserted: {instruction[:50]}...',
-            'insertAfter': insert_after,
-            'tokensUsed': result.get('tokens_used', 0)
-        })
+        result, cache_status = get_or_run(
+            get_response_cache(),
+            response_cache_key('insert', None, instruction, context, document_id, insert_after),
+            lambda: process_article(prompt, document_id=document_id, block_id=insert_after, priority='high'),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        response = jsonify(insert_block_response(result, insert_after, instruction))
+        response.headers['X-Cache'] = cache_status
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/v1/insert-block/stream', methods=['POST'])
+def insert_block_stream():
+    """Insert new block, streaming progress as Server-Sent Events"""
+    data = request.json
+    insert_after = data.get('insertAfter')
+    instruction = data.get('instruction')
+    prompt = build_insert_prompt(instruction, request_context(data, 'insertAfter', insert=True))
+    
+    payloads = stream_article(prompt, document_id=data.get('documentId'), block_id=insert_after, priority='high')
+    frames = sse_stream(payloads, lambda result: insert_block_response(result, insert_after, instruction))
+    return Response(stream_with_context(frames), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+
 @app.route('/api/v1/chat', methods=['POST'])
 def chat():
     """Chat about document"""
-    import json
-    print("\n" + "=" * 80)
-    print("🌐 API Request: /api/v1/chat")
-    print("=" * 80)
-    
     data = request.json
-    document_content = data.get('documentContent', '')
+    document_id = data.get('documentId')
     message = data.get('message', '')
     selected_block_id = data.get('selectedBlockId')
     document_info = data.get('documentInfo', '')
     
-    print(f"📨 User message: {message}")
-    print(f"📄 Document content length: {len(document_content)} chars")
-    print(f"📋 Document info: {document_info}")
-    print(f"🎯 Selected block ID: {selected_block_id}")
+    logger.info("Chat request", extra={'fields': {
+        'document_id': document_id,
+        'message_chars': len(message),
+        'document_chars': len(data.get('documentContent') or ''),
+        'delta_ops': len(data.get('documentDelta') or []),
+        'selected_block_id': selected_block_id,
+    }})
     
     # Parse document to get structured blocks
     try:
-        print("\n🔍 Parsing document blocks...")
-        markup_result = markup_article_blocks(document_content, None)
-        blocks = markup_result.get('blocks', [])
-        print(f"   Found {len(blocks)} blocks")
-        
-        context = f"""Document structure:
-{document_info}
-
-Total blocks: {len(blocks)}
-
-User message: {message}"""
-        
-        if selected_block_id:
-            selected_block = next((b for b in blocks if b.get('id') == selected_block_id), None)
-            if selected_block:
-                context += f"\n\nSelected block: {selected_block.get('content', '')}"
-                print(f"   Selected block content: {len(selected_block.get('content', ''))} chars")
-        
-        prompt = f"""{context}
-
-You are a journalistic AI assistant. Use your tools to analyze and improve this article.
-
-User request: {message}
-
-Please:
-1. Use markup_article_blocks tool if needed to understand document structure
-2. Provide helpful suggestions for improving the article
-3. Be specific and actionable
-4. If you suggest changes, describe them clearly and use your tools when appropriate."""
-        
-        print(f"\n💬 Prompt length: {len(prompt)} chars")
-        print(f"💬 Prompt preview: {prompt[:300]}...")
+        blocks, version = resolve_document_blocks(data)
+        prompt = build_chat_prompt(message, document_info, blocks, selected_block_id)
+        logger.info("Chat prompt built", extra={'fields': {
+            'blocks': len(blocks),
+            'document_version': version,
+            'prompt_chars': len(prompt),
+        }})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Chat prompt preview: %.300s...", prompt)
         
         # Use agent through process_article (uses ADK Runner with root_agent)
         # The agent has access to: markup_article_blocks tool and segment_editor sub-agent
-        print("\n🤖 Calling process_article (agent)...")
-        result = process_article(prompt)
-        
-        response_text = result.get('response', result.get('response_text', '')).strip()
-        print(f"\n📤 Agent response length: {len(response_text)} chars")
-        print(f"📤 Agent response: {response_text[:500]}...")
-        print(f"📊 Result keys: {list(result.keys())}")
-        print(f"📊 Events count: {result.get('events_count', 0)}")
-        
-        print("=" * 80 + "\n")
-        
-        return jsonify({
-            'message': response_text,
-            'updates': [],  # Can be populated with specific suggestions
-            'tokensUsed': result.get('tokens_used', 0)
-        })
+        result = process_article(prompt, document_id=document_id, block_id=selected_block_id, priority='high')
+        return jsonify(chat_response(result, version))
+    except DocumentDeltaError as e:
+        logger.warning("Document delta rejected: %s", e)
+        return jsonify({'error': str(e), 'documentVersion': e.current_version}), e.status
     except Exception as e:
-        import traceback
-        print(f"\n❌ ERROR in /api/v1/chat:")
-        print(f"   {str(e)}")
-        print(f"   Traceback:")
-        traceback.print_exc()
-        print("=" * 80 + "\n")
+        logger.exception("Error in /api/v1/chat: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/v1/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chat about document, streaming progress as Server-Sent Events"""
+    data = request.json
+    
+    try:
+        blocks, version = resolve_document_blocks(data)
+        prompt = build_chat_prompt(
+            data.get('message', ''),
+            data.get('documentInfo', ''),
+            blocks,
+            data.get('selectedBlockId'),
+        )
+    except DocumentDeltaError as e:
+        return jsonify({'error': str(e), 'documentVersion': e.current_version}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    payloads = stream_article(prompt, document_id=data.get('documentId'), block_id=data.get('selectedBlockId'),
+                              priority='high')
+    frames = sse_stream(payloads, lambda result: chat_response(result, version))
+    return Response(stream_with_context(frames), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+
 @app.route('/api/v1/improve-article', methods=['POST'])
 def improve_article():
     """Improve entire article"""
     data = request.json
     document_id = data.get('documentId')
-    content = data.get('content', {})
+    text = article_text(data)
     
-    prompt = """You are a journalistic AI assistant. Analyze this article and suggest specific improvements.
-
-Use your tools:
-1. Use markup_article_blocks to understand the document structure
-2. Use segment_editor to analyze and improve specific sections
-
-For each suggestion:
-1. Identify the specific block/section
-2. Explain what needs improvement
-3. Provide the improved version using your tools
-
-Focus on:
-- Clarity and conciseness
-- Flow and structure
-- Grammar and style
-- Engagement and readability"""
+    prompt = IMPROVE_ARTICLE_PROMPT
     
     try:
-        # Use agent through process_article (agent has markup_article_blocks and segment_editor tools)
-        result = process_article(prompt)
-        response_text = result.get('response', result.get('response_text', '')).strip()
-        
-        return jsonify({
-            'message': response_text,
-            'updates': [],  # Can be parsed from response
-            'tokensUsed': result.get('tokens_used', 0)
-        })
+        # Identical requests share one in-flight run
+        if text:
+            # Sections go through segment_editor concurrently (see improve_article.py)
+            result, _ = get_single_flight().do(
+                response_cache_key('improve-article', text, IMPROVE_SECTION_INSTRUCTION, ''),
+                lambda: improve_sections(text),
+            )
+            return jsonify(improve_article_response(result))
+        # No article text: the agent works from the document session (markup_article_blocks, segment_editor)
+        result, _ = get_single_flight().do(
+            response_cache_key('improve-article', document_id, prompt, ''),
+            lambda: process_article(prompt, document_id=document_id, priority='low'),
+        )
+        return jsonify(chat_response(result))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -199,6 +317,11 @@ if __name__ == '__main__':
     port = int(os.getenv('AI_SERVICE_PORT', 5001))
     debug = os.getenv('AI_SERVICE_DEBUG', 'true').lower() == 'true'
     
+    # Build the agents and the shared runner pool once; every request reuses them
+    if not LAZY_INIT:
+        warmup()
+    atexit.register(shutdown)
+    
     print(f"""
 ╔══════════════════════════════════════╗
 ║   AI Journalist Service Started      ║
@@ -207,9 +330,12 @@ if __name__ == '__main__':
 ║   Debug: {debug}                       ║
 ║   Endpoints:                         ║
 ║   - POST /api/v1/rewrite-block       ║
+║   - POST /api/v1/rewrite-blocks      ║
 ║   - POST /api/v1/insert-block        ║
 ║   - POST /api/v1/chat                ║
+║     (+ /stream variants, SSE)        ║
 ║   - POST /api/v1/improve-article     ║
+║   - POST /api/v1/warmup              ║
 ╚══════════════════════════════════════╝
     """)
     
@@ -0,0 +1,444 @@
+"""
+Async (ASGI) serving mode for the AI service.
+
+Exposes the same `/api/v1/*` routes as the Flask app in api_server.py, but
+every view awaits `process_article_async`, which drives `Runner.run_async`
+on the server's event loop. A slow LLM round-trip no longer pins a worker:
+one process can keep many agent runs in flight, bounded by
+`AI_MAX_CONCURRENT_RUNS` (default 32). Requests over the limit wait for a
+free slot instead of being rejected. Request parsing that can take long
+(whole documents, deltas) and the SQLite cache tier run in worker threads,
+so they do not stall the loop either.
+
+Run with:
+    python -m ai_journalist.asgi_server
+or any ASGI server:
+    uvicorn ai_journalist.asgi_server:app --port 5001
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from ai_journalist.cache import (
+    cache_bypass_requested,
+    get_or_run_async,
+    get_response_cache,
+    response_cache_key,
+)
+from ai_journalist.batch import BatchValidationError, parse_batch_request, rewrite_blocks_async
+from ai_journalist.context_builder import request_context
+from ai_journalist.document_cache import DocumentDeltaError, resolve_document_blocks
+from ai_journalist.improve_article import IMPROVE_SECTION_INSTRUCTION, article_text, improve_sections_async
+from ai_journalist.log import bind_request_id
+from ai_journalist.metrics import CONTENT_TYPE, http_in_flight, observe_request, render_metrics, route_label
+from ai_journalist.prompts import (
+    IMPROVE_ARTICLE_PROMPT,
+    build_chat_prompt,
+    build_insert_prompt,
+    build_rewrite_prompt,
+)
+from ai_journalist.responses import (
+    chat_response,
+    improve_article_response,
+    insert_block_response,
+    pending_updates_response,
+    rewrite_block_response,
+    segment_edit_response,
+)
+from ai_journalist.runner import process_article_async, stream_article_async
+from ai_journalist.single_flight import get_single_flight
+from ai_journalist.startup import LAZY_INIT, WARMUP_PATH_PREFIX, is_warm, status, warmup
+from ai_journalist.streaming import SSE_HEADERS, SSE_MIMETYPE, sse_stream_async
+
+MAX_CONCURRENT_RUNS = int(os.getenv('AI_MAX_CONCURRENT_RUNS', 32))
+
+_run_slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+
+
+async def run_agent(prompt: str, document_id: str = None, block_id: str = None, priority: str = 'high') -> dict:
+    """Run the agent once a concurrency slot is free (interactive priority unless told otherwise)."""
+    async with _run_slots:
+        return await process_article_async(prompt, document_id=document_id, block_id=block_id, priority=priority)
+
+
+async def run_segment_edit(editor_input) -> dict:
+    """Run a direct segment edit once a concurrency slot is free."""
+    from ai_journalist.segment_editing import edit_segment_async
+
+    async with _run_slots:
+        return await edit_segment_async(editor_input)
+
+
+async def stream_agent(prompt: str, document_id: str, finalize, block_id: str = None) -> StreamingResponse:
+    """Stream an agent run as SSE at interactive priority; the run holds a concurrency slot while it streams."""
+    async def frames():
+        async with _run_slots:
+            run = stream_article_async(prompt, document_id=document_id, block_id=block_id, priority='high')
+            async for frame in sse_stream_async(run, finalize):
+                yield frame
+
+    return StreamingResponse(frames(), media_type=SSE_MIMETYPE, headers=SSE_HEADERS)
+
+
+class RequestIdMiddleware:
+    """Bind a request ID (from `X-Request-ID` or fresh) for logging and echo it back."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get('headers') or [])
+        request_id = bind_request_id(headers.get(b'x-request-id', b'').decode('latin-1') or None)
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message.setdefault('headers', [])
+                message['headers'] = list(message['headers']) + [(b'x-request-id', request_id.encode('latin-1'))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+
+class WarmupMiddleware:
+    """
+    Build the agents (in a worker thread, off the event loop) before the
+    first API request when the server started with `AI_LAZY_INIT`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'].startswith(WARMUP_PATH_PREFIX) and not is_warm():
+            await asyncio.to_thread(warmup)
+        await self.app(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """Time every request per route (streams until their last chunk) and count requests in flight."""
+
+    def __init__(self, app, routes=()):
+        self.app = app
+        self.paths = frozenset(route.path for route in routes if '{' not in route.path)
+        self.templates = [route for route in routes if '{' in route.path]
+
+    def _route(self, path: str):
+        if path in self.paths:
+            return path
+        for route in self.templates:
+            if route.path_regex.match(path):
+                return route.path
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        route = route_label(self._route(scope['path']))
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        http_in_flight.inc(route=route)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec(route=route)
+            observe_request(scope['method'], route, status, time.perf_counter() - started)
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({'status': 'ok', 'service': 'ai-journalist', **status()})
+
+
+async def warmup_agents(request: Request) -> JSONResponse:
+    """Build the agents and the runner pool now instead of on the first request"""
+    return JSONResponse(await asyncio.to_thread(warmup))
+
+
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics: request latency, agent/tool timings, tokens, caches"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+async def cache_stats(request: Request) -> JSONResponse:
+    """Hit/miss counters of the response cache"""
+    cache = get_response_cache()
+    stats = cache.stats() if cache else {'enabled': False}
+    return JSONResponse({**stats, 'singleFlight': get_single_flight().stats()})
+
+
+async def pending_updates(request: Request) -> JSONResponse:
+    """Segment updates queued for a document and not yet applied"""
+    from ai_journalist.runner_pool import get_runner_pool
+
+    document_id = request.path_params['document_id']
+    try:
+        since = int(request.query_params.get('since', 0))
+    except ValueError:
+        return JSONResponse({'error': 'since must be an integer'}, status_code=400)
+    updates = await asyncio.to_thread(
+        get_runner_pool().pending_segment_updates, document_id, request.query_params.get('segmentId'), since,
+    )
+    return JSONResponse(pending_updates_response(document_id, updates, since))
+
+
+async def rewrite_block(request: Request) -> JSONResponse:
+    """Rewrite a specific block"""
+    data = await request.json()
+    block_id = data.get('blockId')
+    document_id = data.get('documentId')
+    content = data.get('content')
+    instruction = data.get('instruction')
+    context = await asyncio.to_thread(request_context, data)
+
+    prompt = build_rewrite_prompt(content, instruction, context)
+
+    try:
+        result, cache_status = await get_or_run_async(
+            get_response_cache(),
+            response_cache_key('rewrite', content, instruction, context, document_id, block_id),
+            lambda: run_agent(prompt, document_id, block_id),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        return JSONResponse(
+            rewrite_block_response(result, block_id, instruction),
+            headers={'X-Cache': cache_status},
+        )
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def rewrite_block_stream(request: Request) -> StreamingResponse:
+    """Rewrite a specific block, streaming progress as Server-Sent Events"""
+    data = await request.json()
+    block_id = data.get('blockId')
+    instruction = data.get('instruction')
+    prompt = build_rewrite_prompt(data.get('content'), instruction, await asyncio.to_thread(request_context, data))
+    return await stream_agent(
+        prompt,
+        data.get('documentId'),
+        lambda result: rewrite_block_response(result, block_id, instruction),
+        block_id,
+    )
+
+
+async def rewrite_block_direct(request: Request) -> JSONResponse:
+    """Rewrite a specific block with the segment_editor agent alone (no root-agent round-trips)"""
+    from ai_journalist.segment_editing import parse_segment_edit_request, segment_edit_cache_context
+
+    data = await request.json()
+    try:
+        editor_input = await asyncio.to_thread(parse_segment_edit_request, data)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    block_id = data.get('blockId')
+    instruction = data['instruction']
+    try:
+        result, cache_status = await get_or_run_async(
+            get_response_cache(),
+            response_cache_key('segment-edit', data['content'], instruction, segment_edit_cache_context(editor_input),
+                               data.get('documentId'), block_id),
+            lambda: run_segment_edit(editor_input),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        if result.get('status') == 'error':
+            return JSONResponse({'error': result.get('error')}, status_code=500)
+        return JSONResponse(
+            segment_edit_response(result, block_id, instruction),
+            headers={'X-Cache': cache_status},
+        )
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def rewrite_blocks_batch(request: Request) -> JSONResponse:
+    """Rewrite many blocks concurrently with a bounded parallelism cap"""
+    try:
+        items, document_id, max_parallel = await asyncio.to_thread(parse_batch_request, await request.json())
+    except BatchValidationError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        body = await rewrite_blocks_async(
+            items,
+            document_id,
+            max_parallel,
+            run_edit=run_segment_edit,
+            bypass_cache=cache_bypass_requested(request.headers),
+        )
+        return JSONResponse(body)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def insert_block(request: Request) -> JSONResponse:
+    """Insert new block after specified block"""
+    data = await request.json()
+    insert_after = data.get('insertAfter')
+    document_id = data.get('documentId')
+    instruction = data.get('instruction')
+    context = await asyncio.to_thread(request_context, data, 'insertAfter', True)
+
+    prompt = build_insert_prompt(instruction, context)
+
+    try:
+        result, cache_status = await get_or_run_async(
+            get_response_cache(),
+            response_cache_key('insert', None, instruction, context, document_id, insert_after),
+            lambda: run_agent(prompt, document_id, insert_after),
+            bypass=cache_bypass_requested(request.headers),
+        )
+        return JSONResponse(
+            insert_block_response(result, insert_after, instruction),
+            headers={'X-Cache': cache_status},
+        )
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def insert_block_stream(request: Request) -> StreamingResponse:
+    """Insert new block, streaming progress as Server-Sent Events"""
+    data = await request.json()
+    insert_after = data.get('insertAfter')
+    instruction = data.get('instruction')
+    prompt = build_insert_prompt(instruction, await asyncio.to_thread(request_context, data, 'insertAfter', True))
+    return await stream_agent(
+        prompt,
+        data.get('documentId'),
+        lambda result: insert_block_response(result, insert_after, instruction),
+        insert_after,
+    )
+
+
+def chat_prompt(data: dict):
+    """Resolve the chat document (parse, apply deltas) and build the prompt; returns `(prompt, version)`."""
+    blocks, version = resolve_document_blocks(data)
+    prompt = build_chat_prompt(
+        data.get('message', ''),
+        data.get('documentInfo', ''),
+        blocks,
+        data.get('selectedBlockId'),
+    )
+    return prompt, version
+
+
+async def chat(request: Request) -> JSONResponse:
+    """Chat about document"""
+    data = await request.json()
+    document_id = data.get('documentId')
+    selected_block_id = data.get('selectedBlockId')
+
+    try:
+        prompt, version = await asyncio.to_thread(chat_prompt, data)
+        result = await run_agent(prompt, document_id, selected_block_id)
+        return JSONResponse(chat_response(result, version))
+    except DocumentDeltaError as e:
+        return JSONResponse({'error': str(e), 'documentVersion': e.current_version}, status_code=e.status)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def chat_stream(request: Request):
+    """Chat about document, streaming progress as Server-Sent Events"""
+    data = await request.json()
+
+    try:
+        prompt, version = await asyncio.to_thread(chat_prompt, data)
+    except DocumentDeltaError as e:
+        return JSONResponse({'error': str(e), 'documentVersion': e.current_version}, status_code=e.status)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    return await stream_agent(
+        prompt,
+        data.get('documentId'),
+        lambda result: chat_response(result, version),
+        data.get('selectedBlockId'),
+    )
+
+
+async def improve_article(request: Request) -> JSONResponse:
+    """Improve entire article"""
+    data = await request.json()
+    document_id = data.get('documentId')
+    text = await asyncio.to_thread(article_text, data)
+
+    try:
+        if text:
+            result, _ = await get_single_flight().do_async(
+                response_cache_key('improve-article', text, IMPROVE_SECTION_INSTRUCTION, ''),
+                lambda: improve_sections_async(text, run_edit=run_segment_edit),
+            )
+            return JSONResponse(improve_article_response(result))
+        result, _ = await get_single_flight().do_async(
+            response_cache_key('improve-article', document_id, IMPROVE_ARTICLE_PROMPT, ''),
+            lambda: run_agent(IMPROVE_ARTICLE_PROMPT, document_id, priority='low'),
+        )
+        return JSONResponse(chat_response(result))
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    # Build the agents and the shared runner pool before the first request arrives
+    if not LAZY_INIT:
+        warmup()
+    yield
+    if is_warm():
+        from ai_journalist.runner_pool import shutdown_runner_pool_async
+        await shutdown_runner_pool_async()
+
+
+routes = [
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/api/v1/cache/stats', cache_stats, methods=['GET']),
+    Route('/api/v1/documents/{document_id}/pending-updates', pending_updates, methods=['GET']),
+    Route('/api/v1/rewrite-block', rewrite_block, methods=['POST']),
+    Route('/api/v1/rewrite-block/stream', rewrite_block_stream, methods=['POST']),
+    Route('/api/v1/rewrite-block/direct', rewrite_block_direct, methods=['POST']),
+    Route('/api/v1/rewrite-blocks', rewrite_blocks_batch, methods=['POST']),
+    Route('/api/v1/insert-block', insert_block, methods=['POST']),
+    Route('/api/v1/insert-block/stream', insert_block_stream, methods=['POST']),
+    Route('/api/v1/chat', chat, methods=['POST']),
+    Route('/api/v1/chat/stream', chat_stream, methods=['POST']),
+    Route('/api/v1/improve-article', improve_article, methods=['POST']),
+    Route('/api/v1/warmup', warmup_agents, methods=['POST']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(MetricsMiddleware, routes=routes),
+        Middleware(RequestIdMiddleware),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(WarmupMiddleware),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('AI_SERVICE_PORT', 5001))
+    print(f"🚀 Starting async AI service on port {port} (max {MAX_CONCURRENT_RUNS} concurrent agent runs)")
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,199 @@
+"""
+Batch block rewrites with bounded fan-out.
+
+Editors often apply one instruction ("tighten", "make formal") to dozens of
+blocks. Instead of one HTTP round-trip per block, `/api/v1/rewrite-blocks`
+takes all items at once and runs them concurrently, at most
+`max_parallel` at a time, returning per-block results and failures in a
+single response.
+
+Every item is one `segment_editor` run (the direct path of
+segment_editing.py): the block keeps its ID as the segment ID and gets its
+neighbors from `documentContent` when the request carries one. Results
+share the response cache with `/api/v1/rewrite-block/direct`.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from ai_journalist.cache import get_or_run, get_or_run_async, get_response_cache, response_cache_key
+from ai_journalist.context_builder import CONTEXT_TOKEN_BUDGET, block_neighbors, document_blocks, find_block_index, trim_to_tokens
+from ai_journalist.responses import segment_edit_response
+
+# Default and upper bound for concurrent agent runs within one batch
+BATCH_PARALLELISM = int(os.getenv('AI_BATCH_PARALLELISM', 8))
+# Largest batch accepted by the endpoint
+BATCH_MAX_ITEMS = int(os.getenv('AI_BATCH_MAX_ITEMS', 100))
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch request body cannot be processed at all."""
+
+
+def parse_batch_request(data: dict) -> tuple:
+    """
+    Validate a `/api/v1/rewrite-blocks` body.
+
+    Items without their own `instruction` or `context` inherit the top-level
+    ones. With a top-level `documentContent`, each item found in it gets its
+    neighbor blocks (and block type) from there instead of `context`.
+    Returns `(items, document_id, max_parallel)`.
+
+    Raises:
+        BatchValidationError: If `items` is missing, empty, too large or has
+            an entry that is not an object, or `maxParallel` is not a number.
+    """
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise BatchValidationError("'items' must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise BatchValidationError(f"Too many items: {len(items)} (max {BATCH_MAX_ITEMS})")
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise BatchValidationError(f"'items[{i}]' must be an object")
+
+    max_parallel = data.get('maxParallel') or BATCH_PARALLELISM
+    try:
+        max_parallel = max(1, min(int(max_parallel), BATCH_PARALLELISM))
+    except (TypeError, ValueError):
+        raise BatchValidationError("'maxParallel' must be a number") from None
+
+    default_instruction = data.get('instruction')
+    default_context = data.get('context', '')
+    blocks = document_blocks(data)
+
+    def normalize(item: dict) -> dict:
+        index = find_block_index(blocks, item.get('blockId'))
+        return {
+            'blockId': item.get('blockId'),
+            'content': item.get('content'),
+            'instruction': item.get('instruction') or default_instruction,
+            'context': trim_to_tokens(item.get('context', default_context), CONTEXT_TOKEN_BUDGET),
+            'blockType': item.get('blockType') or (blocks[index]['type'] if index is not None else None),
+            'neighbors': block_neighbors(blocks, index) if index is not None else None,
+        }
+
+    normalized = [normalize(item) for item in items]
+    return normalized, data.get('documentId'), max_parallel
+
+
+def _prepare(item: dict, document_id: Optional[str]) -> Tuple[Optional[object], Optional[str], Optional[dict]]:
+    """`(editor_input, cache_key, None)` for one item, or `(None, None, error_result)`."""
+    from ai_journalist.segment_editing import build_segment_editor_input, segment_edit_cache_context
+
+    block_id = item['blockId']
+    if not item['content'] or not item['instruction']:
+        return None, None, {'blockId': block_id, 'status': 'error', 'error': "'content' and 'instruction' are required"}
+    try:
+        editor_input = build_segment_editor_input(
+            item['content'],
+            item['instruction'],
+            context=item['context'],
+            block_id=block_id,
+            block_type=item['blockType'],
+            neighbors=item['neighbors'],
+        )
+    except ValueError as e:
+        return None, None, {'blockId': block_id, 'status': 'error', 'error': str(e)}
+    key = response_cache_key('segment-edit', item['content'], item['instruction'],
+                             segment_edit_cache_context(editor_input), document_id, block_id)
+    return editor_input, key, None
+
+
+def _item_result(item: dict, result: dict) -> dict:
+    if result.get('status') == 'error':
+        return {'blockId': item['blockId'], 'status': 'error', 'error': result.get('error')}
+    return {'status': 'ok', **segment_edit_response(result, item['blockId'], item['instruction'])}
+
+
+def _batch_body(results: List[dict]) -> dict:
+    failed = sum(1 for r in results if r['status'] == 'error')
+    return {
+        'results': results,
+        'succeeded': len(results) - failed,
+        'failed': failed,
+        'tokensUsed': sum(r.get('tokensUsed', 0) for r in results),
+    }
+
+
+async def _rewrite_one(
+    item: dict,
+    document_id: Optional[str],
+    slots: asyncio.Semaphore,
+    run_edit: Callable[..., Awaitable[dict]],
+    bypass_cache: bool,
+) -> dict:
+    editor_input, key, error = _prepare(item, document_id)
+    if error is not None:
+        return error
+
+    async def run() -> dict:
+        async with slots:
+            return await run_edit(editor_input)
+
+    try:
+        result, _ = await get_or_run_async(get_response_cache(), key, run, bypass=bypass_cache)
+    except Exception as e:
+        return {'blockId': item['blockId'], 'status': 'error', 'error': str(e)}
+    return _item_result(item, result)
+
+
+async def rewrite_blocks_async(
+    items: List[dict],
+    document_id: Optional[str] = None,
+    max_parallel: int = BATCH_PARALLELISM,
+    run_edit: Optional[Callable[..., Awaitable[dict]]] = None,
+    bypass_cache: bool = False,
+) -> dict:
+    """
+    Rewrite many blocks concurrently, at most `max_parallel` at a time.
+
+    Args:
+        items: Normalized items from `parse_batch_request`
+        document_id: Document the blocks belong to (part of the cache key;
+            segment edits run in throwaway sessions)
+        max_parallel: Concurrency cap for this batch
+        run_edit: Coroutine running one `SegmentEditorInput` (lets the ASGI
+            app route runs through its process-wide concurrency limit;
+            defaults to `edit_segment_async`)
+        bypass_cache: Skip response cache lookups (results are still stored)
+
+    Returns:
+        Response body with per-block `results` in request order
+    """
+    if run_edit is None:
+        from ai_journalist.segment_editing import edit_segment_async as run_edit
+
+    slots = asyncio.Semaphore(max_parallel)
+    results = await asyncio.gather(*(_rewrite_one(item, document_id, slots, run_edit, bypass_cache) for item in items))
+    return _batch_body(results)
+
+
+def rewrite_blocks(
+    items: List[dict],
+    document_id: Optional[str] = None,
+    max_parallel: int = BATCH_PARALLELISM,
+    bypass_cache: bool = False,
+) -> dict:
+    """
+    Blocking variant of `rewrite_blocks_async` for the Flask app.
+
+    Items run on a thread pool of `max_parallel` threads, each through the
+    blocking `edit_segment`, so no event loop is created per request.
+    """
+    from ai_journalist.segment_editing import edit_segment
+
+    def rewrite_one(item: dict) -> dict:
+        editor_input, key, error = _prepare(item, document_id)
+        if error is not None:
+            return error
+        try:
+            result, _ = get_or_run(get_response_cache(), key, lambda: edit_segment(editor_input), bypass=bypass_cache)
+        except Exception as e:
+            return {'blockId': item['blockId'], 'status': 'error', 'error': str(e)}
+        return _item_result(item, result)
+
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='rewrite-blocks') as executor:
+        return _batch_body(list(executor.map(rewrite_one, items)))
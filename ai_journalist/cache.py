@@ -0,0 +1,305 @@
+"""
+Content-addressed response cache for block rewrites and inserts.
+
+Identical `(content, instruction, context, model)` requests come back all
+the time (undo/redo, re-opening an article), and each one costs seconds and
+quota. Results are cached under a hash of the normalized inputs, the
+document and block they target, and the version of the loaded instruction
+files, so editing instructions.md invalidates every entry automatically.
+The agent answers from the document session, so the same text in two
+documents (or two blocks) does not share an entry.
+
+Two tiers:
+    - in-memory LRU with a TTL (always on)
+    - optional SQLite file shared between processes (`AI_CACHE_DB_PATH`);
+      expired rows are deleted by a sweep that runs on `set` at most every
+      `AI_CACHE_SWEEP_SECONDS` (default 300), so the shared file stops
+      growing once the TTL is reached
+
+Clients skip the lookup with `X-Cache-Bypass: 1` or `Cache-Control: no-cache`;
+the fresh result is still stored. On a miss, identical requests already in
+flight share one run (`X-Cache: COALESCED`). Results that did not run the
+model for this request (HIT, COALESCED) carry `cached: True` and
+`tokens_used: 0`.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Awaitable, Callable, Mapping, Optional, Tuple
+
+from ai_journalist.single_flight import get_single_flight
+
+# Only these result fields are needed to rebuild a response body
+CACHED_FIELDS = ('response', 'tokens_used', 'segment_update')
+
+_INSTRUCTION_FILES = (
+    Path(__file__).parent / "instructions.md",
+    Path(__file__).parent / "sub_agents" / "segment_editor" / "instructions.md",
+    Path(__file__).parent / "sub_agents" / "writer" / "instructions.md",
+)
+
+
+@lru_cache(maxsize=1)
+def instructions_version() -> str:
+    """Short hash of the instruction files the agents were built from."""
+    digest = hashlib.sha256()
+    for path in _INSTRUCTION_FILES:
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _model_name() -> str:
+    from ai_journalist.agent import root_agent
+    model = root_agent.model
+    return model if isinstance(model, str) else getattr(model, 'model', type(model).__name__)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Normalize line endings and trailing whitespace; keep inner formatting."""
+    if not text:
+        return ''
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def response_cache_key(
+    kind: str,
+    content: Optional[str],
+    instruction: Optional[str],
+    context: Optional[str],
+    document_id: Optional[str] = None,
+    block_id: Optional[str] = None,
+) -> str:
+    """Cache key for one rewrite/insert request on `block_id` of `document_id`."""
+    payload = json.dumps([
+        kind,
+        document_id or '',
+        block_id or '',
+        normalize_text(content),
+        normalize_text(instruction),
+        normalize_text(context),
+        _model_name(),
+        instructions_version(),
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_bypass_requested(headers: Mapping[str, str]) -> bool:
+    """True if the client asked to skip the cache lookup."""
+    if headers.get('X-Cache-Bypass', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in headers.get('Cache-Control', '').lower()
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + optional SQLite) cache with TTL and hit counters.
+
+    Args:
+        max_entries: Capacity of the in-memory tier.
+        ttl_seconds: Lifetime of an entry in both tiers.
+        db_path: SQLite file for the persistent tier; None disables it.
+        sweep_seconds: Least time between two deletions of expired SQLite
+            rows.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, db_path: Optional[str] = None,
+                 sweep_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        # The first `set` sweeps what earlier processes left behind
+        self._next_sweep = 0.0
+        self._memory: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.expired_deleted = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            max_entries=int(os.getenv('AI_CACHE_MAX_ENTRIES', 1024)),
+            ttl_seconds=float(os.getenv('AI_CACHE_TTL_SECONDS', 86400)),
+            db_path=os.getenv('AI_CACHE_DB_PATH') or None,
+            sweep_seconds=float(os.getenv('AI_CACHE_SWEEP_SECONDS', 300)),
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                if now >= self._next_sweep:
+                    self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        """Delete expired SQLite rows (any process's). Caller holds the lock."""
+        self._next_sweep = now + self.sweep_seconds
+        deleted = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        self.expired_deleted += max(deleted, 0)
+
+    async def get_async(self, key: str) -> Optional[dict]:
+        """`get` for event loops: SQLite lookups run in a worker thread."""
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: dict) -> None:
+        """`set` for event loops: SQLite writes run in a worker thread."""
+        if self._db is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def _remember(self, key: str, expires_at: float, value: dict) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'diskHits': self.disk_hits,
+            'expiredDeleted': self.expired_deleted,
+            'hitRate': round(self.hits / total, 4) if total else 0.0,
+            'entries': len(self._memory),
+            'persistent': self._db is not None,
+        }
+
+
+def _cacheable(result: dict) -> Optional[dict]:
+    """Subset of a successful result worth caching (None for failures)."""
+    if result.get('status') != 'success' or not result.get('response'):
+        return None
+    return {field: result[field] for field in CACHED_FIELDS if field in result}
+
+
+def _reused(result: dict) -> dict:
+    """A result served without running the model for this request."""
+    return {**result, 'tokens_used': 0, 'cached': True}
+
+
+def get_or_run(cache: Optional["ResponseCache"], key: str, run: Callable[[], dict], bypass: bool = False) -> Tuple[dict, str]:
+    """
+    Return `(result, cache_status)`, running `run()` only on a miss.
+
+    Identical requests that miss while a run for `key` is in flight share
+    that run (see single_flight.py). `cache_status` is HIT, MISS, BYPASS or
+    COALESCED (exposed as the `X-Cache` header); for HIT and COALESCED the
+    result reports `tokens_used: 0` and `cached: True`.
+    """
+    if not bypass and cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return _reused(cached), 'HIT'
+
+    def run_and_store() -> dict:
+        result = run()
+        value = _cacheable(result) if cache is not None else None
+        if value is not None:
+            # Stored before the in-flight entry is released, so no gap for a duplicate run
+            cache.set(key, value)
+        return result
+
+    result, shared = get_single_flight().do(key, run_and_store)
+    if shared:
+        return _reused(result), 'COALESCED'
+    return result, 'BYPASS' if bypass or cache is None else 'MISS'
+
+
+async def get_or_run_async(
+    cache: Optional["ResponseCache"], key: str, run: Callable[[], Awaitable[dict]], bypass: bool = False
+) -> Tuple[dict, str]:
+    """Async variant of `get_or_run`; the SQLite tier is read and written off the event loop."""
+    if not bypass and cache is not None:
+        cached = await cache.get_async(key)
+        if cached is not None:
+            return _reused(cached), 'HIT'
+
+    async def run_and_store() -> dict:
+        result = await run()
+        value = _cacheable(result) if cache is not None else None
+        if value is not None:
+            await cache.set_async(key, value)
+        return result
+
+    result, shared = await get_single_flight().do_async(key, run_and_store)
+    if shared:
+        return _reused(result), 'COALESCED'
+    return result, 'BYPASS' if bypass or cache is None else 'MISS'
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache, or None when `AI_CACHE_ENABLED=false`."""
+    global _cache
+    if os.getenv('AI_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache.from_env()
+    return _cache
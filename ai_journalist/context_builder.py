@@ -0,0 +1,212 @@
+"""
+Token-budgeted context for block prompts.
+
+Rewrite, insert and chat requests used to paste the client's free-form
+`context` and document info into the prompt as-is, so prompt size (and
+latency) grew with the article. Everything that goes around a block is now
+assembled here and cut to `AI_CONTEXT_TOKEN_BUDGET` estimated tokens
+(default 1500):
+
+    - with `documentContent` and a block ID, a window of the nearest blocks
+      on both sides of the target, closest first
+    - otherwise the client's `context`, trimmed in the middle
+
+Token counts come from a local estimator (UTF-8 bytes / 4), close enough
+for Latin and Cyrillic text to keep prompts bounded without a tokenizer.
+"""
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from ai_journalist.document_content import document_markdown
+from ai_journalist.tools.markup_blocks import parse_article_blocks
+
+# The pydantic schemas are built on first use; the servers import this module at startup
+if TYPE_CHECKING:
+    from ai_journalist.types.models import NeighborContext, SegmentNeighbors
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv('AI_CONTEXT_TOKEN_BUDGET', 1500))
+
+TRIM_MARKER = ' […] '
+TARGET_MARKER = '[…the block being edited…]'
+INSERT_MARKER = '[…the new block goes here…]'
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count: one token per 4 UTF-8 bytes."""
+    if not text:
+        return 0
+    return (len(text.encode('utf-8')) + 3) // 4
+
+
+def trim_to_tokens(text: Optional[str], max_tokens: int, keep: str = 'both') -> str:
+    """
+    Cut `text` to about `max_tokens` estimated tokens.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget for the result
+        keep: Which part survives: 'start', 'end' or 'both' (head and tail,
+            cut in the middle)
+    """
+    if not text or max_tokens <= 0:
+        return ''
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    chars = max(int(len(text) * max_tokens / tokens) - len(TRIM_MARKER), 0)
+    if keep == 'start':
+        return text[:chars].rstrip() + TRIM_MARKER.rstrip()
+    if keep == 'end':
+        return TRIM_MARKER.lstrip() + text[len(text) - chars:].lstrip()
+    head = chars // 2
+    return text[:head].rstrip() + TRIM_MARKER + text[len(text) - (chars - head):].lstrip()
+
+
+def find_block_index(blocks: List[Dict], block_id: Optional[str]) -> Optional[int]:
+    """Position of the block with `block_id`, or None."""
+    if not block_id:
+        return None
+    return next((i for i, block in enumerate(blocks) if block.get('id') == block_id), None)
+
+
+def context_window(before: List[Dict], after: List[Dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                   marker: str = TARGET_MARKER) -> str:
+    """
+    Render the blocks around a gap, nearest first, within `budget` tokens.
+
+    Blocks are taken alternately from the end of `before` and the start of
+    `after`; the first block that does not fit is trimmed toward the gap and
+    ends the window. The result is in document order with `marker` (if any)
+    at the gap.
+    """
+    remaining = budget - estimate_tokens(marker)
+    taken_before, taken_after = [], []
+    lo, hi = len(before) - 1, 0
+    while remaining > 0 and (lo >= 0 or hi < len(after)):
+        for side in ('before', 'after'):
+            if side == 'before' and lo < 0 or side == 'after' and hi >= len(after):
+                continue
+            block = before[lo] if side == 'before' else after[hi]
+            content = block.get('content', '')
+            cost = estimate_tokens(content) + 1
+            if cost > remaining:
+                content = trim_to_tokens(content, remaining, keep='end' if side == 'before' else 'start')
+                remaining = 0
+            else:
+                remaining -= cost
+            if content:
+                (taken_before if side == 'before' else taken_after).append(content)
+            if side == 'before':
+                lo -= 1
+            else:
+                hi += 1
+            if remaining <= 0:
+                break
+
+    parts = list(reversed(taken_before)) + ([marker] if marker else []) + taken_after
+    return '\n\n'.join(parts)
+
+
+def segment_window(blocks: List[Dict], index: int, budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[int, int]:
+    """
+    `(start, end)` slice of whole blocks around `blocks[index]` within budget.
+
+    The target block is always included; neighbors are added alternately,
+    nearest first, until the next one would not fit.
+    """
+    if not blocks:
+        return 0, 0
+    index = min(max(index, 0), len(blocks) - 1)
+    start, end = index, index + 1
+    remaining = budget - estimate_tokens(blocks[index].get('content', ''))
+    grew = True
+    while grew:
+        grew = False
+        for candidate in (start - 1, end):
+            if not 0 <= candidate < len(blocks):
+                continue
+            cost = estimate_tokens(blocks[candidate].get('content', '')) + 1
+            if cost > remaining:
+                return start, end
+            remaining -= cost
+            start, end = min(start, candidate), max(end, candidate + 1)
+            grew = True
+    return start, end
+
+
+def block_neighbors(blocks: List[Dict], index: int, budget: int = CONTEXT_TOKEN_BUDGET) -> 'SegmentNeighbors':
+    """`SegmentNeighbors` of `blocks[index]`, each neighbor trimmed to half the budget."""
+    from ai_journalist.types.models import NeighborContext, SegmentNeighbors
+
+    def neighbor(i: int, keep: str) -> Optional[NeighborContext]:
+        if not 0 <= i < len(blocks):
+            return None
+        block = blocks[i]
+        return NeighborContext(
+            id=block.get('id'),
+            content=trim_to_tokens(block.get('content', ''), budget // 2, keep=keep),
+            type=block.get('type'),
+            position=block.get('position'),
+            level=block.get('level'),
+        )
+
+    return SegmentNeighbors(previous=neighbor(index - 1, 'end'), next=neighbor(index + 1, 'start'))
+
+
+def trim_neighbors(neighbors: 'SegmentNeighbors', budget: int = CONTEXT_TOKEN_BUDGET) -> 'SegmentNeighbors':
+    """Client-supplied neighbors with each content trimmed to half the budget."""
+    for neighbor, keep in ((neighbors.previous, 'end'), (neighbors.next, 'start')):
+        if neighbor is not None and neighbor.content:
+            neighbor.content = trim_to_tokens(neighbor.content, budget // 2, keep=keep)
+    return neighbors
+
+
+def block_window(blocks: List[Dict], block_id: Optional[str], insert: bool = False,
+                 budget: int = CONTEXT_TOKEN_BUDGET) -> Optional[str]:
+    """
+    Window of blocks around `block_id` within budget, or None if it is not found.
+
+    Args:
+        blocks: Parsed document blocks
+        block_id: Target block
+        insert: True when new text goes after the target block, which is
+            then part of the context
+        budget: Token budget for the window
+    """
+    index = find_block_index(blocks, block_id)
+    if index is None:
+        return None
+    if insert:
+        return context_window(blocks[:index + 1], blocks[index + 1:], budget, INSERT_MARKER)
+    return context_window(blocks[:index], blocks[index + 1:], budget, TARGET_MARKER)
+
+
+def document_blocks(data: dict) -> List[Dict]:
+    """
+    Parsed blocks of the request's `documentContent` (markdown or the
+    back-end's `DocumentContent` JSON; empty if absent).
+    """
+    document_content = data.get('documentContent')
+    if not document_content or not isinstance(document_content, (str, dict)):
+        return []
+    blocks, _ = parse_article_blocks(document_markdown(document_content))
+    return blocks
+
+
+def request_context(data: dict, block_key: str = 'blockId', insert: bool = False,
+                    budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Surrounding-text context for a rewrite or insert request, within budget.
+
+    Args:
+        data: Request body; uses `documentContent`, `data[block_key]` and
+            `context`
+        block_key: Field naming the target block ('blockId' or 'insertAfter')
+        insert: See `block_window`
+        budget: Token budget for the returned context
+    """
+    window = block_window(document_blocks(data), data.get(block_key), insert, budget)
+    if window is not None:
+        return window
+    return trim_to_tokens(data.get('context', ''), budget)
@@ -0,0 +1,306 @@
+"""
+Server-side cache of parsed documents, keyed by `documentId`.
+
+`/api/v1/chat` used to receive the whole `documentContent` on every turn and
+re-parse it from scratch. The service now keeps the text and block list of
+recently used documents, each with a version number, so the back-end can
+send either
+
+    - the full document (`documentContent`): diffed against the cached
+      copy and re-marked incrementally, block IDs of untouched blocks stay
+      the same
+    - a block-level delta (`documentDelta` + `baseVersion`) against the
+      cached version:
+          {"op": "replace", "blockId": "...", "content": "..."}
+          {"op": "insert", "after": "<blockId or null>", "content": "..."}
+          {"op": "delete", "blockId": "..."}
+    - nothing, reusing the cached document as-is
+
+A delta against a stale or evicted version is rejected with the current
+version so the back-end can fall back to a full upload. Entries are evicted
+least-recently-used first once their estimated memory passes
+`AI_DOCUMENT_CACHE_MAX_BYTES` (default 256 MB).
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ai_journalist.document_content import document_markdown
+from ai_journalist.tools.markup_blocks import (
+    changed_line_range,
+    parse_article_blocks,
+    remarkup_article_blocks,
+)
+
+# Rough per-block overhead of the block dict and its ID on top of the text
+_BLOCK_OVERHEAD_BYTES = 400
+
+
+class DocumentDeltaError(ValueError):
+    """
+    Raised when a delta cannot be applied to the cached document.
+
+    `current_version` is the cached version (None if the document is not
+    cached), so the caller can tell the back-end to resend the full text.
+    `status` is the HTTP status the routes answer with.
+    """
+
+    status = 409
+
+    def __init__(self, message: str, current_version: Optional[int] = None):
+        super().__init__(message)
+        self.current_version = current_version
+
+
+class InvalidDeltaError(DocumentDeltaError):
+    """Raised when a delta is malformed (not a list of well-formed operations)."""
+
+    status = 400
+
+
+class CachedDocument:
+    """Text, parsed blocks and version of one document."""
+
+    def __init__(self, content: str, blocks: List[Dict], version: int, used_ids: Optional[set] = None):
+        self.content = content
+        self.blocks = blocks
+        self.version = version
+        self.used_ids = used_ids if used_ids is not None else {block['id'] for block in blocks}
+        self.size = estimate_document_size(content, blocks)
+
+
+def estimate_document_size(content: str, blocks: List[Dict]) -> int:
+    """Approximate memory held by a cached document, in bytes."""
+    # Block contents roughly duplicate the text once more
+    return 2 * sys.getsizeof(content) + _BLOCK_OVERHEAD_BYTES * len(blocks)
+
+
+def _content_lines(content: str) -> List[str]:
+    return content.strip('\n').split('\n') if content.strip() else []
+
+
+def _apply_op(content: str, blocks: List[Dict], op: dict) -> Tuple[str, int, int, int]:
+    """
+    Apply one delta operation to the text.
+
+    Returns:
+        (new_content, start_line, old_end_line, new_end_line) for
+        `remarkup_article_blocks`.
+
+    Raises:
+        DocumentDeltaError: If the operation is malformed or names an
+            unknown block.
+    """
+    if not isinstance(op, dict):
+        raise InvalidDeltaError(f"Delta operations must be objects, got {type(op).__name__}")
+    for field in ('blockId', 'after', 'content'):
+        if op.get(field) is not None and not isinstance(op[field], str):
+            raise InvalidDeltaError(f"Delta operation '{field}' must be a string")
+    lines = content.split('\n')
+    by_id = {block['id']: block for block in blocks}
+    kind = op.get('op')
+
+    if kind in ('replace', 'delete'):
+        block = by_id.get(op.get('blockId'))
+        if block is None:
+            raise DocumentDeltaError(f"Unknown block: {op.get('blockId')}")
+        start, end = block['line_start'], block['line_end']
+        if kind == 'replace':
+            new_lines = _content_lines(op.get('content', ''))
+        else:
+            new_lines = []
+            # Drop the blank separator line too so deletes don't pile up blanks
+            if end < len(lines) and not lines[end].strip():
+                end += 1
+    elif kind == 'insert':
+        after = op.get('after')
+        if after is None:
+            start = end = 0
+            new_lines = _content_lines(op.get('content', '')) + ['']
+        else:
+            block = by_id.get(after)
+            if block is None:
+                raise DocumentDeltaError(f"Unknown block: {after}")
+            start = end = block['line_end']
+            new_lines = [''] + _content_lines(op.get('content', ''))
+            if end < len(lines) and lines[end].strip():
+                new_lines.append('')
+    else:
+        raise InvalidDeltaError(f"Unknown delta op: {kind!r}")
+
+    new_content = '\n'.join(lines[:start] + new_lines + lines[end:])
+    return new_content, start, end, start + len(new_lines)
+
+
+class DocumentCache:
+    """
+    Per-document LRU of parsed block lists, bounded by estimated memory.
+
+    Args:
+        max_bytes: Estimated memory budget for all cached documents.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._documents: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.full_updates = 0
+        self.delta_updates = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "DocumentCache":
+        return cls(max_bytes=int(os.getenv('AI_DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024)))
+
+    def get(self, document_id: str) -> Optional[CachedDocument]:
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+            return document
+
+    def put(self, document_id: str, content: str) -> CachedDocument:
+        """
+        Store the full text of a document and return the updated entry.
+
+        If the document is cached, only the changed region is re-parsed and
+        the version is bumped only when the text actually changed.
+        """
+        with self._lock:
+            previous = self._documents.get(document_id)
+            if previous is not None and previous.content == content:
+                self._documents.move_to_end(document_id)
+                return previous
+
+            if previous is None:
+                blocks, _ = parse_article_blocks(content)
+                document = CachedDocument(content, blocks, version=1)
+            else:
+                span = changed_line_range(previous.content, content)
+                update = remarkup_article_blocks(previous.blocks, content, *span, used_ids=previous.used_ids)
+                document = CachedDocument(content, update['blocks'], previous.version + 1, previous.used_ids)
+            self.full_updates += 1
+            self._store(document_id, document)
+            return document
+
+    def apply_delta(self, document_id: str, base_version: Optional[int], ops: List[dict]) -> CachedDocument:
+        """
+        Apply block-level operations to the cached version `base_version`.
+
+        Raises:
+            DocumentDeltaError: If the document is not cached, `base_version`
+                is not the cached version, or an operation is invalid. The
+                cached document is left unchanged.
+        """
+        with self._lock:
+            previous = self._documents.get(document_id)
+            if previous is None:
+                raise DocumentDeltaError(f"Document {document_id} is not cached; send documentContent")
+            if base_version != previous.version:
+                raise DocumentDeltaError(
+                    f"Stale delta: base version {base_version}, cached version {previous.version}",
+                    current_version=previous.version,
+                )
+
+            if not isinstance(ops, list):
+                raise InvalidDeltaError("'documentDelta' must be a list of operations", previous.version)
+
+            content, blocks = previous.content, previous.blocks
+            used_ids = set(previous.used_ids)
+            try:
+                for op in ops:
+                    content, *span = _apply_op(content, blocks, op)
+                    blocks = remarkup_article_blocks(blocks, content, *span, used_ids=used_ids)['blocks']
+            except DocumentDeltaError as e:
+                e.current_version = previous.version
+                raise
+
+            document = CachedDocument(content, blocks, previous.version + 1, used_ids)
+            self.delta_updates += 1
+            self._store(document_id, document)
+            return document
+
+    def _store(self, document_id: str, document: CachedDocument) -> None:
+        previous = self._documents.pop(document_id, None)
+        if previous is not None:
+            self.total_bytes -= previous.size
+        self._documents[document_id] = document
+        self.total_bytes += document.size
+        # Never evict the document that was just stored
+        while self.total_bytes > self.max_bytes and len(self._documents) > 1:
+            _, evicted = self._documents.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self.evictions += 1
+
+    def drop(self, document_id: str) -> None:
+        with self._lock:
+            document = self._documents.pop(document_id, None)
+            if document is not None:
+                self.total_bytes -= document.size
+
+    def stats(self) -> dict:
+        return {
+            'documents': len(self._documents),
+            'bytes': self.total_bytes,
+            'maxBytes': self.max_bytes,
+            'fullUpdates': self.full_updates,
+            'deltaUpdates': self.delta_updates,
+            'evictions': self.evictions,
+        }
+
+
+_cache: Optional[DocumentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    """Process-wide document cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DocumentCache.from_env()
+    return _cache
+
+
+def resolve_document_blocks(data: dict) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Block list for a request, using and updating the document cache.
+
+    A `documentDelta` takes precedence over `documentContent`; with neither,
+    the cached document is used. Without a `documentId` the
+    `documentContent` is parsed directly and no version is returned.
+    `documentContent` is decoded with `document_markdown` first, so the
+    back-end's `DocumentContent` JSON is cached as its markdown.
+
+    Returns:
+        (blocks, version)
+
+    Raises:
+        DocumentDeltaError: If a `documentDelta` cannot be applied.
+    """
+    document_id = data.get('documentId')
+    document_content = data.get('documentContent')
+    if isinstance(document_content, (str, dict)):
+        document_content = document_markdown(document_content)
+    else:
+        document_content = None
+
+    if not document_id:
+        blocks, _ = parse_article_blocks(document_content or '')
+        return blocks, None
+
+    cache = get_document_cache()
+    if data.get('documentDelta') is not None:
+        document = cache.apply_delta(document_id, data.get('baseVersion'), data['documentDelta'])
+    elif document_content is not None:
+        document = cache.put(document_id, document_content)
+    else:
+        document = cache.get(document_id)
+        if document is None:
+            return [], None
+    return document.blocks, document.version
@@ -0,0 +1,174 @@
+"""
+Markdown for the documents the back-end and the editor send.
+
+The back-end stores articles as `DocumentContent` (`{blocks, metadata}`,
+with the editor's ProseMirror/TipTap JSON in `tiptap` blocks) and sends it
+to this service as `JSON.stringify(content)` in `content` or
+`documentContent` (back-end/src/ai/ai.service.ts). Everything that parses
+an article into blocks (improve_article.py, the document cache, request
+context) decodes it here first, so blocks, their IDs and context windows are
+built from the article's text rather than from one JSON "paragraph".
+"""
+
+import json
+from html.parser import HTMLParser
+from typing import Any, List
+
+# `DocumentContent` block holding the editor's ProseMirror JSON in `data`
+TIPTAP_BLOCK_TYPE = 'tiptap'
+
+
+def _inline_markdown(node: dict) -> str:
+    if node.get('type') == 'text':
+        text = node.get('text', '')
+        for mark in node.get('marks') or []:
+            kind = mark.get('type')
+            if kind == 'bold':
+                text = f"**{text}**"
+            elif kind == 'italic':
+                text = f"*{text}*"
+            elif kind == 'code':
+                text = f"`{text}`"
+            elif kind == 'link':
+                text = f"[{text}]({(mark.get('attrs') or {}).get('href', '')})"
+        return text
+    if node.get('type') == 'hardBreak':
+        return '\n'
+    return ''.join(_inline_markdown(child) for child in node.get('content') or [])
+
+
+class _HtmlMarkdown(HTMLParser):
+    """Markdown-ish text of the editor's HTML: headings, paragraphs, lists, quotes."""
+
+    _BLOCKS = ('p', 'div', 'li', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+    def __init__(self):
+        super().__init__()
+        self.blocks: List[str] = []
+        self._prefix = ''
+        self._text: List[str] = []
+        self._ordered: List[int] = []
+        self._quote_depth = 0
+
+    def _end_block(self) -> None:
+        text = ' '.join(''.join(self._text).split())
+        if text:
+            self.blocks.append('> ' * self._quote_depth + self._prefix + text)
+        self._prefix, self._text = '', []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._BLOCKS:
+            self._end_block()
+            if tag[0] == 'h' and tag[1:].isdigit():
+                self._prefix = '#' * int(tag[1:]) + ' '
+            elif tag == 'li':
+                if self._ordered and self._ordered[-1]:
+                    self._prefix = f"{self._ordered[-1]}. "
+                    self._ordered[-1] += 1
+                else:
+                    self._prefix = '- '
+            elif tag == 'blockquote':
+                self._quote_depth += 1
+        elif tag in ('ol', 'ul'):
+            self._ordered.append(1 if tag == 'ol' else 0)
+        elif tag == 'br':
+            self._text.append(' ')
+        elif tag == 'hr':
+            self._end_block()
+            self.blocks.append('---')
+
+    def handle_endtag(self, tag):
+        if tag in self._BLOCKS:
+            self._end_block()
+            if tag == 'blockquote':
+                self._quote_depth = max(self._quote_depth - 1, 0)
+        elif tag in ('ol', 'ul') and self._ordered:
+            self._ordered.pop()
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+
+def html_markdown(html: str) -> str:
+    """Markdown for the editor's HTML export (`metadata.html`); inline formatting is dropped."""
+    parser = _HtmlMarkdown()
+    parser.feed(html)
+    parser.close()
+    parser._end_block()
+    return '\n\n'.join(parser.blocks)
+
+
+def _document_content_markdown(content: dict) -> str:
+    """
+    Markdown for the back-end's `DocumentContent` (`{blocks, metadata}`).
+
+    `tiptap` blocks carry the editor's document JSON in `data`; other blocks
+    are read as nodes or by their `content` / `text`. Without any text in
+    the blocks, `metadata.html` (the editor's HTML export) or
+    `metadata.text` is used.
+    """
+    parts = []
+    for block in content.get('blocks') or []:
+        if not isinstance(block, dict):
+            continue
+        if block.get('type') == TIPTAP_BLOCK_TYPE:
+            parts.append(document_markdown(block.get('data')))
+        elif isinstance(block.get('content'), str) or isinstance(block.get('text'), str):
+            parts.append(block.get('content') or block.get('text') or '')
+        else:
+            parts.append(document_markdown(block))
+    text = '\n\n'.join(part for part in parts if part and part.strip())
+    if text:
+        return text
+    metadata = content.get('metadata') or {}
+    if isinstance(metadata.get('html'), str) and metadata['html'].strip():
+        return html_markdown(metadata['html'])
+    return metadata.get('text') if isinstance(metadata.get('text'), str) else ''
+
+
+def document_markdown(node: Any) -> str:
+    """
+    Markdown for the back-end's `DocumentContent` or the editor's document
+    JSON (ProseMirror/TipTap nodes).
+
+    Strings are returned as they are, unless they hold one of those as JSON
+    (the back-end sends `documentContent` as `JSON.stringify(content)`);
+    unknown node types fall back to their text.
+    """
+    if isinstance(node, str):
+        if node.lstrip().startswith('{'):
+            try:
+                parsed = json.loads(node)
+            except ValueError:
+                return node
+            if isinstance(parsed, dict) and ('blocks' in parsed or 'type' in parsed):
+                return document_markdown(parsed)
+        return node
+    if not isinstance(node, dict):
+        return ''
+    if 'blocks' in node and 'type' not in node:
+        return _document_content_markdown(node)
+    kind = node.get('type')
+    children = node.get('content') or []
+    if kind == 'heading':
+        level = (node.get('attrs') or {}).get('level') or 1
+        return f"{'#' * level} {_inline_markdown(node)}"
+    if kind == 'paragraph':
+        return _inline_markdown(node)
+    if kind == 'blockquote':
+        return '\n'.join(f"> {line}" for child in children for line in document_markdown(child).split('\n'))
+    if kind in ('bulletList', 'orderedList'):
+        items = []
+        for i, item in enumerate(children, 1):
+            marker = f"{i}." if kind == 'orderedList' else '-'
+            items.append(f"{marker} {document_markdown(item).strip()}")
+        return '\n'.join(items)
+    if kind == 'listItem':
+        return '\n'.join(document_markdown(child) for child in children)
+    if kind == 'codeBlock':
+        return f"```\n{_inline_markdown(node)}\n```"
+    if kind == 'horizontalRule':
+        return '---'
+    if kind == 'doc' or any(child.get('type') not in ('text', 'hardBreak') for child in children):
+        return '\n\n'.join(text for text in (document_markdown(child) for child in children) if text)
+    return _inline_markdown(node)
@@ -0,0 +1,216 @@
+"""
+Map-reduce pipeline for `/api/v1/improve-article`.
+
+The endpoint used to send one generic prompt through `process_article` and
+wait for a single root-agent run to walk the whole article, ignoring the
+`content` the back-end sends. Now:
+
+    1. split: the article (the back-end's `DocumentContent`, the editor's
+       document JSON, markdown, or the cached document) is parsed into
+       blocks (the same blocks `markup_article_blocks` marks) and cut into
+       sections at headings; sections longer than
+       `AI_IMPROVE_SECTION_TOKENS` (default 1500) are cut further
+    2. map: every section goes to `segment_editor` as one `SegmentEditorInput`
+       (neighbors: the blocks just outside it), at most `max_parallel` runs
+       at a time (a thread pool in the Flask app, a semaphore on the ASGI
+       app's event loop), with low priority in the model-call scheduler
+    3. reduce: the `SegmentEditorOutput`s are merged into one list, ranked by
+       how much they change their section
+
+Wall-clock time follows the slowest section rather than the article length.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ai_journalist.batch import BATCH_PARALLELISM
+from ai_journalist.context_builder import estimate_tokens
+from ai_journalist.document_content import document_markdown
+from ai_journalist.tools.markup_blocks import parse_article_blocks
+
+SECTION_TOKEN_BUDGET = int(os.getenv('AI_IMPROVE_SECTION_TOKENS', 1500))
+
+IMPROVE_SECTION_INSTRUCTION = (
+    "Improve this section of a journalistic article: clarity and conciseness, flow and structure, "
+    "grammar and style, engagement and readability. Keep facts, quotes and links."
+)
+
+# Block types that carry no prose worth editing on their own
+_SKIPPED_TYPES = ('horizontal_rule',)
+_NEIGHBOR_FIELDS = ('id', 'content', 'type', 'position', 'level')
+
+
+def article_text(data: dict) -> str:
+    """
+    Article to improve for an `/api/v1/improve-article` body.
+
+    `content` (`DocumentContent`, document JSON or markdown) first, then
+    `documentContent`, then the document cached for `documentId`; empty if
+    there is none.
+    """
+    text = document_markdown(data.get('content')) or document_markdown(data.get('documentContent'))
+    if not text.strip() and data.get('documentId'):
+        from ai_journalist.document_cache import get_document_cache
+        document = get_document_cache().get(data['documentId'])
+        text = document.content if document else ''
+    return text if text.strip() else ''
+
+
+def split_sections(blocks: List[Dict], max_tokens: int = SECTION_TOKEN_BUDGET) -> List[List[Dict]]:
+    """
+    Cut blocks into sections: a new one starts at every heading and
+    whenever the current one would pass `max_tokens`. Sections without any
+    prose (only rules) are dropped.
+    """
+    sections, current, tokens = [], [], 0
+    for block in blocks:
+        cost = estimate_tokens(block.get('content', ''))
+        if current and (block['type'].startswith('heading_') or tokens + cost > max_tokens):
+            sections.append(current)
+            current, tokens = [], 0
+        current.append(block)
+        tokens += cost
+    if current:
+        sections.append(current)
+    return [section for section in sections if any(block['type'] not in _SKIPPED_TYPES for block in section)]
+
+
+def _neighbor(block: Optional[Dict]) -> Optional[dict]:
+    return {field: block.get(field) for field in _NEIGHBOR_FIELDS} if block else None
+
+
+def section_inputs(blocks: List[Dict], sections: List[List[Dict]]) -> list:
+    """
+    One `SegmentEditorInput` per section; the segment ID is the section's
+    first block ID. Sections are low priority, so interactive edits are
+    scheduled ahead of them.
+    """
+    from ai_journalist.segment_editing import build_segment_editor_input
+    
+    inputs = []
+    for section in sections:
+        first, last = section[0]['position'], section[-1]['position']
+        inputs.append(build_segment_editor_input(
+            '\n\n'.join(block['content'] for block in section),
+            IMPROVE_SECTION_INSTRUCTION,
+            block_id=section[0]['id'],
+            block_type=section[0]['type'] if len(section) == 1 else 'paragraph',
+            neighbors={
+                'previous': _neighbor(blocks[first - 1] if first > 0 else None),
+                'next': _neighbor(blocks[last + 1] if last + 1 < len(blocks) else None),
+            },
+            priority='low',
+        ))
+    return inputs
+
+
+def _score(original: str, result: dict) -> float:
+    """How much an update changes its section: 0 (nothing) to 1 (all new text)."""
+    update = result['segment_update']
+    if result['response'] != original:
+        # quick_ratio is an upper bound of the similarity; any edit counts as a change
+        return max(round(1 - SequenceMatcher(None, original, result['response']).quick_ratio(), 4), 0.0001)
+    # Notes, flags or fact-checks without replacement text
+    return 0.5 if update.get('actions') else 0.0
+
+
+def rank_updates(inputs: list, results: List[dict]) -> List[dict]:
+    """
+    Merge per-section results into one list of `SegmentEditorOutput` dicts,
+    most significant change first (ties in document order). Each entry gets
+    a `score` (see `_score`); skipped, failed and unstructured sections are
+    left out.
+    """
+    ranked = []
+    for order, (editor_input, result) in enumerate(zip(inputs, results)):
+        update = result.get('segment_update')
+        if result.get('status') == 'error' or not update or update.get('status') != 'updated':
+            continue
+        score = _score(editor_input.segment.content, result)
+        if score > 0:
+            ranked.append((-score, order, {**update, 'score': score}))
+    return [entry for _, _, entry in sorted(ranked, key=lambda item: item[:2])]
+
+
+async def improve_sections_async(
+    text: str,
+    max_parallel: int = BATCH_PARALLELISM,
+    run_edit: Optional[Callable[..., Awaitable[dict]]] = None,
+) -> dict:
+    """
+    Improve an article section by section.
+
+    Args:
+        text: Article markdown
+        max_parallel: Concurrent segment_editor runs
+        run_edit: Coroutine running one `SegmentEditorInput` (lets the ASGI
+            app route runs through its process-wide concurrency limit;
+            defaults to `edit_segment_async`)
+
+    Returns:
+        Result dict: `response` (summary), `updates` (ranked),
+        `sections`, `failed` and `tokens_used`
+    """
+    if run_edit is None:
+        from ai_journalist.segment_editing import edit_segment_async as run_edit
+    
+    blocks, _ = parse_article_blocks(text)
+    sections = split_sections(blocks)
+    inputs = section_inputs(blocks, sections)
+    slots = asyncio.Semaphore(max(1, max_parallel))
+
+    async def run(editor_input) -> dict:
+        async with slots:
+            try:
+                return await run_edit(editor_input)
+            except Exception as e:
+                return {'status': 'error', 'error': str(e)}
+
+    results = await asyncio.gather(*(run(editor_input) for editor_input in inputs))
+    return _improve_body(inputs, sections, results)
+
+
+def improve_sections(
+    text: str,
+    max_parallel: int = BATCH_PARALLELISM,
+    run_edit: Optional[Callable[..., dict]] = None,
+) -> dict:
+    """
+    Blocking variant of `improve_sections_async` for the Flask app.
+
+    Sections run on a thread pool of `max_parallel` threads, each through the
+    blocking `edit_segment` (or `run_edit`), so no event loop is created per
+    request.
+    """
+    if run_edit is None:
+        from ai_journalist.segment_editing import edit_segment as run_edit
+
+    blocks, _ = parse_article_blocks(text)
+    sections = split_sections(blocks)
+    inputs = section_inputs(blocks, sections)
+
+    def run(editor_input) -> dict:
+        try:
+            return run_edit(editor_input)
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel), thread_name_prefix='improve-article') as executor:
+        results = list(executor.map(run, inputs))
+    return _improve_body(inputs, sections, results)
+
+
+def _improve_body(inputs: list, sections: List[List[Dict]], results: List[dict]) -> dict:
+    updates = rank_updates(inputs, results)
+    failed = sum(1 for result in results if result.get('status') == 'error')
+    return {
+        'status': 'success' if failed < len(results) or not results else 'error',
+        'response': f"Suggested {len(updates)} improvements across {len(sections)} sections.",
+        'updates': updates,
+        'sections': len(sections),
+        'failed': failed,
+        'tokens_used': sum(result.get('tokens_used', 0) for result in results),
+    }
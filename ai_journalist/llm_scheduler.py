@@ -0,0 +1,375 @@
+"""
+Priority- and rate-limit-aware scheduling of model calls.
+
+Every agent used to call Gemini directly: concurrent editors and
+`improve-article` fan-outs hit the per-minute quota together, and a 429 only
+surfaced afterwards, as an error string in the run's result. Every model call
+now goes through `ScheduledLlm` (see `resolve_model`), which asks the
+process-wide `LlmScheduler` for a slot first:
+
+    - rate: one token bucket per model, refilled at `AI_LLM_RPM` requests
+      per minute with room for `AI_LLM_BURST` back-to-back calls
+      (`AI_LLM_RPM=0`: no limit until the API answers 429)
+    - priority: callers waiting for a token are served high -> normal -> low,
+      first come first served within a level; the level is the
+      `llm_priority` session state key (`SchedulerPlugin` reads it before
+      each model call), set from `SegmentInstruction.priority` by the
+      direct segment edits and from the `priority` argument of
+      `process_article` / `stream_article` (the editor's rewrite, insert
+      and chat routes run 'high', `improve-article` 'low'), so interactive
+      requests overtake bulk work
+    - 429: the bucket is emptied and closed for the backoff delay (the
+      server's `retryDelay` if it sent one, otherwise full-jitter
+      exponential), so every waiter backs off together and calls resume at
+      the refill rate instead of as a burst; the call is retried up to
+      `AI_LLM_MAX_RETRIES` times while the process-wide retry budget
+      (`AI_LLM_RETRY_RATIO` credits per successful call, at most
+      `AI_LLM_RETRY_BUDGET`) lasts, so a hard quota does not turn into a
+      retry storm
+
+Only a call that fails before its first chunk is retried; a stream that has
+already yielded text fails as before.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from ai_journalist.metrics import REGISTRY
+
+LLM_RPM = float(os.getenv('AI_LLM_RPM', 0))
+LLM_BURST = int(os.getenv('AI_LLM_BURST', 5))
+LLM_MAX_RETRIES = int(os.getenv('AI_LLM_MAX_RETRIES', 3))
+LLM_BACKOFF_BASE_S = float(os.getenv('AI_LLM_BACKOFF_BASE_MS', 1000)) / 1000
+LLM_BACKOFF_MAX_S = float(os.getenv('AI_LLM_BACKOFF_MAX_MS', 60000)) / 1000
+LLM_RETRY_RATIO = float(os.getenv('AI_LLM_RETRY_RATIO', 0.2))
+LLM_RETRY_BUDGET = float(os.getenv('AI_LLM_RETRY_BUDGET', 10))
+
+PRIORITY_KEY = 'llm_priority'
+PRIORITIES = ('high', 'normal', 'low')
+
+llm_queue_wait = REGISTRY.histogram(
+    'ai_llm_queue_wait_seconds', 'Time model calls waited for a rate-limit slot.', ('model', 'priority'))
+llm_rate_limited = REGISTRY.counter(
+    'ai_llm_rate_limited_total', 'Model calls answered with 429 by the API.', ('model',))
+llm_retries = REGISTRY.counter(
+    'ai_llm_retries_total', 'Model calls retried after a 429.', ('model',))
+llm_queued = REGISTRY.gauge(
+    'ai_llm_queued_calls', 'Model calls waiting for a rate-limit slot.', ('model',))
+
+# Priority of the model call being made on this task; set by SchedulerPlugin
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar('llm_priority', default='normal')
+
+_RATE_LIMITED = re.compile(r'\b429\b|RESOURCE_EXHAUSTED')
+_RETRY_DELAY = re.compile(r"retry(?:Delay| in)['\":\s]*(\d+(?:\.\d+)?)s", re.I)
+
+
+def highest_priority(priorities) -> str:
+    """Most urgent of `priorities` ('normal' if there are none)."""
+    ranks = [PRIORITIES.index(p) for p in priorities if p in PRIORITIES]
+    return PRIORITIES[min(ranks)] if ranks else 'normal'
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether a model error is a 429 / RESOURCE_EXHAUSTED answer."""
+    if getattr(error, 'code', None) == 429 or getattr(error, 'status', None) == 'RESOURCE_EXHAUSTED':
+        return True
+    return bool(_RATE_LIMITED.search(str(error)))
+
+
+def retry_delay_hint(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (`RetryInfo.retryDelay`), if it said."""
+    match = _RETRY_DELAY.search(f"{getattr(error, 'details', '')} {error}")
+    return float(match.group(1)) if match else None
+
+
+class _Bucket:
+    """Token bucket of one model plus the calls waiting on it. Guarded by the scheduler's lock."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.closed_until = 0.0
+        self.waiters: List[list] = []
+        self.timer: Optional[threading.Timer] = None
+
+    def refill(self, now: float) -> None:
+        if now < self.closed_until:
+            return
+        if not self.rate:
+            self.tokens = float(self.capacity)
+        else:
+            start = max(self.updated, self.closed_until)
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next token (0 if one is available)."""
+        if now < self.closed_until:
+            return self.closed_until - now + (1 / self.rate if self.rate else 0)
+        if self.tokens >= 1 or not self.rate:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class LlmScheduler:
+    """
+    Hands out model-call slots per model, by priority and within the rate limit.
+
+    Thread-safe and usable from several event loops at once (Flask request
+    threads each run their own loop, the ASGI app shares one).
+
+    Args:
+        rpm: Requests per minute per model (0: unlimited)
+        burst: Calls allowed back to back when the bucket is full
+        max_retries: Retries of one call after a 429
+        backoff_base: First backoff delay in seconds (doubled per attempt)
+        backoff_max: Longest backoff delay in seconds
+        retry_ratio: Retry credits earned per successful call
+        retry_budget: Most retry credits kept
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        burst: int = LLM_BURST,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE_S,
+        backoff_max: float = LLM_BACKOFF_MAX_S,
+        retry_ratio: float = LLM_RETRY_RATIO,
+        retry_budget: float = LLM_RETRY_BUDGET,
+    ):
+        self.rate = rpm / 60
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_ratio = retry_ratio
+        self.retry_budget = retry_budget
+        self._retry_credits = retry_budget
+        self._buckets: Dict[str, _Bucket] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _bucket(self, model: str) -> _Bucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets[model] = _Bucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, model: str, priority: str = 'normal') -> float:
+        """
+        Wait for a slot to call `model`.
+
+        Args:
+            model: Model name; each has its own bucket
+            priority: 'high', 'normal' or 'low'
+
+        Returns:
+            Seconds spent waiting.
+        """
+        rank = PRIORITIES.index(priority) if priority in PRIORITIES else 1
+        started = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(model)
+            bucket.refill(started)
+            if not bucket.waiters and bucket.tokens >= 1:
+                bucket.tokens -= 1
+                llm_queue_wait.observe(0, model=model, priority=PRIORITIES[rank])
+                return 0.0
+            loop = asyncio.get_running_loop()
+            waiter = [rank, next(self._seq), loop, loop.create_future()]
+            heapq.heappush(bucket.waiters, waiter)
+            llm_queued.inc(model=model)
+            self._dispatch(model, bucket)
+        try:
+            await waiter[3]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in bucket.waiters:
+                    bucket.waiters.remove(waiter)
+                    heapq.heapify(bucket.waiters)
+                    llm_queued.dec(model=model)
+            raise
+        waited = time.monotonic() - started
+        llm_queue_wait.observe(waited, model=model, priority=PRIORITIES[rank])
+        return waited
+
+    def _dispatch(self, model: str, bucket: _Bucket) -> None:
+        """Hand free tokens to the most urgent waiters; arm a timer for the rest. Caller holds the lock."""
+        now = time.monotonic()
+        bucket.refill(now)
+        # Without a rate limit an open bucket lets every waiter through, not just a burst
+        unlimited = not bucket.rate and now >= bucket.closed_until
+        while bucket.waiters and (unlimited or bucket.tokens >= 1):
+            waiter = heapq.heappop(bucket.waiters)
+            llm_queued.dec(model=model)
+            try:
+                waiter[2].call_soon_threadsafe(self._wake, model, waiter[3])
+            except RuntimeError:
+                # Its event loop is gone (a finished asyncio.run); the token stays
+                continue
+            bucket.tokens = max(bucket.tokens - 1, 0.0)
+        if bucket.waiters and bucket.timer is None:
+            bucket.timer = threading.Timer(bucket.wait_time(now), self._on_timer, (model,))
+            bucket.timer.daemon = True
+            bucket.timer.start()
+
+    def _on_timer(self, model: str) -> None:
+        with self._lock:
+            bucket = self._buckets[model]
+            bucket.timer = None
+            self._dispatch(model, bucket)
+
+    def _wake(self, model: str, future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+            return
+        # Cancelled after its token was handed out: give it to the next waiter
+        with self._lock:
+            bucket = self._buckets[model]
+            bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+            self._dispatch(model, bucket)
+
+    def succeeded(self) -> None:
+        """Record a successful call, earning retry credit."""
+        with self._lock:
+            self._retry_credits = min(self.retry_budget, self._retry_credits + self.retry_ratio)
+
+    def rate_limited(self, model: str, attempt: int, error: BaseException) -> Optional[float]:
+        """
+        Record a 429 and close the model's bucket for the backoff delay.
+
+        Args:
+            model: Model that answered 429
+            attempt: Retries already made for this call
+            error: The 429 error
+
+        Returns:
+            Seconds to back off before retrying, or None if the call should
+            not be retried (out of retries or retry budget).
+        """
+        llm_rate_limited.inc(model=model)
+        hint = retry_delay_hint(error)
+        if hint is not None:
+            delay = min(hint, self.backoff_max) + random.uniform(0, self.backoff_base)
+        else:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(model)
+            bucket.tokens = 0.0
+            bucket.updated = now
+            bucket.closed_until = max(bucket.closed_until, now + delay)
+            if attempt >= self.max_retries or self._retry_credits < 1:
+                return None
+            self._retry_credits -= 1
+        llm_retries.inc(model=model)
+        return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'retryCredits': round(self._retry_credits, 2),
+                'queued': {model: len(bucket.waiters) for model, bucket in self._buckets.items()},
+            }
+
+
+class ScheduledLlm(BaseLlm):
+    """
+    Model wrapper that gets a slot from the scheduler before every call and
+    retries calls answered with 429. `model` is the wrapped model's name.
+    """
+
+    llm: BaseLlm
+    scheduler: Optional[LlmScheduler] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        scheduler = self.scheduler or get_llm_scheduler()
+        attempt = 0
+        while True:
+            await scheduler.acquire(self.model, _priority.get())
+            started = False
+            try:
+                async for response in self.llm.generate_content_async(llm_request, stream=stream):
+                    started = True
+                    yield response
+                scheduler.succeeded()
+                return
+            except Exception as e:
+                if started or not is_rate_limited(e):
+                    raise
+                delay = scheduler.rate_limited(self.model, attempt, e)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def connect(self, llm_request: LlmRequest):
+        return self.llm.connect(llm_request)
+
+
+def scheduled(llm: BaseLlm) -> ScheduledLlm:
+    """Route `llm`'s calls through the process-wide scheduler."""
+    return ScheduledLlm(model=llm.model, llm=llm)
+
+
+class SchedulerPlugin(BasePlugin):
+    """Reads the run's `llm_priority` before each model call (same task as the call)."""
+
+    def __init__(self, name: str = 'llm_scheduler'):
+        super().__init__(name)
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        _priority.set(callback_context.state.get(PRIORITY_KEY) or 'normal')
+        return None
+
+
+_scheduler: Optional[LlmScheduler] = None
+_plugin: Optional[SchedulerPlugin] = None
+_lock = threading.Lock()
+
+
+def start_llm_scheduler(**kwargs) -> LlmScheduler:
+    """
+    Create the process-wide scheduler if it does not exist yet.
+
+    Keyword arguments are passed to `LlmScheduler` (e.g. a prefork worker's
+    share of `rpm`).
+    """
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = LlmScheduler(**kwargs)
+        return _scheduler
+
+
+def get_llm_scheduler() -> LlmScheduler:
+    """Process-wide scheduler shared by every model."""
+    return _scheduler if _scheduler is not None else start_llm_scheduler()
+
+
+def get_scheduler_plugin() -> SchedulerPlugin:
+    """Process-wide plugin passing run priorities to the scheduler."""
+    global _plugin
+    if _plugin is None:
+        with _lock:
+            if _plugin is None:
+                _plugin = SchedulerPlugin()
+    return _plugin
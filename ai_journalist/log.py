@@ -0,0 +1,134 @@
+"""
+Structured logging for the AI service.
+
+Replaces the per-event `print` dumps of the runner and API views with the
+standard `logging` module:
+
+    - one `ai_journalist` logger tree, level from `AI_LOG_LEVEL` (default INFO)
+    - every record carries the current request ID (`X-Request-ID` or a fresh
+      one per request), set with `bind_request_id`
+    - `AI_LOG_FORMAT=json` emits one JSON object per line with the record's
+      structured fields; the default is a short text line
+    - verbose per-event dumps are DEBUG only and sampled per run with
+      `AI_LOG_EVENT_SAMPLE_RATE` (default 1.0), so with debug output off the
+      hot path builds no log strings at all
+
+Usage:
+    logger = get_logger(__name__)
+    logger.info("Run finished", extra={'fields': {'events': 12}})
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from typing import Optional
+
+ROOT_LOGGER = 'ai_journalist'
+
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar('request_id', default='-')
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def bind_request_id(request_id: Optional[str] = None) -> str:
+    """Set the request ID for the current context (a new one if not given)."""
+    request_id = request_id or new_request_id()
+    _request_id.set(request_id)
+    return request_id
+
+
+def current_request_id() -> str:
+    return _request_id.get()
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with `extra={'fields': {...}}` merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """`time level [request_id] message key=value ...`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = (
+            f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<5} "
+            f"[{getattr(record, 'request_id', '-')}] {record.getMessage()}"
+        )
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """
+    Attach a stdout handler to the `ai_journalist` logger (idempotent).
+
+    Args:
+        level: Log level name (defaults to `AI_LOG_LEVEL`, then INFO)
+        fmt: 'text' or 'json' (defaults to `AI_LOG_FORMAT`, then text)
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel((level or os.getenv('AI_LOG_LEVEL', 'INFO')).upper())
+        handler = logging.StreamHandler(sys.stdout)
+        handler.addFilter(_RequestIdFilter())
+        fmt = fmt or os.getenv('AI_LOG_FORMAT', 'text')
+        handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the `ai_journalist` tree, configuring output on first use."""
+    configure_logging()
+    if not name.startswith(ROOT_LOGGER):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
+
+
+def event_dump_enabled(logger: logging.Logger) -> bool:
+    """
+    Decide once per run whether to dump its events.
+
+    True only with DEBUG enabled, for a random `AI_LOG_EVENT_SAMPLE_RATE`
+    fraction of runs.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = float(os.getenv('AI_LOG_EVENT_SAMPLE_RATE', 1.0))
+    return rate >= 1.0 or random.random() < rate
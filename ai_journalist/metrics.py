@@ -0,0 +1,236 @@
+"""
+Prometheus-style metrics for the AI service.
+
+`GET /metrics` (Flask and ASGI) renders everything below in the Prometheus
+text exposition format:
+
+    - per-route request latency histograms, request counts by status and
+      in-flight request gauges (recorded by the servers)
+    - agent run and tool call durations per agent / tool
+      (`markup_article_blocks`, `segment_editor`, ...), model calls, events
+      and token usage from the model's usage metadata, recorded by
+      `MetricsPlugin`, which every pooled Runner carries
+    - response cache and document cache counters, read at scrape time
+
+The registry is a small in-process one (no client library needed); values
+are per process, so a multi-worker deployment is scraped per worker.
+
+`MetricsPlugin` lives in ai_journalist/metrics_plugin.py, so this module
+(and the servers importing it) does not load google.adk.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; agent runs take from milliseconds (cache, stub) to minutes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests or tokens."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket distribution of observed values (durations)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def _samples(self) -> Iterable[str]:
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh gauges right before a scrape."""
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_cls, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+http_requests = REGISTRY.counter(
+    'ai_http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status'))
+http_request_duration = REGISTRY.histogram(
+    'ai_http_request_duration_seconds', 'HTTP request latency (streams: until the stream closes).',
+    ('method', 'route'))
+http_in_flight = REGISTRY.gauge(
+    'ai_http_requests_in_flight', 'HTTP requests being served.', ('route',))
+agent_runs_in_flight = REGISTRY.gauge(
+    'ai_agent_runs_in_flight', 'Top-level agent runs in progress.')
+agent_duration = REGISTRY.histogram(
+    'ai_agent_run_duration_seconds', 'Agent invocation duration, sub-agents included.', ('agent',))
+tool_duration = REGISTRY.histogram(
+    'ai_tool_call_duration_seconds', 'Tool call duration.', ('tool', 'status'))
+model_calls = REGISTRY.counter(
+    'ai_model_calls_total', 'Completed model calls.', ('agent',))
+model_errors = REGISTRY.counter(
+    'ai_model_errors_total', 'Model calls that raised.', ('agent',))
+events_total = REGISTRY.counter(
+    'ai_events_total', 'Non-partial Runner events by author.', ('author',))
+tokens_total = REGISTRY.counter(
+    'ai_tokens_total', 'Tokens from model usage metadata.', ('agent', 'kind'))
+
+
+def route_label(route: Optional[str]) -> str:
+    """Route template for request metrics; unknown paths share one label."""
+    return route or 'unmatched'
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Record one served HTTP request."""
+    http_requests.inc(method=method, route=route, status=str(status))
+    http_request_duration.observe(seconds, method=method, route=route)
+
+
+def _collect_caches() -> None:
+    from ai_journalist.cache import get_response_cache
+    from ai_journalist.document_cache import get_document_cache
+
+    cache = get_response_cache()
+    if cache is not None:
+        stats = cache.stats()
+        for field, name in (('hits', 'hits'), ('misses', 'misses'), ('diskHits', 'disk_hits'),
+                            ('entries', 'entries'), ('hitRate', 'hit_ratio')):
+            REGISTRY.gauge(f'ai_response_cache_{name}', f'Response cache {field}.').set(stats[field])
+
+    stats = get_document_cache().stats()
+    for field, name in (('documents', 'documents'), ('bytes', 'bytes'), ('fullUpdates', 'full_updates'),
+                        ('deltaUpdates', 'delta_updates'), ('evictions', 'evictions')):
+        REGISTRY.gauge(f'ai_document_cache_{name}', f'Document cache {field}.').set(stats[field])
+
+
+REGISTRY.add_collector(_collect_caches)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,163 @@
+"""
+ADK plugin feeding the agent, tool, model and token metrics of
+ai_journalist/metrics.py.
+
+`MetricsPlugin` also totals the tokens of each top-level agent run,
+including runs of sub-agents called through `AgentTool`, so
+`run_tokens_used` can fill `tokens_used` in every result.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from ai_journalist.metrics import (
+    agent_duration,
+    agent_runs_in_flight,
+    events_total,
+    model_calls,
+    model_errors,
+    tokens_total,
+    tool_duration,
+)
+
+
+class _RunTally:
+    def __init__(self, invocation_id: str):
+        self.invocation_id = invocation_id
+        self.tokens = 0
+
+
+# Tally of the top-level run on this task; AgentTool sub-runs inherit it
+_run_tally: contextvars.ContextVar[Optional[_RunTally]] = contextvars.ContextVar('run_tally', default=None)
+
+# Finished runs whose token totals have not been picked up yet
+_MAX_FINISHED_RUNS = 1024
+
+
+class MetricsPlugin(BasePlugin):
+    """
+    ADK plugin timing agents and tools and counting model calls, events and tokens.
+
+    Registered on every pooled Runner; `AgentTool` passes its plugins to
+    the sub-agent's runner, so sub-agent calls are measured as well.
+    """
+
+    def __init__(self, name: str = 'metrics'):
+        super().__init__(name)
+        self._started: Dict[tuple, float] = {}
+        self._finished: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def before_run_callback(self, *, invocation_context):
+        if _run_tally.get() is None:
+            _run_tally.set(_RunTally(invocation_context.invocation_id))
+            agent_runs_in_flight.inc()
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        tally = _run_tally.get()
+        if tally is not None and tally.invocation_id == invocation_context.invocation_id:
+            _run_tally.set(None)
+            agent_runs_in_flight.dec()
+            with self._lock:
+                self._finished[tally.invocation_id] = tally.tokens
+                while len(self._finished) > _MAX_FINISHED_RUNS:
+                    self._finished.popitem(last=False)
+        # Drop start times of agents and tools that never finished
+        invocation_id = invocation_context.invocation_id
+        for key in [key for key in self._started if key[0] == invocation_id]:
+            self._started.pop(key, None)
+
+    async def on_event_callback(self, *, invocation_context, event):
+        if not event.partial:
+            events_total.inc(author=event.author or 'unknown')
+        return None
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        self._started[(callback_context.invocation_id, 'agent', agent.name)] = time.perf_counter()
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        started = self._started.pop((callback_context.invocation_id, 'agent', agent.name), None)
+        if started is not None:
+            agent_duration.observe(time.perf_counter() - started, agent=agent.name)
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        agent = callback_context.agent_name
+        model_calls.inc(agent=agent)
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            tokens_total.inc(usage.prompt_token_count or 0, agent=agent, kind='prompt')
+            tokens_total.inc(usage.candidates_token_count or 0, agent=agent, kind='completion')
+            tokens_total.inc(usage.total_token_count or 0, agent=agent, kind='total')
+            tally = _run_tally.get()
+            if tally is not None:
+                tally.tokens += usage.total_token_count or 0
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        model_errors.inc(agent=callback_context.agent_name)
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._started[(tool_context.invocation_id, 'tool', tool_context.function_call_id)] = time.perf_counter()
+        return None
+
+    def _observe_tool(self, tool, tool_context, status: str) -> None:
+        started = self._started.pop((tool_context.invocation_id, 'tool', tool_context.function_call_id), None)
+        if started is not None:
+            tool_duration.observe(time.perf_counter() - started, tool=tool.name, status=status)
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._observe_tool(tool, tool_context, 'ok')
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._observe_tool(tool, tool_context, 'error')
+        return None
+
+    def pop_run_tokens(self, invocation_id: str) -> Optional[int]:
+        """Token total of a finished top-level run (None if unknown)."""
+        with self._lock:
+            return self._finished.pop(invocation_id, None)
+
+
+_plugin: Optional[MetricsPlugin] = None
+_plugin_lock = threading.Lock()
+
+
+def get_metrics_plugin() -> MetricsPlugin:
+    """Process-wide metrics plugin shared by all pooled runners."""
+    global _plugin
+    if _plugin is None:
+        with _plugin_lock:
+            if _plugin is None:
+                _plugin = MetricsPlugin()
+    return _plugin
+
+
+def run_tokens_used(events: list) -> int:
+    """
+    Tokens spent by the run that produced `events`.
+
+    Uses the plugin's total for the run (sub-agents included) and falls back
+    to the usage metadata on the events themselves.
+    """
+    invocation_id = next((event.invocation_id for event in events if getattr(event, 'invocation_id', None)), None)
+    tokens = get_metrics_plugin().pop_run_tokens(invocation_id) if invocation_id else None
+    if tokens is not None:
+        return tokens
+    total = 0
+    for event in events:
+        usage = getattr(event, 'usage_metadata', None)
+        if usage and usage.total_token_count and not getattr(event, 'partial', False):
+            total += usage.total_token_count
+    return total
@@ -0,0 +1,304 @@
+"""
+Model backend selection, including a deterministic local model.
+
+Every agent takes its model from `resolve_model()`:
+
+    AI_MODEL_BACKEND=gemini  (default) the Gemini model named by `AI_MODEL`
+    AI_MODEL_BACKEND=local   `LocalLlm`, which needs no network or API key
+
+`LocalLlm` answers the way the real agents are expected to, so the whole
+`api_server` -> `process_article` -> agent path (tool calls included) can
+be run and load-tested offline:
+
+    - journalist_agent: for a rewrite or insert prompt it calls the
+      `segment_editor` tool with a `SegmentEditorInput`, for anything else
+      `markup_article_blocks` with the article; once the tool result is back
+      it answers with the edited text or a short markup summary
+    - segment_editor: a valid `SegmentEditorOutput` JSON, edited by simple
+      per-instruction rules (tighten drops filler words, expand appends the
+      instruction, ...)
+    - optional scripted replies from `AI_LOCAL_MODEL_SCRIPT`, a JSON list of
+      rules tried in order before the built-in ones:
+          {"match": "<regex on the last user text>",
+           "after_tool": "<tool whose result was just returned>",
+           "reply": "<text or JSON object>",
+           "function_call": {"name": "...", "args": {...}},
+           "latency_ms": 50}
+
+Every call waits `AI_LOCAL_MODEL_LATENCY_MS` (default 0) first and reports
+usage metadata with estimated token counts (system instruction and tool
+declarations included). Each instance also counts its `calls` and
+`prompt_tokens`, so benchmarks can compare routes by model traffic.
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import AsyncGenerator, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from ai_journalist.context_builder import estimate_tokens
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+
+_ARTICLE = re.compile(r'Please process this article:\n\n(?P<article>.*)\n\nPlease:\n1\. Markup', re.S)
+_REWRITE = re.compile(
+    r'Context \(surrounding text\):\n(?P<context>.*?)\n\nText to rewrite:\n(?P<content>.*?)\n\n'
+    r'Instruction: (?P<instruction>.*?)\n\n', re.S)
+_INSERT = re.compile(r'Context \(surrounding text\):\n(?P<context>.*?)\n\nInstruction: (?P<instruction>.*?)\n\n'
+                     r'Please use your segment_editor tool to create', re.S)
+_FILLER_WORDS = re.compile(r'\b(?:very|really|just|quite|actually|basically|simply|rather|somewhat)\s+', re.I)
+
+_KIND_KEYWORDS = (
+    ('tighten', ('tighten', 'shorten', 'shorter', 'concise', 'trim')),
+    ('expand', ('expand', 'longer', 'elaborate', 'more detail')),
+    ('fact_check', ('fact-check', 'fact check', 'verify')),
+    ('mark_for_deletion', ('delete', 'remove this')),
+)
+
+
+def resolve_model(default: str = DEFAULT_MODEL):
+    """
+    Model for an agent, per `AI_MODEL_BACKEND`.
+
+    Returns:
+        A `LocalLlm` for the local backend, otherwise the Gemini model named
+        by `AI_MODEL` (falling back to `default`); either way wrapped in a
+        `ScheduledLlm`, so calls go through the rate limiter (see
+        llm_scheduler.py).
+    """
+    from google.adk.models.google_llm import Gemini
+
+    from ai_journalist.llm_scheduler import scheduled
+
+    if os.getenv('AI_MODEL_BACKEND', 'gemini').lower() == 'local':
+        return scheduled(LocalLlm(latency_s=float(os.getenv('AI_LOCAL_MODEL_LATENCY_MS', 0)) / 1000))
+    return scheduled(Gemini(model=os.getenv('AI_MODEL', default)))
+
+
+def _load_script(path: Optional[str]) -> List[dict]:
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: expected a JSON list of rules")
+    return rules
+
+
+def _text_of(content: types.Content) -> str:
+    return '\n'.join(part.text for part in content.parts or [] if part.text)
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == 'user':
+            text = _text_of(content)
+            if text:
+                return text
+    return ''
+
+
+def _tool_result(llm_request: LlmRequest) -> Optional[types.FunctionResponse]:
+    """Function response the model has just been given, if any."""
+    last = llm_request.contents[-1] if llm_request.contents else None
+    for part in (last.parts or []) if last else []:
+        if part.function_response:
+            return part.function_response
+    return None
+
+
+def _instruction_kind(instruction: str) -> str:
+    lowered = instruction.lower()
+    for kind, keywords in _KIND_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return kind
+    return 'rewrite'
+
+
+def _sentence(text: str) -> str:
+    text = ' '.join(text.split())
+    if text and text[-1] not in '.!?…':
+        text += '.'
+    return text[:1].upper() + text[1:]
+
+
+def edit_segment_locally(editor_input: dict) -> dict:
+    """
+    Rule-based `SegmentEditorOutput` for a `SegmentEditorInput` payload.
+
+    Args:
+        editor_input: `SegmentEditorInput` as a dict
+
+    Returns:
+        `SegmentEditorOutput` as a dict
+    """
+    from ai_journalist.sub_agents.segment_editor.agent import SegmentEditorInput, SegmentEditorOutput
+
+    request = SegmentEditorInput.model_validate(editor_input)
+    content = request.segment.content
+    actions = []
+    for instruction in request.instructions:
+        if instruction.kind == 'tighten':
+            content = _sentence(_FILLER_WORDS.sub('', content))
+            actions.append({'type': 'tighten', 'result': {'content': content}})
+        elif instruction.kind == 'expand':
+            content = ' '.join(part for part in (content.strip(), _sentence(instruction.message)) if part)
+            actions.append({'type': 'expand', 'result': {'content': content}})
+        elif instruction.kind == 'rewrite':
+            content = _sentence(content)
+            actions.append({'type': 'rewrite_segment', 'result': {'content': content}})
+        elif instruction.kind in ('mark_for_deletion', 'remove_flag'):
+            status = 'mark' if instruction.kind == 'mark_for_deletion' else 'none'
+            actions.append({'type': 'mark_deletion_status', 'result': {'deletion_status': status,
+                                                                       'reason': instruction.message}})
+        else:
+            actions.append({'type': instruction.kind, 'result': {'notes': instruction.message}})
+
+    output = SegmentEditorOutput(
+        segment_id=request.segment.id,
+        status='updated' if actions else 'skipped',
+        actions=actions,
+    )
+    return output.model_dump(mode='json', exclude_none=True)
+
+
+def _segment_editor_args(content: str, instruction: str, context: str) -> dict:
+    from ai_journalist.segment_editing import build_segment_editor_input
+
+    editor_input = build_segment_editor_input(content, instruction, context, kind=_instruction_kind(instruction))
+    return editor_input.model_dump(mode='json', exclude_none=True)
+
+
+def _edited_text(response: dict) -> str:
+    """Replacement text from a segment_editor tool result."""
+    for action in reversed(response.get('actions') or []):
+        content = (action.get('result') or {}).get('content')
+        if content:
+            return content
+    return json.dumps(response, ensure_ascii=False)
+
+
+class LocalLlm(BaseLlm):
+    """Offline, deterministic model; see the module docstring for its rules."""
+
+    model: str = 'local'
+    latency_s: float = 0.0
+    script: List[dict] = []
+    calls: int = 0
+    prompt_tokens: int = 0
+
+    def model_post_init(self, __context) -> None:
+        if not self.script:
+            self.script = _load_script(os.getenv('AI_LOCAL_MODEL_SCRIPT'))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        user_text = _last_user_text(llm_request)
+        tool_result = _tool_result(llm_request)
+        rule = self._scripted(user_text, tool_result)
+        latency_s = rule['latency_ms'] / 1000 if rule and 'latency_ms' in rule else self.latency_s
+        if latency_s:
+            await asyncio.sleep(latency_s)
+
+        reply, function_call = self._answer(llm_request, rule, user_text, tool_result)
+        prompt_tokens = self._prompt_tokens(llm_request)
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        output_tokens = estimate_tokens(reply or json.dumps(function_call.args if function_call else {}))
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+        if function_call is not None:
+            part = types.Part(function_call=function_call)
+        else:
+            if stream:
+                words = reply.split(' ')
+                for i, word in enumerate(words):
+                    chunk = word if i == len(words) - 1 else word + ' '
+                    yield LlmResponse(content=types.Content(role='model', parts=[types.Part(text=chunk)]),
+                                      partial=True)
+            part = types.Part(text=reply)
+        yield LlmResponse(
+            content=types.Content(role='model', parts=[part]),
+            usage_metadata=usage,
+            turn_complete=True,
+        )
+
+    def reset_counters(self) -> None:
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def _scripted(self, user_text: str, tool_result: Optional[types.FunctionResponse]) -> Optional[dict]:
+        for rule in self.script:
+            if 'after_tool' in rule and (tool_result is None or tool_result.name != rule['after_tool']):
+                continue
+            if 'after_tool' not in rule and tool_result is not None:
+                continue
+            if 'match' in rule and not re.search(rule['match'], user_text):
+                continue
+            return rule
+        return None
+
+    def _answer(self, llm_request: LlmRequest, rule: Optional[dict], user_text: str,
+                tool_result: Optional[types.FunctionResponse]):
+        """(reply text, function call) for this request; exactly one is set."""
+        if rule is not None:
+            if rule.get('function_call'):
+                call = rule['function_call']
+                return None, types.FunctionCall(name=call['name'], args=call.get('args') or {})
+            reply = rule.get('reply', '')
+            return (reply if isinstance(reply, str) else json.dumps(reply, ensure_ascii=False)), None
+
+        if llm_request.config and llm_request.config.response_schema is not None:
+            # Structured-output agent (segment_editor): the input is its JSON payload
+            try:
+                return json.dumps(edit_segment_locally(json.loads(user_text)), ensure_ascii=False), None
+            except ValueError:
+                pass
+
+        tools = llm_request.tools_dict
+        if tool_result is not None:
+            response = tool_result.response or {}
+            if tool_result.name == 'markup_article_blocks':
+                return f"Marked up {response.get('total_blocks', 0)} blocks.", None
+            return _edited_text(response.get('result', response) if isinstance(response, dict) else {}), None
+
+        article_match = _ARTICLE.search(user_text)
+        article = article_match.group('article') if article_match else user_text
+        if 'segment_editor' in tools:
+            rewrite = _REWRITE.search(article)
+            insert = None if rewrite else _INSERT.search(article)
+            if rewrite:
+                args = _segment_editor_args(rewrite['content'], rewrite['instruction'], rewrite['context'])
+                return None, types.FunctionCall(name='segment_editor', args=args)
+            if insert:
+                args = _segment_editor_args('', insert['instruction'], insert['context'])
+                args['instructions'][0]['kind'] = 'expand'
+                return None, types.FunctionCall(name='segment_editor', args=args)
+        if 'markup_article_blocks' in tools:
+            return None, types.FunctionCall(name='markup_article_blocks', args={'article_content': article})
+        return _sentence(user_text[:200]) if user_text else 'OK.', None
+
+    @staticmethod
+    def _prompt_tokens(llm_request: LlmRequest) -> int:
+        tokens = 0
+        if llm_request.config:
+            tokens += estimate_tokens(str(llm_request.config.system_instruction or ''))
+            tokens += estimate_tokens(str(llm_request.config.tools or ''))
+        for content in llm_request.contents:
+            for part in content.parts or []:
+                if part.text:
+                    tokens += estimate_tokens(part.text)
+                elif part.function_call or part.function_response:
+                    tokens += estimate_tokens(str(part.function_call or part.function_response))
+        return tokens
@@ -0,0 +1,117 @@
+"""
+Keyed, ordered store of pending segment updates in session state.
+
+segment_editor's `enqueue_segment_update` used to keep one
+`pending_segment_updates` list, scan it for the segment and write the whole
+list back on every model response: quadratic over a long editing session,
+and every event's state delta carried the full history.
+
+Each segment now has its own state key holding its merged entry, and every
+enqueue stamps the entry with the next per-session sequence number:
+
+    pending_segment_updates:<segment_id>     -> entry (SegmentEditorOutput + seq)
+    pending_segment_updates_log:<seq>        -> segment ID whose entry has that seq
+    pending_segment_updates_seq              -> last sequence number handed out
+
+The log is an index ordered by seq: enqueueing writes the new seq's key and
+tombstones (sets to None) the segment's previous one, so each segment is
+listed once, at its latest seq, and no list is rewritten. The state delta
+is the size of the change. A poller that remembers the last `seq` it saw
+asks only for newer ones (`list_pending_updates(state, since=seq)`), which
+reads the log keys from `since + 1` to the counter: the cost follows the
+number of changes since the last poll, not the number of segments.
+"""
+
+from typing import Any, List, Mapping, Optional
+
+PENDING_UPDATE_PREFIX = 'pending_segment_updates:'
+PENDING_SEQ_KEY = 'pending_segment_updates_seq'
+PENDING_LOG_PREFIX = 'pending_segment_updates_log:'
+HAS_PENDING_KEY = 'has_pending_segment_updates'
+
+
+def pending_update_key(segment_id: str) -> str:
+    """State key of one segment's pending entry."""
+    return PENDING_UPDATE_PREFIX + segment_id
+
+
+def pending_log_key(seq: int) -> str:
+    """State key of the log entry for sequence number `seq`."""
+    return f"{PENDING_LOG_PREFIX}{seq}"
+
+
+def enqueue_update(state, update: dict) -> dict:
+    """
+    Merge a `SegmentEditorOutput` dict into its segment's pending entry.
+
+    Actions are appended to the segment's earlier ones; status, handoff and
+    `updated_at` take the new values. Only the segment's key, the sequence
+    counter, the new log key, the segment's previous log key (tombstoned)
+    and (once) the `has_pending_segment_updates` flag are written.
+
+    Args:
+        state: Session state (ADK `State` or a plain dict)
+        update: `SegmentEditorOutput.model_dump()`, optionally with `updated_at`
+
+    Returns:
+        The stored entry, with its new `seq`.
+    """
+    key = pending_update_key(update['segment_id'])
+    seq = state.get(PENDING_SEQ_KEY, 0) + 1
+    entry = state.get(key)
+    if entry:
+        entry = {
+            **entry,
+            'actions': entry.get('actions', []) + update.get('actions', []),
+            'status': update.get('status', entry.get('status')),
+            'handoff': update.get('handoff', entry.get('handoff', {})),
+            'updated_at': update.get('updated_at'),
+        }
+        # The segment is listed at its new seq only
+        if entry.get('seq'):
+            state[pending_log_key(entry['seq'])] = None
+    else:
+        entry = dict(update)
+    entry['seq'] = seq
+
+    state[pending_log_key(seq)] = update['segment_id']
+    state[key] = entry
+    state[PENDING_SEQ_KEY] = seq
+    if not state.get(HAS_PENDING_KEY):
+        state[HAS_PENDING_KEY] = True
+    return entry
+
+
+def pending_update_items(state: Mapping[str, Any]) -> List[tuple]:
+    """
+    (state key, entry) pairs of every pending update in `state`, by scanning
+    it; meant for small mappings such as one event's state delta.
+    """
+    items = state.to_dict().items() if hasattr(state, 'to_dict') else state.items()
+    return [(key, value) for key, value in items if key.startswith(PENDING_UPDATE_PREFIX)]
+
+
+def list_pending_updates(
+    state: Mapping[str, Any],
+    since: int = 0,
+    segment_id: Optional[str] = None,
+) -> List[dict]:
+    """
+    Pending updates newer than sequence `since`, oldest first.
+
+    Args:
+        state: Session state (ADK `State` or a plain dict)
+        since: Last sequence number the caller has seen (0 for all)
+        segment_id: Only this segment's entry (a single key lookup; otherwise
+            the log keys after `since`, already in seq order)
+    """
+    if segment_id is not None:
+        entry = state.get(pending_update_key(segment_id))
+        return [entry] if entry and entry.get('seq', 0) > since else []
+    updates = []
+    for seq in range(max(since, 0) + 1, state.get(PENDING_SEQ_KEY, 0) + 1):
+        listed = state.get(pending_log_key(seq))
+        entry = state.get(pending_update_key(listed)) if listed is not None else None
+        if entry and entry.get('seq') == seq:
+            updates.append(entry)
+    return updates
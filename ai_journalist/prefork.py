@@ -0,0 +1,333 @@
+"""
+Prefork production server for the Flask app (POSIX only).
+
+`python ai_journalist/api_server.py` runs Flask's reloader-wrapped
+development server: one process, debug mode on by default. This module is
+the production mode:
+
+    python -m ai_journalist.prefork
+
+The parent process imports the app and preloads the agents, the
+instruction files and the model clients' classes once (`startup.preload`;
+with `AI_LAZY_INIT=true` each worker builds them on its first request
+instead), freezes those objects out of the garbage collector's reach, binds
+the listening socket and forks `AI_WORKERS` workers. Workers share the
+imported memory copy-on-write and accept from the same socket; each runs a
+threaded WSGI server and builds its own runner pool, caches and model
+connections after the fork, so no thread, SQLite connection or socket
+crosses it.
+
+Shared state between workers:
+    - response cache: the SQLite tier (`AI_CACHE_DB_PATH`, defaults to a
+      file in the temp directory), so a result computed by one worker is a
+      hit in every other
+    - sessions: with `AI_REUSE_DOCUMENT_SESSIONS=true`, the SQLite session
+      store (`AI_SESSION_DB_PATH`, same default), so a document's session
+      does not depend on which worker picks up the request. The store merges
+      state per key and takes pending-update sequence numbers from SQLite
+      (see session_store.py), so two workers running the same document keep
+      each other's changes; only a key both of them write is
+      last-writer-wins, because the per-document run lock is per process
+    - model quota: each worker's scheduler gets `AI_LLM_RPM / AI_WORKERS`
+
+Signals (to the parent):
+    SIGTERM / SIGINT  graceful stop: workers stop accepting, finish the
+                      requests in flight (at most `AI_GRACEFUL_TIMEOUT_SECONDS`)
+                      and exit
+    SIGHUP            graceful restart: a fresh set of workers is forked,
+                      then the old ones are stopped gracefully (code and
+                      configuration are those loaded by the parent)
+
+Each worker serves with werkzeug's threaded server (`make_server`), which
+ships with Flask: one thread per connection, which suits requests that
+spend their time waiting on the model API. It is the server Flask's
+development mode uses, so this module adds what it lacks for production:
+the process supervision above, graceful stops, recycling, and a socket
+timeout per connection (`AI_WORKER_SOCKET_TIMEOUT_SECONDS`), so a client
+that stops sending or reading releases its thread. It does not terminate
+TLS or buffer slow uploads; run it behind a reverse proxy that does.
+
+A worker that exits or crashes is replaced. With `AI_WORKER_MAX_REQUESTS`
+set, each worker is recycled after that many requests (plus up to 10%
+jitter, so workers do not all restart at once), which bounds slow memory
+growth.
+"""
+
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+# Importing the app loads .env, so it comes before the configuration below
+from ai_journalist.api_server import app as flask_app
+from ai_journalist.startup import LAZY_INIT, preload, shutdown, warmup
+
+WORKERS = int(os.getenv('AI_WORKERS', os.cpu_count() or 1))
+WORKER_MAX_REQUESTS = int(os.getenv('AI_WORKER_MAX_REQUESTS', 0))
+GRACEFUL_TIMEOUT_S = float(os.getenv('AI_GRACEFUL_TIMEOUT_SECONDS', 30))
+SOCKET_TIMEOUT_S = float(os.getenv('AI_WORKER_SOCKET_TIMEOUT_SECONDS', 120))
+BACKLOG = 2048
+
+# A worker dying sooner than this after its start is respawned with a delay
+_MIN_WORKER_LIFETIME_S = 1.0
+
+
+class _RequestCounter:
+    """Requests in flight in a worker; calls `on_limit` once `max_requests` have started."""
+
+    def __init__(self, max_requests: int = 0, on_limit=None):
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.served = 0
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def started(self) -> None:
+        with self._lock:
+            self.served += 1
+            self.active += 1
+            limit_reached = self.max_requests and self.served == self.max_requests
+        if limit_reached and self.on_limit is not None:
+            self.on_limit()
+
+    def finished(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+
+class _CountingHandler(WSGIRequestHandler):
+    """
+    Counts each request from start to the end of its (possibly streamed)
+    body, including requests whose client went away mid-response.
+    """
+
+    # Blocking reads and writes on a connection give up after this long (0: never)
+    timeout = SOCKET_TIMEOUT_S or None
+
+    def run_wsgi(self) -> None:
+        self.server.requests.started()
+        try:
+            super().run_wsgi()
+        finally:
+            self.server.requests.finished()
+
+
+def share_caches(port: int) -> None:
+    """
+    Point the response cache (and reused document sessions) at SQLite files
+    all workers use, unless configured already. Sharing sessions is safe
+    because the session store merges per key (see the module docstring).
+    """
+    base = os.path.join(tempfile.gettempdir(), f"ai_journalist_{port}")
+    if os.getenv('AI_CACHE_ENABLED', 'true').lower() == 'true':
+        os.environ.setdefault('AI_CACHE_DB_PATH', f"{base}_cache.db")
+    if os.getenv('AI_REUSE_DOCUMENT_SESSIONS', 'false').lower() == 'true':
+        os.environ.setdefault('AI_SESSION_DB_PATH', f"{base}_sessions.db")
+
+
+def load_app():
+    """Warm the imported Flask app for forking and return it."""
+    # Build the agents and read (and hash) the instruction files once for every worker
+    if not LAZY_INIT:
+        preload()
+    # Objects that exist now stay untouched by the collector, so the
+    # workers' copies of their pages stay shared
+    gc.collect()
+    gc.freeze()
+    return flask_app
+
+
+class PreforkServer:
+    """
+    Parent process: forks, watches and replaces workers.
+
+    Args:
+        app: WSGI application, loaded before forking
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of worker processes
+        max_requests: Requests after which a worker is recycled (0: never)
+        graceful_timeout: Seconds a stopping worker may spend on requests in flight
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str = '0.0.0.0',
+        port: int = 5001,
+        workers: int = WORKERS,
+        max_requests: int = WORKER_MAX_REQUESTS,
+        graceful_timeout: float = GRACEFUL_TIMEOUT_S,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.socket: Optional[socket.socket] = None
+        # pid -> start time of the current generation's workers
+        self._children: Dict[int, float] = {}
+        # pid -> time SIGTERM was sent, for workers being stopped
+        self._stopping: Dict[int, float] = {}
+        self._stop = False
+        self._restart = False
+        self._respawn_at = 0.0
+
+    # Parent
+
+    def run(self) -> None:
+        """Serve until SIGTERM / SIGINT."""
+        self.socket = socket.create_server((self.host, self.port), backlog=BACKLOG)
+        self.socket.set_inheritable(True)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        print(f"🚀 AI service on {self.host}:{self.port}: {self.workers} workers (parent pid {os.getpid()})")
+
+        try:
+            while not self._stop:
+                if self._restart:
+                    self._restart = False
+                    self._roll_workers()
+                self._reap()
+                if time.monotonic() >= self._respawn_at:
+                    while len(self._children) < self.workers:
+                        self._spawn()
+                time.sleep(0.1)
+        finally:
+            self._shutdown()
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stop = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self._restart = True
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._run_worker()
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # Never return into the parent's loop or run its atexit hooks
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+
+    def _roll_workers(self) -> None:
+        """Graceful restart: fork a fresh generation, then stop the old one."""
+        old = list(self._children)
+        self._children.clear()
+        for _ in range(self.workers):
+            self._spawn()
+        for pid in old:
+            self._terminate(pid)
+
+    def _terminate(self, pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGTERM)
+            self._stopping[pid] = time.monotonic()
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                break
+            self._stopping.pop(pid, None)
+            started = self._children.pop(pid, None)
+            if started is not None and not self._stop:
+                if time.monotonic() - started < _MIN_WORKER_LIFETIME_S:
+                    # Crashing on start; do not fork in a tight loop
+                    self._respawn_at = time.monotonic() + _MIN_WORKER_LIFETIME_S
+                if os.waitstatus_to_exitcode(status) != 0:
+                    print(f"⚠️  Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}", file=sys.stderr)
+
+        # Stopping workers that overran the graceful timeout
+        deadline = time.monotonic() - self.graceful_timeout - 5
+        for pid, since in list(self._stopping.items()):
+            if since < deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self._stopping.pop(pid)
+
+    def _shutdown(self) -> None:
+        for pid in list(self._children):
+            self._terminate(pid)
+        self._children.clear()
+        while self._stopping:
+            self._reap()
+            time.sleep(0.1)
+        self.socket.close()
+
+    # Worker
+
+    def _run_worker(self) -> None:
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        # Ctrl+C reaches the whole process group; the parent decides
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        parent = os.getppid()
+
+        rpm = float(os.getenv('AI_LLM_RPM', 0)) / self.workers
+        if LAZY_INIT:
+            # The scheduler is created with the agents, on this worker's first request
+            os.environ['AI_LLM_RPM'] = str(rpm)
+        else:
+            from ai_journalist.llm_scheduler import start_llm_scheduler
+            start_llm_scheduler(rpm=rpm)
+            warmup()
+
+        max_requests = self.max_requests + random.randint(0, self.max_requests // 10) if self.max_requests else 0
+        requests = _RequestCounter(max_requests, on_limit=stopping.set)
+        server = make_server(self.host, self.port, self.app, threaded=True,
+                             request_handler=_CountingHandler, fd=self.socket.fileno())
+        server.requests = requests
+
+        def watch() -> None:
+            # Stop on recycling, on SIGTERM, or when the parent is gone
+            while not stopping.wait(1.0):
+                if os.getppid() != parent:
+                    break
+            server.shutdown()
+
+        threading.Thread(target=watch, name='worker-watch', daemon=True).start()
+        server.serve_forever()
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while requests.active and time.monotonic() < deadline:
+            time.sleep(0.05)
+        shutdown()
+
+
+def serve() -> None:
+    """Run the prefork server configured from the environment."""
+    port = int(os.getenv('AI_SERVICE_PORT', 5001))
+    share_caches(port)
+    PreforkServer(load_app(), port=port).run()
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,105 @@
+"""
+Prompt templates for the AI service endpoints.
+
+Shared by the Flask app (api_server.py) and the ASGI app (asgi_server.py) so
+both serving modes send the agent exactly the same instructions.
+"""
+
+from typing import List, Optional
+
+from ai_journalist.context_builder import (
+    CONTEXT_TOKEN_BUDGET,
+    context_window,
+    find_block_index,
+    trim_to_tokens,
+)
+
+SELECTED_MARKER = '[…selected block…]'
+
+
+def build_rewrite_prompt(content: str, instruction: str, context: str = '') -> str:
+    """Prompt for /api/v1/rewrite-block."""
+    return f"""You are a journalistic AI assistant. Use your tools to rewrite this text block.
+
+Context (surrounding text):
+{context}
+
+Text to rewrite:
+{content}
+
+Instruction: {instruction}
+
+Please use your segment_editor tool if needed to improve the text, then return ONLY the rewritten text, no explanations."""
+
+
+def build_insert_prompt(instruction: str, context: str = '') -> str:
+    """Prompt for /api/v1/insert-block."""
+    return f"""You are a journalistic AI assistant. Use your tools to write new content.
+
+Context (surrounding text):
+{context}
+
+Instruction: {instruction}
+
+Please use your segment_editor tool to create well-written content that fits the context, then return ONLY the new content, no explanations."""
+
+
+def build_chat_prompt(
+    message: str,
+    document_info: str,
+    blocks: List[dict],
+    selected_block_id: Optional[str] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """
+    Prompt for /api/v1/chat, built from the parsed document blocks.
+
+    Document info, the selected block and the blocks around it (or the
+    opening of the document when nothing is selected) share `budget`
+    estimated tokens, so the prompt does not grow with the article.
+    """
+    context = f"""Document structure:
+{trim_to_tokens(document_info, budget // 4)}
+
+Total blocks: {len(blocks)}
+
+User message: {message}"""
+
+    index = find_block_index(blocks, selected_block_id)
+    if index is not None:
+        selected = trim_to_tokens(blocks[index].get('content', ''), budget // 4)
+        window = context_window(blocks[:index], blocks[index + 1:], budget // 2, SELECTED_MARKER)
+        context += f"\n\nSelected block: {selected}"
+        context += f"\n\nAround the selected block:\n{window}"
+    elif blocks:
+        context += f"\n\nDocument opening:\n{context_window([], blocks, budget // 2, marker='')}"
+
+    return f"""{context}
+
+You are a journalistic AI assistant. Use your tools to analyze and improve this article.
+
+User request: {message}
+
+Please:
+1. Use markup_article_blocks tool if needed to understand document structure
+2. Provide helpful suggestions for improving the article
+3. Be specific and actionable
+4. If you suggest changes, describe them clearly and use your tools when appropriate."""
+
+
+IMPROVE_ARTICLE_PROMPT = """You are a journalistic AI assistant. Analyze this article and suggest specific improvements.
+
+Use your tools:
+1. Use markup_article_blocks to understand the document structure
+2. Use segment_editor to analyze and improve specific sections
+
+For each suggestion:
+1. Identify the specific block/section
+2. Explain what needs improvement
+3. Provide the improved version using your tools
+
+Focus on:
+- Clarity and conciseness
+- Flow and structure
+- Grammar and style
+- Engagement and readability"""
@@ -0,0 +1,73 @@
+"""
+Response bodies for the AI service endpoints.
+
+Each builder turns a `process_article` result into the JSON body the
+back-end expects, so the Flask app, the ASGI app and the streaming `done`
+events all answer with the same shape.
+"""
+
+
+def _response_text(result: dict) -> str:
+    return result.get('response', result.get('response_text', '')).strip()
+
+
+def rewrite_block_response(result: dict, block_id: str, instruction: str) -> dict:
+    """Body for /api/v1/rewrite-block."""
+    return {
+        'newContent': _response_text(result),
+        'note': f'Rewritten: {instruction[:50]}...',
+        'blockId': block_id,
+        'tokensUsed': result.get('tokens_used', 0),
+        'cached': result.get('cached', False),
+    }
+
+
+def segment_edit_response(result: dict, block_id: str, instruction: str) -> dict:
+    """Body for /api/v1/rewrite-block/direct: the rewrite body plus the structured update."""
+    return {
+        **rewrite_block_response(result, block_id, instruction),
+        'segmentUpdate': result.get('segment_update'),
+    }
+
+
+def insert_block_response(result: dict, insert_after: str, instruction: str) -> dict:
+    """Body for /api/v1/insert-block."""
+    return {
+        'newContent': _response_text(result),
+        'note': f'Inserted: {instruction[:50]}...',
+        'insertAfter': insert_after,
+        'tokensUsed': result.get('tokens_used', 0),
+        'cached': result.get('cached', False),
+    }
+
+
+def chat_response(result: dict, document_version: int = None) -> dict:
+    """Body for /api/v1/chat and /api/v1/improve-article."""
+    body = {
+        'message': _response_text(result),
+        'updates': [],  # Can be populated with specific suggestions
+        'tokensUsed': result.get('tokens_used', 0)
+    }
+    if document_version is not None:
+        # Version of the cached document the answer was based on
+        body['documentVersion'] = document_version
+    return body
+
+
+def improve_article_response(result: dict) -> dict:
+    """Body for /api/v1/improve-article from the section pipeline: ranked `updates`."""
+    return {
+        **chat_response(result),
+        'updates': result.get('updates', []),
+        'sections': result.get('sections', 0),
+        'failed': result.get('failed', 0),
+    }
+
+
+def pending_updates_response(document_id: str, updates: list, since: int = 0) -> dict:
+    """Body for /api/v1/documents/<id>/pending-updates; poll again with since=latestSeq."""
+    return {
+        'documentId': document_id,
+        'pendingUpdates': updates,
+        'latestSeq': max((update.get('seq', 0) for update in updates), default=since),
+    }
@@ -3,7 +3,7 @@ Runner for processing articles with the journalist agent.
 
 This script:
 1. Reads an article from a file
-2. Creates an ADK Runner and Session
+2. Takes a pooled ADK Runner and a Session (see runner_pool.py)
 3. Processes the article through the agent (markup blocks, formatting)
 4. Saves the result
 
@@ -11,11 +11,19 @@ Based on ADK Runtime documentation: https://google.github.io/adk-docs/runtime/
 """
 
 import argparse
+import logging
 import sys
 from pathlib import Path
-from google.adk.runners import Runner, InMemorySessionService, types
-from google.adk.sessions import Session
-from ai_journalist.agent import root_agent
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional
+from ai_journalist.log import event_dump_enabled, get_logger
+
+# google.adk (and with it the runner pool and the agents) loads on the first
+# run, not on import, so the servers and `--help` start without it
+if TYPE_CHECKING:
+    from ai_journalist.runner_pool import RunnerPool
+
+logger = get_logger(__name__)
 
 
 def read_article_file(file_path: str) -> str:
@@ -40,13 +48,208 @@ def read_article_file(file_path: str) -> str:
         return content
 
 
-def process_article(article_content: str, output_path: str = None) -> dict:
+def build_initial_message(article_content: str) -> str:
+    """Wrap the request text in the root agent's processing instructions."""
+    return f"""Please process this article:
+
+{article_content}
+
+Please:
+1. Markup all blocks using the markup_article_blocks tool
+2. Analyze the article structure
+3. Process formatting as needed
+
+Start by marking up the blocks."""
+
+
+def _log_run_start(article_content: str, session_id: str, user_id: str, initial_message: str) -> None:
+    logger.info("Agent run started", extra={'fields': {
+        'article_chars': len(article_content),
+        'session_id': session_id,
+        'user_id': user_id,
+    }})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Initial message: %.200s...", initial_message)
+
+
+def _event_error(event) -> Optional[str]:
+    """Return the error reported by an event, if any."""
+    if getattr(event, 'error_code', None) or getattr(event, 'error_message', None):
+        return f"{event.error_code or ''} {event.error_message or ''}".strip()
+    return None
+
+
+def event_payloads(event) -> List[dict]:
+    """
+    Convert a Runner event into stream payloads for the editor UI.
+
+    Text parts become `text` payloads; with SSE streaming the model's chunks
+    arrive as `partial: true` deltas, followed by one `partial: false`
+    payload carrying the complete text of that turn. Tool calls and tool
+    responses become `tool_call` / `tool_result` progress payloads.
+    """
+    payloads = []
+    content = getattr(event, 'content', None)
+    if not content or not getattr(content, 'parts', None):
+        return payloads
+    for part in content.parts:
+        if part.text:
+            payloads.append({
+                'type': 'text',
+                'text': part.text,
+                'partial': bool(event.partial),
+                'author': event.author,
+            })
+        elif part.function_call:
+            payloads.append({
+                'type': 'tool_call',
+                'name': part.function_call.name,
+                'author': event.author,
+            })
+        elif part.function_response:
+            payloads.append({
+                'type': 'tool_result',
+                'name': part.function_response.name,
+                'author': event.author,
+            })
+    return payloads
+
+
+def _log_event(i: int, event) -> None:
+    """Debug dump of one event; callers check `event_dump_enabled` first."""
+    parts = []
+    content = getattr(event, 'content', None)
+    for part in getattr(content, 'parts', None) or []:
+        if part.text:
+            parts.append(f"text({len(part.text)}): {part.text[:100]!r}")
+        elif part.function_call:
+            parts.append(f"tool_call: {part.function_call.name}")
+        elif part.function_response:
+            parts.append(f"tool_result: {part.function_response.name}")
+    logger.debug("Event #%d from %s", i + 1, getattr(event, 'author', '?'), extra={'fields': {
+        'partial': bool(getattr(event, 'partial', False)),
+        'parts': parts,
+    }})
+
+
+def _collect_response_text(events: list) -> str:
+    """Concatenate the text parts of all events (tool calls are skipped)."""
+    texts = []
+    for event in events:
+        content = getattr(event, 'content', None)
+        for part in getattr(content, 'parts', None) or []:
+            if part.text:
+                texts.append(part.text + "\n")
+    return ''.join(texts)
+
+
+def _build_result(
+    article_content: str,
+    events: list,
+    state: dict,
+    error_occurred: Optional[str],
+    output_path: str = None,
+) -> dict:
+    """Turn the events and final session state of a run into a result dict."""
+    from ai_journalist.metrics_plugin import run_tokens_used
+    
+    marked_article = state.get('marked_article', '')
+    article_blocks = state.get('article_blocks', [])
+    
+    response_text = _collect_response_text(events)
+    tokens_used = run_tokens_used(events)
+    
+    # If we got text, use it; otherwise provide helpful message
+    if response_text.strip():
+        final_response = response_text.strip()
+    elif error_occurred and "429" in error_occurred:
+        final_response = "I apologize, but I've reached the daily API quota limit (20 requests/day for free tier). Please try again later or upgrade your API plan. For more information: https://ai.google.dev/gemini-api/docs/rate-limits"
+    elif error_occurred:
+        final_response = f"I encountered an error while processing: {error_occurred}. Please try again."
+    else:
+        final_response = "Processing completed, but no text response was generated. The agent may have used tools without providing a text response."
+    
+    logger.log(logging.WARNING if error_occurred else logging.INFO, "Agent run finished", extra={'fields': {
+        'events': len(events),
+        'tokens': tokens_used,
+        'response_chars': len(final_response),
+        'marked_chars': len(marked_article),
+        'blocks': len(article_blocks),
+        'error': error_occurred,
+    }})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Response preview: %.200s...", final_response)
+    
+    result = {
+        "status": "success" if not error_occurred else "partial",
+        "marked_content": marked_article,
+        "blocks": article_blocks,
+        "total_blocks": len(article_blocks),
+        "response": final_response,
+        "tokens_used": tokens_used,
+        "events_count": len(events),
+        "error": error_occurred if error_occurred else None,
+    }
+    
+    # Save to file if output path provided
+    if output_path:
+        output_file = Path(output_path)
+        if marked_article:
+            output_file.write_text(marked_article, encoding='utf-8')
+            logger.info("Processed article saved to %s", output_path)
+        else:
+            # Fallback: save original content if no marked content
+            output_file.write_text(article_content, encoding='utf-8')
+            logger.info("Article saved to %s", output_path)
+    
+    return result
+
+
+def _user_message(text: str):
+    from google.adk.runners import types
+    return types.UserContent(parts=[types.Part(text=text)])
+
+
+@lru_cache(maxsize=None)
+def _streaming_run_config():
+    # Ask the model for incremental chunks so text can be forwarded as it arrives
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    return RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+def _error_result(e: Exception) -> dict:
+    logger.exception("Error processing article: %s", e)
+    return {
+        "status": "error",
+        "error": str(e),
+        "marked_content": "",
+        "blocks": [],
+        "total_blocks": 0,
+    }
+
+
+def process_article(
+    article_content: str,
+    output_path: str = None,
+    document_id: Optional[str] = None,
+    block_id: Optional[str] = None,
+    pool: Optional['RunnerPool'] = None,
+    priority: Optional[str] = None,
+) -> dict:
     """
     Process article through the journalist agent using ADK Runner.
     
     Args:
         article_content: The article content to process
         output_path: Optional path to save the processed article
+        document_id: Optional document ID; with document session reuse
+            enabled, requests for the same document share one session
+        block_id: Optional block the request is about; with `document_id`,
+            the agent's `article_segments` are the window around it
+        pool: Runner pool to use (defaults to the process-wide pool)
+        priority: Model-call priority of the run: 'high' for interactive
+            requests, 'low' for bulk work (default 'normal'; see
+            llm_scheduler.py)
     
     Returns:
         Dictionary with processing results
@@ -54,214 +257,211 @@ def process_article(article_content: str, output_path: str = None) -> dict:
     Based on ADK Runtime: Runner orchestrates the event loop and manages
     session state through Services (SessionService, etc.)
     """
-    # Create session service for managing session state
-    session_service = InMemorySessionService()
-    
-    # Create ADK Runner (orchestrates the event loop)
-    # Requires app_name when using agent parameter
-    app_name = 'journalist_app'
-    runner = Runner(agent=root_agent, app_name=app_name, session_service=session_service)
-    
-    # Create a new session for this article processing
-    # Session requires id, appName, and userId
-    import uuid
-    user_id = 'user_1'
-    session_id = str(uuid.uuid4())
-    
-    # Create session through session service (using sync method)
-    session = session_service.create_session_sync(
-        session_id=session_id,
-        app_name=app_name,
-        user_id=user_id
-    )
+    # Runner and session service are long-lived and shared across requests
+    from ai_journalist.runner_pool import DEFAULT_USER_ID, get_runner_pool
     
-    # Prepare initial message
-    initial_message = f"""Please process this article:
-
-{article_content}
-
-Please:
-1. Markup all blocks using the markup_article_blocks tool
-2. Analyze the article structure
-3. Process formatting as needed
-
-Start by marking up the blocks."""
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner()
+    
+    user_id = DEFAULT_USER_ID
+    session_id = pool.acquire_session(
+        user_id=user_id, document_id=document_id, block_id=block_id, priority=priority)
+    initial_message = build_initial_message(article_content)
     
     try:
         # Run the agent using Runner (synchronous convenience method)
         # Internally, Runner.run calls Runner.run_async and manages the event loop
-        print("=" * 60)
-        print("🤖 Starting article processing with AI agent...")
-        print(f"📝 Article length: {len(article_content)} characters")
-        print(f"📋 Session ID: {session_id}")
-        print(f"👤 User ID: {user_id}")
-        print(f"💬 Initial message: {initial_message[:200]}...")
-        print("=" * 60)
+        _log_run_start(article_content, session_id, user_id, initial_message)
         
         # Runner.run processes the user message and yields events
         # The Runner handles session state updates through SessionService
         # run() requires user_id, session_id, and new_message (Content type)
-        new_message = types.UserContent(parts=[types.Part(text=initial_message)])
+        new_message = _user_message(initial_message)
         
-        print("🔄 Running agent...")
         events = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
         for i, event in enumerate(runner.run(
             user_id=user_id,
             session_id=session_id,
             new_message=new_message
         )):
             events.append(event)
-            event_type = type(event).__name__
-            print(f"📨 Event #{i+1}: {event_type}")
-            
-            # Log event details
-            if hasattr(event, 'content'):
-                if isinstance(event.content, list):
-                    for j, content_item in enumerate(event.content):
-                        if hasattr(content_item, 'text'):
-                            text_preview = content_item.text[:100] if content_item.text else "None"
-                            print(f"   Content[{j}]: {text_preview}...")
-                elif hasattr(event.content, 'text'):
-                    text_preview = event.content.text[:100] if event.content.text else "None"
-                    print(f"   Content: {text_preview}...")
-            
-            if hasattr(event, 'tool_calls'):
-                print(f"   🔧 Tool calls: {len(event.tool_calls) if event.tool_calls else 0}")
-                if event.tool_calls:
-                    for tool_call in event.tool_calls[:3]:  # Show first 3
-                        tool_name = getattr(tool_call, 'name', 'unknown')
-                        print(f"      - {tool_name}")
-        
-        print(f"✅ Total events received: {len(events)}")
+            error_occurred = _event_error(event) or error_occurred
+            if dump:
+                _log_event(i, event)
         
         # Get results from session state after processing
         # State is committed by Runner after each event is processed
-        # Reload session to get updated state (using sync method)
-        # get_session_sync requires app_name, user_id, and session_id
-        updated_session = session_service.get_session_sync(
-            app_name=app_name,
+        state = pool.get_state(session_id, user_id=user_id)
+        return _build_result(article_content, events, state, error_occurred, output_path)
+        
+    except Exception as e:
+        return _error_result(e)
+    finally:
+        pool.release_session(session_id, user_id=user_id, document_id=document_id)
+
+
+async def process_article_async(
+    article_content: str,
+    document_id: Optional[str] = None,
+    block_id: Optional[str] = None,
+    pool: Optional['RunnerPool'] = None,
+    priority: Optional[str] = None,
+) -> dict:
+    """
+    Async counterpart of `process_article` driving `Runner.run_async`.
+    
+    Runs on the caller's event loop instead of a helper thread, so an ASGI
+    server can keep many agent runs in flight in a single process.
+    
+    Args:
+        article_content: The article content to process
+        document_id: Optional document ID (see `process_article`)
+        block_id: Optional block ID (see `process_article`)
+        pool: Runner pool to use (defaults to the process-wide pool)
+        priority: Model-call priority (see `process_article`)
+    
+    Returns:
+        Dictionary with processing results, same shape as `process_article`
+    """
+    from ai_journalist.runner_pool import DEFAULT_USER_ID, get_runner_pool
+    
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner()
+    
+    user_id = DEFAULT_USER_ID
+    session_id = await pool.acquire_session_async(
+        user_id=user_id, document_id=document_id, block_id=block_id, priority=priority)
+    initial_message = build_initial_message(article_content)
+    
+    try:
+        _log_run_start(article_content, session_id, user_id, initial_message)
+        new_message = _user_message(initial_message)
+        
+        events = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
+        async for event in runner.run_async(
             user_id=user_id,
-            session_id=session_id
-        )
-        state = updated_session.state if updated_session else {}
-        marked_article = state.get('marked_article', '')
-        article_blocks = state.get('article_blocks', [])
+            session_id=session_id,
+            new_message=new_message
+        ):
+            if dump:
+                _log_event(len(events), event)
+            events.append(event)
+            error_occurred = _event_error(event) or error_occurred
         
-        # Collect response text from events
-        print("\n📥 Collecting response from events...")
-        response_text = ""
-        for i, event in enumerate(events):
-            event_type = type(event).__name__
-            print(f"\n   Event #{i+1} ({event_type}):")
-            
-            if hasattr(event, 'content') and event.content:
-                print(f"      ✅ Has content (type: {type(event.content).__name__})")
-                
-                # Handle Content object with parts
-                if hasattr(event.content, 'parts'):
-                    parts = event.content.parts
-                    print(f"      Content has {len(parts)} parts")
-                    for j, part in enumerate(parts):
-                        part_type = type(part).__name__
-                        print(f"         Part[{j}] type: {part_type}")
-                        
-                        # Check for text in part
-                        if hasattr(part, 'text') and part.text:
-                            text = part.text
-                            response_text += text + "\n"
-                            print(f"         ✅ Text found in part[{j}]: {len(text)} chars")
-                            print(f"         Text preview: {text[:150]}...")
-                        
-                        # Check for function_call (tool calls) - skip these
-                        if hasattr(part, 'function_call'):
-                            print(f"         ⚙️  Part[{j}] is a function_call (tool call), skipping")
-                        
-                        # Check for function_response (tool responses) - skip these
-                        if hasattr(part, 'function_response'):
-                            print(f"         ⚙️  Part[{j}] is a function_response (tool response), skipping")
-                
-                # Fallback: check if content has text directly
-                elif hasattr(event.content, 'text') and event.content.text:
-                    text = event.content.text
-                    response_text += text + "\n"
-                    print(f"      ✅ Text found directly: {len(text)} chars")
-                
-                # Handle list of content items
-                elif isinstance(event.content, list):
-                    print(f"      Content is list with {len(event.content)} items")
-                    for j, content_item in enumerate(event.content):
-                        if hasattr(content_item, 'text') and content_item.text:
-                            text = content_item.text
-                            response_text += text + "\n"
-                            print(f"         ✅ Text found in item[{j}]: {len(text)} chars")
-                else:
-                    print(f"      ⚠️  Content exists but structure unknown")
-                    print(f"      Content type: {type(event.content).__name__}")
-                    print(f"      Content attributes: {[attr for attr in dir(event.content) if not attr.startswith('_')][:10]}")
-            else:
-                print(f"      ⚠️  No content or content is None")
-            
-            # Check for other possible response fields
-            if hasattr(event, 'text') and event.text:
-                text = event.text
-                response_text += text + "\n"
-                print(f"      ✅ Found 'text' attribute directly: {len(text)} chars")
+        state = await pool.get_state_async(session_id, user_id=user_id)
+        return _build_result(article_content, events, state, error_occurred)
         
-        # If we got text, use it; otherwise provide helpful message
-        if response_text.strip():
-            final_response = response_text.strip()
-        elif error_occurred and "429" in error_occurred:
-            final_response = "I apologize, but I've reached the daily API quota limit (20 requests/day for free tier). Please try again later or upgrade your API plan. For more information: https://ai.google.dev/gemini-api/docs/rate-limits"
-        elif error_occurred:
-            final_response = f"I encountered an error while processing: {error_occurred}. Please try again."
-        else:
-            final_response = "Processing completed, but no text response was generated. The agent may have used tools without providing a text response."
+    except Exception as e:
+        return _error_result(e)
+    finally:
+        await pool.release_session_async(session_id, user_id=user_id, document_id=document_id)
+
+
+def stream_article(
+    article_content: str,
+    document_id: Optional[str] = None,
+    block_id: Optional[str] = None,
+    pool: Optional['RunnerPool'] = None,
+    priority: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Streaming variant of `process_article`.
+
+    Yields `event_payloads` for every Runner event as soon as it arrives and
+    finishes with `{'type': 'done', 'result': <process_article result>}`,
+    or `{'type': 'error', 'error': ...}` if the run failed. Arguments are
+    those of `process_article`.
+    """
+    from ai_journalist.runner_pool import DEFAULT_USER_ID, get_runner_pool
+    
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner()
+    
+    user_id = DEFAULT_USER_ID
+    session_id = pool.acquire_session(
+        user_id=user_id, document_id=document_id, block_id=block_id, priority=priority)
+    initial_message = build_initial_message(article_content)
+    
+    try:
+        _log_run_start(article_content, session_id, user_id, initial_message)
+        new_message = _user_message(initial_message)
         
-        print(f"\n📤 Final response length: {len(final_response)} chars")
-        print(f"📤 Response preview: {final_response[:200]}...")
-        print(f"📊 Marked article length: {len(marked_article)} chars")
-        print(f"📊 Blocks found: {len(article_blocks)}")
-        if error_occurred:
-            print(f"⚠️  Error occurred: {error_occurred}")
+        events = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
+        for event in runner.run(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=new_message,
+            run_config=_streaming_run_config(),
+        ):
+            error_occurred = _event_error(event) or error_occurred
+            yield from event_payloads(event)
+            # Partial chunks are repeated in the final event of each turn
+            if not event.partial:
+                if dump:
+                    _log_event(len(events), event)
+                events.append(event)
         
-        result = {
-            "status": "success" if not error_occurred else "partial",
-            "marked_content": marked_article,
-            "blocks": article_blocks,
-            "total_blocks": len(article_blocks),
-            "response": final_response,
-            "events_count": len(events),
-            "error": error_occurred if error_occurred else None,
-        }
+        state = pool.get_state(session_id, user_id=user_id)
+        yield {'type': 'done', 'result': _build_result(article_content, events, state, error_occurred)}
         
-        print("=" * 60)
-        print("✅ Processing completed successfully")
-        print("=" * 60 + "\n")
+    except Exception as e:
+        yield {'type': 'error', 'error': _error_result(e)['error']}
+    finally:
+        pool.release_session(session_id, user_id=user_id, document_id=document_id)
+
+
+async def stream_article_async(
+    article_content: str,
+    document_id: Optional[str] = None,
+    block_id: Optional[str] = None,
+    pool: Optional['RunnerPool'] = None,
+    priority: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Async counterpart of `stream_article` driving `Runner.run_async`."""
+    from ai_journalist.runner_pool import DEFAULT_USER_ID, get_runner_pool
+    
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner()
+    
+    user_id = DEFAULT_USER_ID
+    session_id = await pool.acquire_session_async(
+        user_id=user_id, document_id=document_id, block_id=block_id, priority=priority)
+    initial_message = build_initial_message(article_content)
+    
+    try:
+        _log_run_start(article_content, session_id, user_id, initial_message)
+        new_message = _user_message(initial_message)
         
-        # Save to file if output path provided
-        if output_path:
-            output_file = Path(output_path)
-            if marked_article:
-                output_file.write_text(marked_article, encoding='utf-8')
-                print(f"\nProcessed article saved to: {output_path}")
-            else:
-                # Fallback: save original content if no marked content
-                output_file.write_text(article_content, encoding='utf-8')
-                print(f"\nArticle saved to: {output_path}")
+        events = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=new_message,
+            run_config=_streaming_run_config(),
+        ):
+            error_occurred = _event_error(event) or error_occurred
+            for payload in event_payloads(event):
+                yield payload
+            if not event.partial:
+                if dump:
+                    _log_event(len(events), event)
+                events.append(event)
         
-        return result
+        state = await pool.get_state_async(session_id, user_id=user_id)
+        yield {'type': 'done', 'result': _build_result(article_content, events, state, error_occurred)}
         
     except Exception as e:
-        print(f"Error processing article: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return {
-            "status": "error",
-            "error": str(e),
-            "marked_content": "",
-            "blocks": [],
-            "total_blocks": 0,
-        }
+        yield {'type': 'error', 'error': _error_result(e)['error']}
+    finally:
+        await pool.release_session_async(session_id, user_id=user_id, document_id=document_id)
 
 
 def main():
@@ -0,0 +1,419 @@
+"""
+Process-wide pool of ADK Runners and the session service they share.
+
+Building an `InMemorySessionService` and a `Runner` for every API hit means
+nothing (agent wiring, model clients, plugin managers) is ever warm. The pool
+is created once at startup, hands out the same Runner per agent for every
+request and optionally keeps one session per `documentId` alive so repeated
+requests for the same article continue the same conversation.
+
+Lifecycle:
+    start_runner_pool()     -> create the pool (idempotent), call at startup
+    get_runner_pool()       -> the current pool, created lazily if needed
+    runner_pool_started()   -> whether the pool exists
+    shutdown_runner_pool()  -> close runners (shutdown_runner_pool_async
+                               inside an event loop)
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.runners import Runner, InMemorySessionService
+from google.adk.sessions import BaseSessionService, Session
+
+from ai_journalist.llm_scheduler import PRIORITY_KEY, get_scheduler_plugin
+from ai_journalist.metrics_plugin import get_metrics_plugin
+from ai_journalist.pending_updates import list_pending_updates
+from ai_journalist.tools.memory import DOCUMENT_ID_KEY, SELECTED_BLOCK_KEY
+
+APP_NAME = 'journalist_app'
+DEFAULT_USER_ID = 'user_1'
+
+
+def document_session_id(document_id: str) -> str:
+    """Stable session ID used when a session is reused for a document."""
+    return f"doc-{document_id}"
+
+
+def run_state(document_id: Optional[str], block_id: Optional[str], priority: Optional[str] = None) -> Optional[dict]:
+    """
+    Session state telling `load_context` which document and block a run is
+    about, and the scheduler how urgent its model calls are.
+    """
+    state = {DOCUMENT_ID_KEY: document_id, SELECTED_BLOCK_KEY: block_id} if document_id else {}
+    if priority or document_id:
+        # Reused document sessions still hold the previous run's priority
+        state[PRIORITY_KEY] = priority or 'normal'
+    return state or None
+
+
+def _state_update(session: Session, state: Optional[dict]) -> Optional[Event]:
+    """Event setting `state` on a reused session, or None if it already has it."""
+    if not state or all(session.state.get(key) == value for key, value in state.items()):
+        return None
+    return Event(author='user', actions=EventActions(state_delta=dict(state)))
+
+
+class _DocumentLocks:
+    """
+    One lock per document ID, held by a run from acquiring the document's
+    session until releasing it, so concurrent runs on one document do not
+    interleave their events in the shared session.
+
+    Waiters block a thread (`acquire`) or await on any event loop
+    (`acquire_async`) and get the lock first come first served.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # document ID -> wake-up callbacks of the waiters; present while held
+        self._waiters: Dict[str, Deque[Callable[[], None]]] = {}
+
+    def _acquire_or_queue(self, document_id: str, wake: Callable[[], None]) -> bool:
+        with self._lock:
+            waiters = self._waiters.get(document_id)
+            if waiters is None:
+                self._waiters[document_id] = deque()
+                return True
+            waiters.append(wake)
+            return False
+
+    def acquire(self, document_id: str) -> None:
+        """Wait (blocking this thread) until `document_id` is free and take it."""
+        handed_over = threading.Event()
+        if not self._acquire_or_queue(document_id, handed_over.set):
+            handed_over.wait()
+
+    async def acquire_async(self, document_id: str) -> None:
+        """Wait (without blocking the event loop) until `document_id` is free and take it."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(self._hand_over, document_id, future)
+
+        if self._acquire_or_queue(document_id, wake):
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiters = self._waiters.get(document_id)
+                queued = waiters is not None and wake in waiters
+                if queued:
+                    waiters.remove(wake)
+            # Handed over just before the cancellation: pass it on
+            if not queued and future.done() and not future.cancelled():
+                self.release(document_id)
+            raise
+
+    def _hand_over(self, document_id: str, future: asyncio.Future) -> None:
+        if future.cancelled():
+            # The waiter gave up after the lock was handed to it
+            self.release(document_id)
+        else:
+            future.set_result(None)
+
+    def release(self, document_id: str) -> None:
+        """Hand `document_id` to the next waiter, or free it."""
+        while True:
+            with self._lock:
+                waiters = self._waiters.get(document_id)
+                if waiters is None:
+                    return
+                if not waiters:
+                    del self._waiters[document_id]
+                    return
+                wake = waiters.popleft()
+            try:
+                wake()
+                return
+            except RuntimeError:
+                # Its event loop is gone (a finished asyncio.run); try the next one
+                continue
+
+
+class RunnerPool:
+    """
+    Keeps one Runner per agent and a shared session service.
+
+    Args:
+        session_service: Session service shared by every runner (defaults to
+            a fresh `InMemorySessionService`).
+        app_name: ADK application name used for all sessions.
+        reuse_document_sessions: When True, requests that carry a document ID
+            are served from one long-lived session per document instead of a
+            throwaway session. Runs on one document then take turns: each
+            holds the document from `acquire_session` to `release_session`.
+    """
+
+    def __init__(
+        self,
+        session_service: Optional[BaseSessionService] = None,
+        app_name: str = APP_NAME,
+        reuse_document_sessions: bool = False,
+    ):
+        self.app_name = app_name
+        self.session_service = session_service or InMemorySessionService()
+        self.reuse_document_sessions = reuse_document_sessions
+        self._runners: Dict[str, Runner] = {}
+        self._lock = threading.Lock()
+        self._document_locks = _DocumentLocks()
+
+    def get_runner(self, agent: Optional[BaseAgent] = None) -> Runner:
+        """Return the pooled Runner for `agent` (the root agent by default)."""
+        if agent is None:
+            from ai_journalist.agent import root_agent
+            agent = root_agent
+
+        runner = self._runners.get(agent.name)
+        if runner is not None:
+            return runner
+
+        with self._lock:
+            runner = self._runners.get(agent.name)
+            if runner is None:
+                runner = Runner(
+                    agent=agent,
+                    app_name=self.app_name,
+                    session_service=self.session_service,
+                    plugins=[get_metrics_plugin(), get_scheduler_plugin()],
+                )
+                self._runners[agent.name] = runner
+        return runner
+
+    def acquire_session(self, user_id: str = DEFAULT_USER_ID, document_id: Optional[str] = None,
+                        block_id: Optional[str] = None, priority: Optional[str] = None) -> str:
+        """
+        Return a session ID to run a request in.
+
+        With document session reuse enabled and a `document_id` given, the
+        same session is returned for every request on that document, once
+        the run holding it has released it; otherwise a new session is
+        created. Either way, hand it back through `release_session` once the
+        request is done. The document, block and model-call priority are put
+        into the session state (see `run_state`).
+        """
+        state = run_state(document_id, block_id, priority)
+        if document_id and self.reuse_document_sessions:
+            session_id = document_session_id(document_id)
+            self._document_locks.acquire(document_id)
+            try:
+                session = self.session_service.get_session_sync(
+                    app_name=self.app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                )
+                if session is None:
+                    self.session_service.create_session_sync(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        session_id=session_id,
+                        state=state,
+                    )
+                else:
+                    update = _state_update(session, state)
+                    if update is not None:
+                        # Session services only offer an async append; nothing in it waits on I/O here
+                        asyncio.run(self.session_service.append_event(session, update))
+            except BaseException:
+                self._document_locks.release(document_id)
+                raise
+            return session_id
+
+        session_id = str(uuid.uuid4())
+        self.session_service.create_session_sync(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+            state=state,
+        )
+        return session_id
+
+    def release_session(self, session_id: str, user_id: str = DEFAULT_USER_ID, document_id: Optional[str] = None) -> None:
+        """Drop a per-request session; document sessions are kept alive for the next run."""
+        if document_id and self.reuse_document_sessions:
+            self._document_locks.release(document_id)
+            return
+        self.session_service.delete_session_sync(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+
+    def get_state(self, session_id: str, user_id: str = DEFAULT_USER_ID) -> dict:
+        """Return the committed state of a session (empty if it is gone)."""
+        session = self.session_service.get_session_sync(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+        return dict(session.state) if session else {}
+
+    async def acquire_session_async(self, user_id: str = DEFAULT_USER_ID, document_id: Optional[str] = None,
+                                    block_id: Optional[str] = None, priority: Optional[str] = None) -> str:
+        """Async variant of `acquire_session` for use inside an event loop."""
+        state = run_state(document_id, block_id, priority)
+        if document_id and self.reuse_document_sessions:
+            session_id = document_session_id(document_id)
+            await self._document_locks.acquire_async(document_id)
+            try:
+                session = await self.session_service.get_session(
+                    app_name=self.app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                )
+                if session is None:
+                    await self.session_service.create_session(
+                        app_name=self.app_name,
+                        user_id=user_id,
+                        session_id=session_id,
+                        state=state,
+                    )
+                else:
+                    update = _state_update(session, state)
+                    if update is not None:
+                        await self.session_service.append_event(session, update)
+            except BaseException:
+                self._document_locks.release(document_id)
+                raise
+            return session_id
+
+        session_id = str(uuid.uuid4())
+        await self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+            state=state,
+        )
+        return session_id
+
+    async def release_session_async(self, session_id: str, user_id: str = DEFAULT_USER_ID, document_id: Optional[str] = None) -> None:
+        """Async variant of `release_session`."""
+        if document_id and self.reuse_document_sessions:
+            self._document_locks.release(document_id)
+            return
+        await self.session_service.delete_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+
+    async def get_state_async(self, session_id: str, user_id: str = DEFAULT_USER_ID) -> dict:
+        """Async variant of `get_state`."""
+        session = await self.session_service.get_session(
+            app_name=self.app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+        return dict(session.state) if session else {}
+
+    def pending_segment_updates(self, document_id: str, segment_id: Optional[str] = None, since: int = 0,
+                                user_id: str = DEFAULT_USER_ID) -> list:
+        """
+        Segment updates queued in a document's session and not yet applied.
+
+        Read from the SQLite index when sessions are persisted (any worker's
+        updates), otherwise from this process's document session state.
+
+        Args:
+            document_id: Document whose session is read
+            segment_id: Only this segment's entry
+            since: Only updates with a higher sequence number
+        """
+        session_id = document_session_id(document_id)
+        lookup = getattr(self.session_service, 'pending_segment_updates', None)
+        if lookup is not None:
+            return lookup(app_name=self.app_name, session_id=session_id, segment_id=segment_id, since=since)
+        return list_pending_updates(self.get_state(session_id, user_id=user_id), since=since, segment_id=segment_id)
+
+    def _close_session_service(self) -> None:
+        close = getattr(self.session_service, 'close', None)
+        if close is not None:
+            close()
+
+    async def aclose(self) -> None:
+        """Close every pooled runner from inside a running event loop."""
+        with self._lock:
+            runners = list(self._runners.values())
+            self._runners.clear()
+        for runner in runners:
+            await runner.close()
+        self._close_session_service()
+
+    def close(self) -> None:
+        """Close every pooled runner."""
+        with self._lock:
+            runners = list(self._runners.values())
+            self._runners.clear()
+        for runner in runners:
+            try:
+                asyncio.run(runner.close())
+            except RuntimeError:
+                # Called from inside a running loop; the loop owner closes it.
+                pass
+        self._close_session_service()
+
+
+_pool: Optional[RunnerPool] = None
+_pool_lock = threading.Lock()
+
+
+def start_runner_pool(**kwargs) -> RunnerPool:
+    """
+    Create the process-wide pool if it does not exist yet.
+
+    Keyword arguments are passed to `RunnerPool`. Document session reuse
+    defaults to the `AI_REUSE_DOCUMENT_SESSIONS` environment variable;
+    with `AI_SESSION_DB_PATH` set, sessions are persisted to that SQLite
+    file (see session_store.py).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            kwargs.setdefault(
+                'reuse_document_sessions',
+                os.getenv('AI_REUSE_DOCUMENT_SESSIONS', 'false').lower() == 'true',
+            )
+            if 'session_service' not in kwargs and os.getenv('AI_SESSION_DB_PATH'):
+                from ai_journalist.session_store import SqliteSessionService
+                kwargs['session_service'] = SqliteSessionService.from_env()
+            _pool = RunnerPool(**kwargs)
+            # Build the root runner now so the first request finds it warm.
+            _pool.get_runner()
+        return _pool
+
+
+def get_runner_pool() -> RunnerPool:
+    """Return the process-wide pool, starting it on first use."""
+    return _pool if _pool is not None else start_runner_pool()
+
+
+def runner_pool_started() -> bool:
+    """True while the process-wide pool exists."""
+    return _pool is not None
+
+
+def shutdown_runner_pool() -> None:
+    """Close and forget the process-wide pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+async def shutdown_runner_pool_async() -> None:
+    """Close and forget the process-wide pool from inside an event loop."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
@@ -0,0 +1,294 @@
+"""
+Direct segment_editor fast path for block edits.
+
+`/api/v1/rewrite-block` hands a prompt to `process_article`, which wraps it
+in the root agent's "markup all blocks" instructions and lets
+`journalist_agent` decide whether to call `AgentTool(segment_editor)`: at
+least two extra model round-trips (tool call + final answer) and the whole
+root instruction set on every edit. Here the request is turned into a
+`SegmentEditorInput` and sent straight to the pooled `segment_editor`
+runner, which answers with one `SegmentEditorOutput`.
+
+Segment edits always run in a throwaway session: a shared document session
+would feed the root agent's conversation back into every edit. The session
+carries the most urgent instruction priority, which orders the edit's model
+calls in the scheduler (llm_scheduler.py).
+"""
+
+import json
+import typing
+from typing import List, Optional
+
+from google.adk.runners import types
+
+from ai_journalist.context_builder import (
+    CONTEXT_TOKEN_BUDGET,
+    block_neighbors,
+    document_blocks,
+    find_block_index,
+    trim_neighbors,
+    trim_to_tokens,
+)
+from ai_journalist.llm_scheduler import highest_priority
+from ai_journalist.log import event_dump_enabled, get_logger
+from ai_journalist.metrics_plugin import run_tokens_used
+from ai_journalist.runner import _error_result, _event_error, _log_event
+from ai_journalist.runner_pool import DEFAULT_USER_ID, RunnerPool, get_runner_pool
+from ai_journalist.sub_agents.segment_editor.agent import (
+    SegmentEditorInput,
+    SegmentEditorOutput,
+    segment_editor,
+)
+from ai_journalist.types.models import (
+    NeighborContext,
+    Segment,
+    SegmentConstraints,
+    SegmentInstruction,
+    SegmentNeighbors,
+)
+
+logger = get_logger(__name__)
+
+SEGMENT_TYPES = typing.get_args(Segment.model_fields['type'].annotation)
+INSTRUCTION_KINDS = typing.get_args(SegmentInstruction.model_fields['kind'].annotation)
+
+# Actions whose result carries replacement text for the segment
+_CONTENT_ACTIONS = ('rewrite_segment', 'tighten', 'expand')
+
+
+def build_segment_editor_input(
+    content: str,
+    instruction: str,
+    context: str = '',
+    block_id: Optional[str] = None,
+    block_type: Optional[str] = None,
+    neighbors: Optional[dict] = None,
+    constraints: Optional[dict] = None,
+    kind: str = 'rewrite',
+    priority: str = 'normal',
+) -> SegmentEditorInput:
+    """
+    Build the segment_editor payload for one block edit request.
+
+    Args:
+        content: Current block text
+        instruction: What to do with the block
+        context: Free-text surrounding text; used as the previous neighbor
+            when `neighbors` is not given (trimmed to half the context budget)
+        block_id: Block ID, kept as the segment ID so results map back
+        block_type: Block type from markup (unknown types become paragraph)
+        neighbors: Optional `{"previous": {...}, "next": {...}}` neighbor
+            blocks, or a `SegmentNeighbors`; contents are trimmed to the budget
+        constraints: Optional `SegmentConstraints` fields (tone, language, ...)
+        kind: Instruction kind (rewrite, tighten, expand, ...)
+        priority: Instruction priority; direct edits schedule their model
+            calls by it (low, normal, high)
+
+    Raises:
+        pydantic.ValidationError: If neighbors or constraints are malformed.
+    """
+    segment = {
+        'type': block_type if block_type in SEGMENT_TYPES else 'paragraph',
+        'content': content,
+    }
+    if block_id:
+        segment['id'] = block_id
+
+    if neighbors:
+        segment_neighbors = trim_neighbors(SegmentNeighbors.model_validate(neighbors))
+    elif context:
+        previous = NeighborContext(content=trim_to_tokens(context, CONTEXT_TOKEN_BUDGET // 2, keep='end'))
+        segment_neighbors = SegmentNeighbors(previous=previous)
+    else:
+        segment_neighbors = SegmentNeighbors()
+
+    return SegmentEditorInput(
+        segment=segment,
+        neighbors=segment_neighbors,
+        instructions=[SegmentInstruction(
+            kind=kind if kind in INSTRUCTION_KINDS else 'rewrite',
+            message=instruction,
+            priority=priority,
+        )],
+        constraints=SegmentConstraints.model_validate(constraints or {}),
+    )
+
+
+def parse_segment_edit_request(data: dict) -> SegmentEditorInput:
+    """
+    Build the segment_editor payload from a `/api/v1/rewrite-block/direct` body.
+
+    Accepts the `/api/v1/rewrite-block` fields (`blockId`, `content`,
+    `instruction`, `context`) plus optional `blockType`, `kind`, `neighbors`,
+    `constraints` and `documentContent`. With `documentContent`, neighbors
+    and block type come from the parsed block list around `blockId`.
+
+    Raises:
+        ValueError: If `content` or `instruction` is missing, or the optional
+            fields are malformed (pydantic's ValidationError is a ValueError).
+    """
+    if not data.get('content') or not data.get('instruction'):
+        raise ValueError("'content' and 'instruction' are required")
+
+    neighbors = data.get('neighbors')
+    block_type = data.get('blockType')
+    blocks = document_blocks(data)
+    index = find_block_index(blocks, data.get('blockId'))
+    if index is not None:
+        neighbors = neighbors or block_neighbors(blocks, index)
+        block_type = block_type or blocks[index]['type']
+
+    return build_segment_editor_input(
+        data['content'],
+        data['instruction'],
+        context=data.get('context', ''),
+        block_id=data.get('blockId'),
+        block_type=block_type,
+        neighbors=neighbors,
+        constraints=data.get('constraints'),
+        kind=data.get('kind', 'rewrite'),
+    )
+
+
+def segment_edit_cache_context(editor_input: SegmentEditorInput) -> str:
+    """Everything besides content and instruction that shapes the answer, for cache keys."""
+    return json.dumps({
+        'type': editor_input.segment.type,
+        'kind': editor_input.instructions[0].kind,
+        'neighbors': editor_input.neighbors.model_dump(exclude_none=True),
+        'constraints': editor_input.constraints.model_dump(exclude_none=True),
+    }, sort_keys=True, ensure_ascii=False)
+
+
+def _new_content(update: SegmentEditorOutput, original: str) -> str:
+    """Replacement text from the last content-bearing action (original if none)."""
+    for action in reversed(update.actions):
+        if action.type in _CONTENT_ACTIONS and action.result.content:
+            return action.result.content
+    return original
+
+
+def _build_segment_result(editor_input: SegmentEditorInput, events: list, error_occurred: Optional[str]) -> dict:
+    """Turn the events of a segment_editor run into a result dict."""
+    final_text = ''
+    for event in events:
+        if event.content and event.content.parts:
+            text = '\n'.join(part.text for part in event.content.parts if part.text)
+            if text:
+                final_text = text
+
+    tokens_used = run_tokens_used(events)
+    segment_update = None
+    response = final_text.strip()
+    try:
+        update = SegmentEditorOutput.model_validate_json(final_text)
+        segment_update = update.model_dump(exclude_none=True)
+        response = _new_content(update, editor_input.segment.content)
+    except ValueError:
+        # Not structured output; keep the raw text as the new content
+        pass
+
+    logger.info("Segment edit finished", extra={'fields': {
+        'events': len(events),
+        'tokens': tokens_used,
+        'structured': segment_update is not None,
+    }})
+
+    if error_occurred and not response:
+        return {'status': 'error', 'error': error_occurred}
+    return {
+        'status': 'success' if not error_occurred else 'partial',
+        'response': response,
+        'segment_update': segment_update,
+        'tokens_used': tokens_used,
+        'events_count': len(events),
+        'error': error_occurred,
+    }
+
+
+def _priority(editor_input: SegmentEditorInput) -> str:
+    return highest_priority(instruction.priority for instruction in editor_input.instructions)
+
+
+def _input_message(editor_input: SegmentEditorInput) -> types.UserContent:
+    # Same payload AgentTool would send to the sub-agent
+    return types.UserContent(parts=[types.Part(text=editor_input.model_dump_json(exclude_none=True))])
+
+
+def edit_segment(
+    editor_input: SegmentEditorInput,
+    pool: Optional[RunnerPool] = None,
+) -> dict:
+    """
+    Run one block edit directly on the segment_editor agent.
+
+    Args:
+        editor_input: Payload from `build_segment_editor_input`
+        pool: Runner pool to use (defaults to the process-wide pool)
+
+    Returns:
+        Dictionary with `response` (new block text), `segment_update` (the
+        `SegmentEditorOutput` as a dict, None if the model did not return
+        valid JSON) and `tokens_used`
+    """
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner(segment_editor)
+    user_id = DEFAULT_USER_ID
+    session_id = pool.acquire_session(user_id=user_id, priority=_priority(editor_input))
+
+    try:
+        logger.info("Direct segment edit started", extra={'fields': {
+            'segment_id': editor_input.segment.id,
+            'content_chars': len(editor_input.segment.content),
+        }})
+        events: List = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
+        for i, event in enumerate(runner.run(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=_input_message(editor_input),
+        )):
+            events.append(event)
+            error_occurred = _event_error(event) or error_occurred
+            if dump:
+                _log_event(i, event)
+        return _build_segment_result(editor_input, events, error_occurred)
+    except Exception as e:
+        return _error_result(e)
+    finally:
+        pool.release_session(session_id, user_id=user_id)
+
+
+async def edit_segment_async(
+    editor_input: SegmentEditorInput,
+    pool: Optional[RunnerPool] = None,
+) -> dict:
+    """Async counterpart of `edit_segment` driving `Runner.run_async`."""
+    pool = pool or get_runner_pool()
+    runner = pool.get_runner(segment_editor)
+    user_id = DEFAULT_USER_ID
+    session_id = await pool.acquire_session_async(user_id=user_id, priority=_priority(editor_input))
+
+    try:
+        logger.info("Direct segment edit started", extra={'fields': {
+            'segment_id': editor_input.segment.id,
+            'content_chars': len(editor_input.segment.content),
+        }})
+        events: List = []
+        error_occurred = None
+        dump = event_dump_enabled(logger)
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=_input_message(editor_input),
+        ):
+            if dump:
+                _log_event(len(events), event)
+            events.append(event)
+            error_occurred = _event_error(event) or error_occurred
+        return _build_segment_result(editor_input, events, error_occurred)
+    except Exception as e:
+        return _error_result(e)
+    finally:
+        await pool.release_session_async(session_id, user_id=user_id)
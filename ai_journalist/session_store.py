@@ -0,0 +1,423 @@
+"""
+Durable SQLite session service shared by worker processes.
+
+With `InMemorySessionService` the session state of a run, including the
+pending segment updates queued by segment_editor's `enqueue_segment_update`,
+lives in one process and is gone with it. `SqliteSessionService` implements
+the public `BaseSessionService` API on a SQLite file (WAL mode, so readers
+never block the writer) that every worker opens:
+
+    - state is stored one row per key, and a flush writes only the keys
+      changed by the new events (the state deltas), so two workers updating
+      different keys of one session both keep their changes; only a key
+      written by both is last-writer-wins. A key set to None (a tombstone,
+      e.g. an evicted memory, see tools/memory.py) is deleted instead
+    - writes are batched write-behind: a background thread flushes created
+      sessions, state deltas, appended events and deletions every
+      `AI_SESSION_FLUSH_MS` (default 50) in one transaction; a session created
+      and deleted inside one window (the per-request sessions) never touches
+      the disk
+    - every flush bumps the session's stored version; reads reload a session
+      whose version moved (another worker wrote to it), while sessions with
+      unflushed changes are served from this process's working copy
+    - pending segment updates (see pending_updates.py) are also written to
+      their own table, one row per `(session, segment_id)`. The row's `seq`
+      is an AUTOINCREMENT column, so sequence numbers come from SQLite and
+      stay unique and increasing across workers; polling with `since` uses
+      them
+
+Enabled by `AI_SESSION_DB_PATH`. `app:` / `user:` keys are stored with the
+session that wrote them, not shared across sessions.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events.event import Event
+from google.adk.sessions import Session
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+from ai_journalist.pending_updates import pending_update_items
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS session_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS pending_segment_updates (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    segment_id TEXT NOT NULL,
+    status TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (app_name, user_id, session_id, segment_id)
+);
+CREATE INDEX IF NOT EXISTS pending_by_session ON pending_segment_updates (app_name, session_id, seq);
+CREATE INDEX IF NOT EXISTS pending_by_segment ON pending_segment_updates (app_name, segment_id);
+"""
+
+_SessionKey = Tuple[str, str, str]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class _Unflushed:
+    """Changes to one session that are not on disk yet."""
+
+    def __init__(self):
+        self.created = False
+        self.state: Dict[str, Any] = {}
+        self.events: List[Event] = []
+
+    def merge(self, later: "_Unflushed") -> None:
+        self.created = self.created or later.created
+        self.state.update(later.state)
+        self.events.extend(later.events)
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service persisting to SQLite with write-behind and per-key state.
+
+    Args:
+        db_path: SQLite database file, shared by every worker.
+        flush_interval: Seconds between write-behind flushes.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 0.05):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        # Working copies of the sessions this process created or read
+        self._sessions: Dict[_SessionKey, Session] = {}
+        # Stored version each working copy reflects (None: reload before trusting it)
+        self._versions: Dict[_SessionKey, Optional[int]] = {}
+        # Write-behind queue
+        self._unflushed: Dict[_SessionKey, _Unflushed] = {}
+        self._deleted: Set[_SessionKey] = set()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.flushes = 0
+
+    @classmethod
+    def from_env(cls) -> "SqliteSessionService":
+        return cls(
+            db_path=os.environ['AI_SESSION_DB_PATH'],
+            flush_interval=float(os.getenv('AI_SESSION_FLUSH_MS', 50)) / 1000,
+        )
+
+    def _queue(self, key: _SessionKey) -> _Unflushed:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='session-flush', daemon=True)
+            self._flusher.start()
+        return self._unflushed.setdefault(key, _Unflushed())
+
+    # Reads
+
+    def _refresh(self, key: _SessionKey) -> None:
+        """Reload the stored session if another worker changed (or deleted) it."""
+        if key in self._unflushed:
+            return
+        row = self._db.execute(
+            "SELECT version, update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()
+        if row is None:
+            if key in self._versions:
+                # Deleted by another worker
+                self._sessions.pop(key, None)
+                self._versions.pop(key, None)
+            return
+        version, update_time = row
+        if key in self._sessions and self._versions.get(key) == version:
+            return
+        app_name, user_id, session_id = key
+        state = {
+            name: json.loads(value) for name, value in self._db.execute(
+                "SELECT key, value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key,
+            )
+        }
+        events = [
+            Event.model_validate_json(data) for (data,) in self._db.execute(
+                "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq", key,
+            )
+        ]
+        self._sessions[key] = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=state,
+            events=events,
+            last_update_time=update_time,
+        )
+        self._versions[key] = version
+
+    def get_session_sync(self, *, app_name: str, user_id: str, session_id: str,
+                         config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            if key in self._deleted:
+                return None
+            self._refresh(key)
+            session = self._sessions.get(key)
+            if session is None:
+                return None
+            session = session.model_copy(deep=True)
+
+        if config:
+            if config.num_recent_events:
+                session.events = session.events[-config.num_recent_events:]
+            if config.after_timestamp:
+                session.events = [event for event in session.events if event.timestamp >= config.after_timestamp]
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        # May read SQLite; keep it off the event loop
+        return await asyncio.to_thread(
+            self.get_session_sync, app_name=app_name, user_id=user_id, session_id=session_id, config=config,
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        """Stored sessions (without state or events), after flushing this process's changes."""
+        def list_stored() -> ListSessionsResponse:
+            self.flush()
+            query = "SELECT user_id, id, update_time FROM sessions WHERE app_name = ?"
+            params = [app_name]
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            with self._lock:
+                rows = self._db.execute(query, params).fetchall()
+            return ListSessionsResponse(sessions=[
+                Session(app_name=app_name, user_id=row_user, id=session_id, last_update_time=update_time)
+                for row_user, session_id, update_time in rows
+            ])
+
+        return await asyncio.to_thread(list_stored)
+
+    # Writes
+
+    def create_session_sync(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None,
+                            session_id: Optional[str] = None) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            if key in self._sessions:
+                raise AlreadyExistsError(f'Session with id {session_id} already exists.')
+            state = {k: v for k, v in (state or {}).items() if v is not None and not k.startswith(State.TEMP_PREFIX)}
+            session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state,
+                              last_update_time=time.time())
+            self._sessions[key] = session
+            self._deleted.discard(key)
+            queued = self._queue(key)
+            queued.created = True
+            queued.state.update(state)
+            return session.model_copy(deep=True)
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        return self.create_session_sync(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+
+    def delete_session_sync(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._sessions.pop(key, None)
+            queued = self._unflushed.pop(key, None)
+            on_disk = key in self._versions or queued is None or not queued.created
+            self._versions.pop(key, None)
+            if on_disk:
+                self._deleted.add(key)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self.delete_session_sync(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        key = (session.app_name, session.user_id, session.id)
+        delta = {k: v for k, v in (event.actions.state_delta if event.actions else {}).items()
+                 if not k.startswith(State.TEMP_PREFIX)}
+        with self._lock:
+            stored = self._sessions.get(key)
+            if stored is None:
+                return event
+            for name, value in delta.items():
+                if value is None:
+                    stored.state.pop(name, None)
+                else:
+                    stored.state[name] = value
+            stored.events.append(event)
+            stored.last_update_time = event.timestamp
+            queued = self._queue(key)
+            queued.state.update(delta)
+            queued.events.append(event)
+        return event
+
+    # Write-behind
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Keep the queue; the next round retries
+                pass
+
+    def flush(self) -> None:
+        """Write all queued changes in one transaction."""
+        with self._lock:
+            if not (self._unflushed or self._deleted):
+                return
+            unflushed, self._unflushed = self._unflushed, {}
+            deleted, self._deleted = self._deleted, set()
+            versions = {}
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                for key in deleted:
+                    for table, column in (('sessions', 'id'), ('session_state', 'session_id'),
+                                          ('events', 'session_id'), ('pending_segment_updates', 'session_id')):
+                        self._db.execute(
+                            f"DELETE FROM {table} WHERE app_name = ? AND user_id = ? AND {column} = ?", key)
+                for key, queued in unflushed.items():
+                    versions[key] = self._write_session(key, queued)
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                # Requeue so nothing is lost
+                self._deleted |= deleted - set(self._sessions)
+                for key, queued in unflushed.items():
+                    if key in self._sessions:
+                        later = self._unflushed.get(key)
+                        if later is not None:
+                            queued.merge(later)
+                        self._unflushed[key] = queued
+                raise
+            self._versions.update(versions)
+            self.flushes += 1
+
+    def _write_session(self, key: _SessionKey, queued: _Unflushed) -> Optional[int]:
+        """
+        Write one session's queued changes; returns the version the working
+        copy now reflects (None if another worker wrote since it was read).
+        """
+        row = self._db.execute(
+            "SELECT version FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()
+        stored_version = row[0] if row else None
+        version = (stored_version or 0) + 1
+        session = self._sessions.get(key)
+        self._db.execute(
+            "INSERT INTO sessions (app_name, user_id, id, version, update_time) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (app_name, user_id, id) DO UPDATE SET "
+            "version = excluded.version, update_time = MAX(update_time, excluded.update_time)",
+            (*key, version, session.last_update_time if session else time.time()),
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO session_state (app_name, user_id, session_id, key, value) VALUES (?, ?, ?, ?, ?)",
+            [(*key, name, _dumps(value)) for name, value in queued.state.items() if value is not None],
+        )
+        self._db.executemany(
+            "DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?",
+            [(*key, name) for name, value in queued.state.items() if value is None],
+        )
+        self._db.executemany(
+            "INSERT INTO events (app_name, user_id, session_id, id, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, event.id, event.timestamp, event.model_dump_json(exclude_none=True)) for event in queued.events],
+        )
+        self._write_pending_updates(key, [entry for _, entry in pending_update_items(queued.state)])
+        return version if self._versions.get(key) == stored_version else None
+
+    def _write_pending_updates(self, key: _SessionKey, updates) -> None:
+        # REPLACE drops the segment's old row, so the new one gets the next AUTOINCREMENT seq
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO pending_segment_updates "
+            "(app_name, user_id, session_id, segment_id, status, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(*key, str(update['segment_id']), update.get('status'), _dumps(update), now)
+             for update in updates if isinstance(update, dict) and update.get('segment_id')],
+        )
+
+    def pending_segment_updates(
+        self,
+        app_name: str,
+        session_id: Optional[str] = None,
+        segment_id: Optional[str] = None,
+        since: int = 0,
+    ) -> List[dict]:
+        """
+        Pending segment updates from the index, oldest first.
+
+        Each entry's `seq` is the index's sequence number (unique across
+        sessions and workers), not the per-process one in session state.
+
+        Args:
+            app_name: ADK application name
+            session_id: Only updates of this session
+            segment_id: Only updates of this segment
+            since: Only updates with a higher sequence number
+        """
+        self.flush()
+        query = "SELECT seq, data FROM pending_segment_updates WHERE app_name = ?"
+        params = [app_name]
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        if segment_id is not None:
+            query += " AND segment_id = ?"
+            params.append(segment_id)
+        if since:
+            query += " AND seq > ?"
+            params.append(since)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY seq", params).fetchall()
+        return [{**json.loads(data), 'seq': seq} for seq, data in rows]
+
+    def close(self) -> None:
+        """Stop the flusher and write what is still queued."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._db.close()
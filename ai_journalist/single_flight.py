@@ -0,0 +1,127 @@
+"""
+Single-flight coalescing of identical concurrent agent runs.
+
+When several editors open the same article, or the front-end retries, the
+same `rewrite-block` / `improve-article` request arrives while the first
+copy is still running; each used to pay for a full LLM run. Requests are
+now grouped by key (the normalized response-cache key): the first caller
+(the leader) runs the agent, callers arriving while it is in flight wait for
+it and get the same result, or the same exception.
+
+Only in-flight runs are shared; finished results are the response cache's
+job. Counters are exposed in `/metrics` (`ai_single_flight_calls_total`)
+and `/api/v1/cache/stats`.
+"""
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+from ai_journalist.metrics import REGISTRY
+
+T = TypeVar('T')
+
+single_flight_calls = REGISTRY.counter(
+    'ai_single_flight_calls_total',
+    'Agent runs by single-flight role: leader (ran) or shared (joined an identical in-flight run).',
+    ('role',),
+)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces identical calls across threads (Flask workers) and event-loop tasks (ASGI)."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def _count(self, role: str) -> None:
+        if role == 'leader':
+            self.leaders += 1
+        else:
+            self.shared += 1
+        single_flight_calls.inc(role=role)
+
+    def do(self, key: str, run: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Run `run()` unless an identical call is already in flight.
+
+        Returns:
+            (result, shared): `shared` is True if the result came from
+            another caller's run.
+
+        Raises:
+            Whatever `run()` raised, in the leader and every waiter.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count('leader' if leader else 'shared')
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = run()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: str, run: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Async variant of `do` for callers on one event loop.
+
+        The run is a separate task, so a leader whose client disconnects
+        does not cancel it for the requests waiting on it.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = loop.create_task(run())
+                task.add_done_callback(lambda _: self._forget(task_key))
+            self._count('leader' if leader else 'shared')
+        return await asyncio.shield(task), not leader
+
+    def _forget(self, task_key) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+    def stats(self) -> dict:
+        total = self.leaders + self.shared
+        return {
+            'leaders': self.leaders,
+            'shared': self.shared,
+            'sharedRate': round(self.shared / total, 4) if total else 0.0,
+            'inFlight': len(self._calls) + len(self._tasks),
+        }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide single-flight group."""
+    return _single_flight
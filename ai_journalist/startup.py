@@ -0,0 +1,80 @@
+"""
+When the agent graphs are built.
+
+Importing the servers (api_server.py, asgi_server.py) does not load
+google.adk, build `root_agent` / `segment_editor` or their pydantic schemas,
+or read the instruction files; all of that happens in `warmup()`:
+
+    - default: at startup, before the server accepts requests, so the first
+      request finds the runner pool warm
+    - `AI_LAZY_INIT=true`: on the first `/api/v1/*` request, or on an
+      explicit `POST /api/v1/warmup`. `/health` and `/metrics` answer as
+      soon as the process is up, which is what an autoscaler's cold start
+      waits for
+
+`preload()` only imports and reads files (no threads, sockets or pools), so
+the prefork parent calls it before forking and every worker shares the
+result.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+LAZY_INIT = os.getenv('AI_LAZY_INIT', 'false').lower() == 'true'
+
+# Paths whose first request warms up a lazily initialized server
+WARMUP_PATH_PREFIX = '/api/v1/'
+
+_lock = threading.Lock()
+_warmup_seconds: Optional[float] = None
+
+
+def preload() -> None:
+    """Import the agent graphs and hash the instruction files they were built from."""
+    import ai_journalist.agent  # noqa: F401  (root_agent)
+    import ai_journalist.segment_editing  # noqa: F401  (segment_editor and its schemas)
+    from ai_journalist.cache import instructions_version
+    instructions_version()
+
+
+def warmup() -> dict:
+    """
+    Build the agent graphs and the process-wide runner pool (idempotent).
+
+    Returns:
+        `status()` once the pool is up
+    """
+    global _warmup_seconds
+    with _lock:
+        if _warmup_seconds is None:
+            started = time.perf_counter()
+            preload()
+            from ai_journalist.runner_pool import start_runner_pool
+            start_runner_pool()
+            _warmup_seconds = time.perf_counter() - started
+    return status()
+
+
+def is_warm() -> bool:
+    """True once the runner pool exists (after `warmup()` or a first agent run)."""
+    runner_pool = sys.modules.get('ai_journalist.runner_pool')
+    return runner_pool is not None and runner_pool.runner_pool_started()
+
+
+def status() -> dict:
+    """Readiness fields for `/health` and `/api/v1/warmup`."""
+    return {
+        'warm': is_warm(),
+        'lazyInit': LAZY_INIT,
+        'warmupSeconds': round(_warmup_seconds, 3) if _warmup_seconds is not None else None,
+    }
+
+
+def shutdown() -> None:
+    """Close the runner pool if this process ever started one."""
+    if is_warm():
+        from ai_journalist.runner_pool import shutdown_runner_pool
+        shutdown_runner_pool()
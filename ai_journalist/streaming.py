@@ -0,0 +1,48 @@
+"""
+Server-Sent Events helpers for the streaming endpoints.
+
+`stream_article` / `stream_article_async` yield payload dicts as Runner
+events arrive; these helpers format them as SSE frames. The final `done`
+payload is replaced by the route's regular JSON body (see responses.py),
+so a streaming client ends up with exactly what the blocking endpoint
+would have returned.
+
+Frames look like:
+
+    event: text
+    data: {"type": "text", "text": "...", "partial": true, "author": "journalist_agent"}
+"""
+
+import json
+from typing import AsyncIterator, Callable, Iterable, Iterator
+
+SSE_MIMETYPE = 'text/event-stream'
+
+# Keep proxies (nginx) from buffering the stream
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def format_sse(payload: dict) -> str:
+    """Encode one payload as an SSE frame named after its type."""
+    return f"event: {payload['type']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _finalize(payload: dict, finalize: Callable[[dict], dict]) -> dict:
+    if payload['type'] == 'done':
+        return {'type': 'done', **finalize(payload['result'])}
+    return payload
+
+
+def sse_stream(payloads: Iterable[dict], finalize: Callable[[dict], dict]) -> Iterator[str]:
+    """Format a payload iterator as SSE frames."""
+    for payload in payloads:
+        yield format_sse(_finalize(payload, finalize))
+
+
+async def sse_stream_async(payloads: AsyncIterator[dict], finalize: Callable[[dict], dict]) -> AsyncIterator[str]:
+    """Format an async payload iterator as SSE frames."""
+    async for payload in payloads:
+        yield format_sse(_finalize(payload, finalize))
@@ -8,6 +8,9 @@ import json
 
 from pydantic import BaseModel, model_validator
 from google.adk.agents.llm_agent import Agent
+
+from ai_journalist.model_backend import resolve_model
+from ai_journalist.pending_updates import enqueue_update
 from ai_journalist.types.models import (
     Segment,
     SegmentInstruction,
@@ -52,8 +55,8 @@ def enqueue_segment_update(
     callback_context: CallbackContext, llm_response: LlmResponse
 ) -> Optional[LlmResponse]:
     """
-    Parse SegmentEditorOutput from tool/model response and push it into
-    state['pending_segment_updates'] for later review on the frontend.
+    Parse SegmentEditorOutput from tool/model response and merge it into
+    the pending segment updates in state for later review on the frontend.
     """
     update = _safe_parse_segment_output(llm_response)  # возвращает dict из JSON или пустой
     if not update:
@@ -65,28 +68,12 @@ def enqueue_segment_update(
         # можно залогировать или сложить «как есть», если не хочешь ронять flow
         return llm_response
 
-    queue = callback_context.state.setdefault("pending_segment_updates", [])
     new_entry = segment_update.model_dump()
     new_entry["updated_at"] = callback_context.now.isoformat() if hasattr(callback_context, "now") else None
 
-    updated_existing = False
-    for entry in queue:
-        if entry.get("segment_id") == new_entry.get("segment_id"):
-            entry_actions = entry.setdefault("actions", [])
-            entry_actions.extend(new_entry.get("actions", []))
-            entry["status"] = new_entry.get("status", entry.get("status"))
-            entry["handoff"] = new_entry.get("handoff", entry.get("handoff", {}))
-            entry["updated_at"] = new_entry["updated_at"]
-            updated_existing = True
-            break
-
-    if not updated_existing:
-        queue.append(new_entry)
-
-    callback_context.state["pending_segment_updates"] = queue.copy()
-    
-    # опционально пометь, что появились неприменённые правки
-    callback_context.state["has_pending_segment_updates"] = True
+    # Keyed by segment_id with a sequence number (see ai_journalist/pending_updates.py);
+    # also sets has_pending_segment_updates
+    enqueue_update(callback_context.state, new_entry)
     return llm_response
 
 
@@ -108,7 +95,7 @@ def _safe_parse_segment_output(resp: LlmResponse | str) -> Optional[dict]:
     return None
 
 segment_editor = Agent(
-    model="gemini-2.5-flash",
+    model=resolve_model(),
     name="segment_editor",
     description="Segment Editor revises a single article block using neighbors, instructions, and constraints.",
     instruction=load_segment_editor_instructions(),
@@ -4,6 +4,8 @@ from typing import Optional
 from pydantic import BaseModel
 from google.adk.agents.llm_agent import Agent
 
+from ai_journalist.model_backend import resolve_model
+
 from ai_journalist.types.models import (
     Segment,
     SegmentInstruction,
@@ -30,7 +32,7 @@ def load_writer_instructions() -> str:
 
 
 writer_agent = Agent(
-    model="gemini-2.5-flash",
+    model=resolve_model(),
     name="segment_writer",
     description="Segment Writer crafts or rewrites individual article segments based on instructions and supporting context.",
     instruction=load_writer_instructions(),
@@ -1,6 +1,10 @@
-from . import markup_blocks
-from . import memory
-from . import agent_utils
+import importlib
 
 __all__ = ['markup_blocks', 'memory', 'agent_utils']
 
+
+def __getattr__(name):
+    # Submodules load on first use; `memory` pulls in google.adk
+    if name in __all__:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,177 +1,457 @@
+import bisect
+import hashlib
+import io
+import itertools
+import mmap
+import os
 import re
-import uuid
-from typing import List, Dict, Any
-from google.adk.agents.llm_agent import ToolContext
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, TextIO, Tuple
 
-def markup_article_blocks(article_content: str, tool_context: ToolContext = None) -> dict:
+
+def stable_block_id(block_type: str, content: str, used_ids: Set[str], next_ordinal: Optional[Dict[str, int]] = None) -> str:
     """
-    Parse article content and mark each block with a unique ID.
-    For markdown, adds HTML comments with block IDs before each block.
+    Derive a content-stable block ID and reserve it in `used_ids`.
+    
+    The ID hashes the block type, its stripped content and an ordinal, so
+    re-parsing unchanged text yields the same IDs. Repeated blocks (e.g. two
+    `---` rules) and hash collisions get the next free ordinal, in document
+    order.
     
     Args:
-        article_content: The article content in markdown or plain text format.
-        tool_context: The ADK tool context.
+        block_type: Detected block type (e.g. "paragraph").
+        content: Stripped block content.
+        used_ids: IDs already taken in this document; updated in place.
+        next_ordinal: Optional memo of the next ordinal to try for repeated
+            (type, content) pairs, which keeps many identical blocks linear.
     
     Returns:
-        A dictionary containing:
-        - marked_content: Article with block IDs added
-        - blocks: List of block metadata with IDs, types, and content
-        - total_blocks: Total number of blocks identified
+        An ID of the form `block_<8 hex chars>`.
     """
-    if not article_content or not article_content.strip():
-        return {
-            "status": "error",
-            "message": "Article content is empty",
-            "blocks": [],
-            "total_blocks": 0
-        }
+    base = hashlib.sha1(f"{block_type}\0{content}".encode('utf-8')).hexdigest()
+    ordinal = next_ordinal.get(base, 0) if next_ordinal is not None else 0
+    while True:
+        suffix = base if ordinal == 0 else hashlib.sha1(f"{base}\0{ordinal}".encode('utf-8')).hexdigest()
+        block_id = f"block_{suffix[:8]}"
+        ordinal += 1
+        if block_id not in used_ids:
+            break
+    used_ids.add(block_id)
+    # Only repeated blocks are memoized; a first occurrence costs no memory
+    if next_ordinal is not None and ordinal > 1:
+        next_ordinal[base] = ordinal
+    return block_id
+
+# One pattern for every block marker, tried against the stripped line
+_BLOCK_MARKER = re.compile(r"""
+    (?P<heading>\#+)\s
+  | (?P<horizontal_rule>[-*_]{3,}$)
+  | (?P<code_fence>```)
+  | (?P<blockquote>>)
+  | (?P<list_item>(?:[-*+]|\d+\.)\s)
+  | (?P<table_row>\|.+\|)
+""", re.VERBOSE)
+
+# First characters that can start a marker; anything else is a paragraph
+_MARKER_CHARS = frozenset('#-*_`>+|0123456789')
+
+_MARKER_TYPES = {
+    "horizontal_rule": "horizontal_rule",
+    "code_fence": "code_block",
+    "blockquote": "blockquote",
+    "list_item": "list_item",
+    "table_row": "table_row",
+}
+
+
+def _detect_block_type(line: str) -> tuple:
+    """Detect block type and level from a line."""
+    stripped = line.strip()
     
-    blocks = []
-    marked_lines = []
-    current_block_id = None
-    current_block_type = None
-    current_block_content = []
-    current_block_level = None
-    block_counter = 0
+    # Empty line
+    if not stripped:
+        return ("empty_line", None)
     
-    lines = article_content.split('\n')
+    # Regular paragraph (no marker can start with this character)
+    if stripped[0] not in _MARKER_CHARS:
+        return ("paragraph", None)
     
-    def detect_block_type(line: str) -> tuple:
-        """Detect block type and level from a line."""
-        stripped = line.strip()
-        
-        # Headings (H1-H6)
-        heading_match = re.match(r'^(#+)\s+', stripped)
-        if heading_match:
-            level = len(heading_match.group(1))
-            return (f"heading_h{level}", level)
-        
-        # Horizontal rule
-        if re.match(r'^[-*_]{3,}$', stripped):
-            return ("horizontal_rule", None)
-        
-        # Code blocks (fenced)
-        if stripped.startswith('```'):
-            return ("code_block", None)
-        
-        # Blockquotes
-        if stripped.startswith('>'):
-            return ("blockquote", None)
-        
-        # Lists (ordered or unordered)
-        if re.match(r'^\s*[-*+]\s+', stripped) or re.match(r'^\s*\d+\.\s+', stripped):
-            return ("list_item", None)
-        
-        # Tables
-        if re.match(r'^\|.+\|', stripped):
-            return ("table_row", None)
-        
-        # Empty line
-        if not stripped:
-            return ("empty_line", None)
-        
-        # Regular paragraph
+    match = _BLOCK_MARKER.match(stripped)
+    if match is None:
         return ("paragraph", None)
     
-    def should_start_new_block(current_type: str, new_type: str, current_content: list) -> bool:
-        """Determine if we should start a new block."""
-        # First block
-        if current_type is None:
-            return True
+    # Headings (H1-H6)
+    if match.lastgroup == "heading":
+        level = len(match.group("heading"))
+        return (f"heading_h{level}", level)
+    
+    return (_MARKER_TYPES[match.lastgroup], None)
+
+
+def _should_start_new_block(current_type: str, new_type: str) -> bool:
+    """Determine if we should start a new block."""
+    # First block
+    if current_type is None:
+        return True
+    
+    # Headings always start new blocks
+    if new_type.startswith("heading_"):
+        return True
+    
+    # Different block types start new blocks, same type continues
+    return current_type != new_type
+
+
+def _iter_raw_blocks(lines: Iterable[str], start: int = 0) -> Iterator[Tuple[str, Optional[int], List[str], int, int]]:
+    """
+    Lazily split a sequence of lines into blocks.
+    
+    Empty lines end the current block and belong to no block. A fenced code
+    block runs from its opening ``` line through the closing one (or to the
+    end of the text) and keeps every line in between, empty ones included.
+    Only the lines of the current block are held, so `lines` can be any
+    iterator. Parsing can start at any line that begins a block, which is
+    what incremental re-markup relies on.
+    
+    Args:
+        lines: Lines without line terminators.
+        start: Line number of the first line in `lines`.
+    
+    Yields:
+        (block_type, level, block_lines, line_start, line_end) with
+        `line_end` exclusive.
+    """
+    current_type = None
+    current_level = None
+    current_start = start
+    current_lines = []
+    in_fence = False
+    i = start - 1
+    
+    for i, line in enumerate(lines, start):
+        # Inside a fence only the closing ``` matters
+        if in_fence:
+            current_lines.append(line)
+            if line.lstrip().startswith('```'):
+                yield "code_block", None, current_lines, current_start, i + 1
+                current_type = None
+                in_fence = False
+            continue
         
-        # Empty line always starts new block (but we'll skip it)
-        if new_type == "empty_line":
-            return True
+        block_type, block_level = _detect_block_type(line)
         
-        # Headings always start new blocks
-        if new_type.startswith("heading_"):
-            return True
+        # Empty lines end the current block but don't create content blocks
+        if block_type == "empty_line":
+            if current_type is not None:
+                yield current_type, current_level, current_lines, current_start, i
+                current_type = None
+            continue
         
-        # Different block types
-        if current_type != new_type:
-            return True
+        if not _should_start_new_block(current_type, block_type):
+            current_lines.append(line)
+            continue
         
-        # Same type continues
-        return False
+        if current_type is not None:
+            yield current_type, current_level, current_lines, current_start, i
+        current_type = block_type
+        current_level = block_level
+        current_start = i
+        current_lines = [line]
+        in_fence = block_type == "code_block"
+    
+    if current_type is not None:
+        yield current_type, current_level, current_lines, current_start, i + 1
+
+
+def _block_entry(block_type: str, level: Optional[int], block_content: str, block_id: str,
+                 position: int, line_start: int, line_end: int) -> Dict[str, Any]:
+    return {
+        "id": block_id,
+        "type": block_type,
+        "level": level,
+        "content": block_content,
+        "position": position,
+        "line_start": line_start,
+        "line_end": line_end,
+    }
+
+
+def iter_article_blocks(lines: Iterable[str], marked_output: Optional[TextIO] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Mark up an article one block at a time.
+    
+    Streaming counterpart of `parse_article_blocks` for book-length texts:
+    blocks are yielded as soon as they end and the marked-up text is written
+    to `marked_output` as it goes, so memory holds the current block and the
+    set of block IDs rather than the whole document. Blocks and IDs are
+    identical to `parse_article_blocks` on the same text.
+    
+    Args:
+        lines: Article lines without line terminators, e.g. from
+            `read_article_lines` or `content.split('\\n')`.
+        marked_output: Optional text stream receiving the article with an
+            HTML comment carrying the block ID before each block.
+    
+    Yields:
+        Block metadata dicts, as in `parse_article_blocks`.
+    """
+    used_ids = set()
+    next_ordinal = {}
+    cursor = 0
+    position = 0
+    line_count = [0]
+    
+    def counted(source):
+        for line in source:
+            line_count[0] += 1
+            yield line
     
-    for i, line in enumerate(lines):
-        block_type, block_level = detect_block_type(line)
+    for block_type, level, block_lines, line_start, line_end in _iter_raw_blocks(counted(lines)):
+        block_content = '\n'.join(block_lines).strip()
+        block_id = stable_block_id(block_type, block_content, used_ids, next_ordinal)
         
-        # Handle empty lines - they end current block but don't create new content blocks
-        if block_type == "empty_line":
-            # Save current block if exists
-            if current_block_id and current_block_content:
-                block_content = '\n'.join(current_block_content).strip()
-                if block_content:
-                    blocks.append({
-                        "id": current_block_id,
-                        "type": current_block_type,
-                        "level": current_block_level,
-                        "content": block_content,
-                        "position": block_counter,
-                    })
-                    block_counter += 1
-                    
-                    # Add HTML comment before block content
-                    marked_lines.append(f"<!-- block_id:{current_block_id} block_type:{current_block_type} -->")
-                    marked_lines.extend(current_block_content)
-            
-            # Reset current block
-            current_block_id = None
-            current_block_type = None
-            current_block_content = []
-            current_block_level = None
-            
-            # Add empty line to output
-            marked_lines.append("")
-            continue
+        if marked_output is not None:
+            # Empty lines between blocks are kept as-is
+            if position:
+                marked_output.write('\n')
+            marked_output.write('\n' * (line_start - cursor))
+            marked_output.write(f"<!-- block_id:{block_id} block_type:{block_type} -->\n")
+            marked_output.write('\n'.join(block_lines))
+        cursor = line_end
         
-        # Check if we should start a new block
-        if should_start_new_block(current_block_type, block_type, current_block_content):
-            # Save previous block
-            if current_block_id and current_block_content:
-                block_content = '\n'.join(current_block_content).strip()
-                if block_content:
-                    blocks.append({
-                        "id": current_block_id,
-                        "type": current_block_type,
-                        "level": current_block_level,
-                        "content": block_content,
-                        "position": block_counter,
-                    })
-                    block_counter += 1
-                    
-                    # Add HTML comment before block content
-                    marked_lines.append(f"<!-- block_id:{current_block_id} block_type:{current_block_type} -->")
-                    marked_lines.extend(current_block_content)
-            
-            # Start new block
-            current_block_id = f"block_{uuid.uuid4().hex[:8]}"
-            current_block_type = block_type
-            current_block_level = block_level
-            current_block_content = [line]
+        yield _block_entry(block_type, level, block_content, block_id, position, line_start, line_end)
+        position += 1
+    
+    if marked_output is not None:
+        trailing = line_count[0] - cursor
+        if position:
+            marked_output.write('\n' * trailing)
+        elif trailing:
+            marked_output.write('\n' * (trailing - 1))
+
+
+def read_article_lines(path: str, use_mmap: bool = False, encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Lazily read a UTF-8 article file as lines without terminators.
+    
+    Lines match `content.split('\\n')` of the whole file, including the
+    empty last line after a trailing newline.
+    
+    Args:
+        path: Path to the article file.
+        use_mmap: Memory-map the file instead of reading it through a
+            buffered file object; the OS pages it in on demand.
+        encoding: Text encoding of the file.
+    """
+    with open(path, 'rb') as f:
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from _decode_lines(iter(mapped.readline, b''), encoding)
         else:
-            # Continue current block
-            current_block_content.append(line)
-    
-    # Save last block
-    if current_block_id and current_block_content:
-        block_content = '\n'.join(current_block_content).strip()
-        if block_content:
-            blocks.append({
-                "id": current_block_id,
-                "type": current_block_type,
-                "level": current_block_level,
-                "content": block_content,
-                "position": block_counter,
-            })
-            block_counter += 1
-            
-            # Add HTML comment before block content
-            marked_lines.append(f"<!-- block_id:{current_block_id} block_type:{current_block_type} -->")
-            marked_lines.extend(current_block_content)
-    
-    marked_content = '\n'.join(marked_lines)
+            yield from _decode_lines(f, encoding)
+
+
+def _decode_lines(raw_lines: Iterable[bytes], encoding: str) -> Iterator[str]:
+    ends_with_newline = True
+    for raw in raw_lines:
+        ends_with_newline = raw.endswith(b'\n')
+        yield (raw[:-1] if ends_with_newline else raw).decode(encoding)
+    if ends_with_newline:
+        yield ''
+
+
+def parse_article_blocks(article_content: str) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Split article content into blocks with content-stable IDs.
+    
+    Args:
+        article_content: The article content in markdown or plain text format.
+    
+    Returns:
+        A tuple of (blocks, marked_content): block metadata dicts with `id`,
+        `type`, `level`, `content`, `position` and the block's line span
+        (`line_start`, `line_end`, end exclusive), and the article with an
+        HTML comment carrying the block ID before each block.
+    """
+    marked = io.StringIO()
+    blocks = list(iter_article_blocks(article_content.split('\n'), marked))
+    return blocks, marked.getvalue()
+
+
+def _common_prefix_length(a: str, b: str, chunk: int = 65536) -> int:
+    """Length of the common prefix of two strings (chunked slice compares)."""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i:i + chunk] == b[i:i + chunk]:
+        i += chunk
+    if i >= limit:
+        return limit
+    # Binary search for the mismatch inside the differing chunk
+    lo, hi = i, min(i + chunk, limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[i:mid] == b[i:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def changed_line_range(old_content: str, new_content: str) -> Tuple[int, int, int]:
+    """
+    Locate the edited line range between two versions of an article.
+    
+    Compares characters rather than split lines, so two large texts that
+    differ in one place are diffed at memcmp speed.
+    
+    Returns:
+        (start, old_end, new_end): lines `start:old_end` of the old text were
+        replaced by lines `start:new_end` of the new text.
+    """
+    prefix = _common_prefix_length(old_content, new_content)
+    max_suffix = min(len(old_content), len(new_content)) - prefix
+    suffix = min(_common_prefix_length(old_content[::-1], new_content[::-1]), max_suffix)
+    
+    start = old_content.count('\n', 0, prefix)
+    # Lines after the last newline of the common suffix are identical
+    common_tail = old_content.count('\n', len(old_content) - suffix) if suffix else 0
+    old_end = old_content.count('\n') + 1 - common_tail
+    new_end = new_content.count('\n') + 1 - common_tail
+    return start, old_end, new_end
+
+
+def _line_start(block: Dict[str, Any]) -> int:
+    return block["line_start"]
+
+
+def remarkup_article_blocks(
+    previous_blocks: List[Dict[str, Any]],
+    new_content: str,
+    start_line: int,
+    old_end_line: int,
+    new_end_line: int,
+    used_ids: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Incrementally update a block list after an edit.
+    
+    Only the blocks around the edited line range are re-parsed. Parsing
+    starts one block before the edit (an edit can merge it with its
+    neighbour) and stops at the first block past the edit that starts where
+    an old block started; everything from there on is the old block list,
+    shifted by the edit's line delta. Blocks before the edit are returned as
+    the same objects; blocks after it are copied only when their position
+    or line span moved. Untouched blocks always keep their IDs, even where a
+    full re-parse would renumber repeated blocks.
+    
+    Args:
+        previous_blocks: Block list from `parse_article_blocks` (or a
+            previous call) for the old text, in document order.
+        new_content: Full article text after the edit.
+        start_line: First edited line.
+        old_end_line: End of the edited range in the old text (exclusive).
+        new_end_line: End of the edited range in the new text (exclusive).
+            `changed_line_range` computes all three from two texts.
+        used_ids: Optional set of every block ID in the old document, kept
+            by the caller across edits and updated in place. Without it the
+            set is rebuilt from `previous_blocks` on each call.
+    
+    Returns:
+        A dictionary containing:
+        - blocks: Updated block list
+        - added: IDs of blocks that did not exist before
+        - removed: IDs of blocks that no longer exist
+        - reparsed_lines: Number of lines that were parsed again
+    """
+    lines = new_content.split('\n')
+    delta = new_end_line - old_end_line
+    
+    # First old block to re-parse: one before the block holding start_line
+    first = max(bisect.bisect_right(previous_blocks, start_line, key=_line_start) - 2, 0)
+    region_start = min(start_line, previous_blocks[first]["line_start"]) if previous_blocks else 0
+    # Old blocks from here on may be reused unchanged, shifted by delta
+    reusable_from = bisect.bisect_left(previous_blocks, old_end_line, key=_line_start)
+    
+    resume = len(previous_blocks)
+    reparsed = []
+    reparsed_end = region_start
+    for block_type, level, block_lines, line_start, line_end in _iter_raw_blocks(itertools.islice(lines, region_start, None), region_start):
+        if line_start >= new_end_line:
+            j = bisect.bisect_left(previous_blocks, line_start - delta, reusable_from, key=_line_start)
+            if j < len(previous_blocks) and previous_blocks[j]["line_start"] == line_start - delta:
+                resume = j
+                break
+        reparsed.append((block_type, level, '\n'.join(block_lines).strip(), line_start, line_end))
+        reparsed_end = line_end
+    
+    prefix = previous_blocks[:first]
+    suffix = previous_blocks[resume:]
+    old_ids = {block["id"] for block in previous_blocks[first:resume]}
+    if used_ids is None:
+        used_ids = {block["id"] for block in prefix}
+        used_ids.update(block["id"] for block in suffix)
+    else:
+        used_ids.difference_update(old_ids)
+    
+    new_blocks = []
+    for block_type, level, block_content, line_start, line_end in reparsed:
+        block_id = stable_block_id(block_type, block_content, used_ids)
+        new_blocks.append(_block_entry(
+            block_type, level, block_content, block_id, first + len(new_blocks), line_start, line_end
+        ))
+    
+    position = first + len(new_blocks)
+    if not delta and position == resume:
+        # Same line count and block count: the tail is reused as-is
+        shifted = suffix
+    else:
+        shifted = [
+            {
+                **block,
+                "position": position + offset,
+                "line_start": block["line_start"] + delta,
+                "line_end": block["line_end"] + delta,
+            }
+            for offset, block in enumerate(suffix)
+        ]
+    
+    new_ids = {block["id"] for block in new_blocks}
+    return {
+        "blocks": prefix + new_blocks + shifted,
+        "added": [block["id"] for block in new_blocks if block["id"] not in old_ids],
+        "removed": [block_id for block_id in old_ids if block_id not in new_ids],
+        "reparsed_lines": reparsed_end - region_start,
+    }
+
+
+def markup_article_blocks(article_content: str, tool_context=None) -> dict:
+    """
+    Parse article content and mark each block with a unique ID.
+    For markdown, adds HTML comments with block IDs before each block.
+    
+    Block IDs are derived from the block type and content, so marking up the
+    same text again yields the same IDs.
+    
+    Args:
+        article_content: The article content in markdown or plain text format.
+        tool_context: The ADK `ToolContext` (left unannotated so the parsers
+            here load without google.adk; ADK passes it by name).
+    
+    Returns:
+        A dictionary containing:
+        - status: "success" or "error"
+        - total_blocks: Total number of blocks identified
+        - message: Human-readable summary
+        The block list is stored in `state['article_blocks']`.
+    """
+    if not article_content or not article_content.strip():
+        return {
+            "status": "error",
+            "message": "Article content is empty",
+            "blocks": [],
+            "total_blocks": 0
+        }
+    
+    blocks, _ = parse_article_blocks(article_content)
     
     # Store blocks in tool context state if available
     if tool_context and hasattr(tool_context, 'state'):
@@ -182,4 +462,3 @@ def markup_article_blocks(article_content: str, tool_context: ToolContext = None
         "total_blocks": len(blocks),
         "message": f"Successfully marked {len(blocks)} blocks in the article"
     }
-
@@ -1,6 +1,108 @@
+"""
+Session-state tools for the agents: `memorize` (one value per key),
+`memorize_list` (an ordered set of values per key), `recall_memory` and the
+article context. The root agent has all of them.
+
+Memories live in session state under `memory:<key>`, apart from the keys
+the service itself sets, and are serialized with it every turn, so they
+are bounded:
+
+    - list memories are stored as a JSON object {value: last used}, so a
+      duplicate is found with one lookup and moves to the end (most recent)
+    - at most `AI_MEMORY_MAX_VALUES` (default 100) values per key; the least
+      recently memorized ones are dropped first
+    - at most `AI_MEMORY_MAX_KEYS` (default 256) keys per session, tracked in
+      the `memory_index` state key by last use; least recently used keys and
+      keys unused for `AI_MEMORY_TTL_SECONDS` (default: no limit) are evicted
+
+ADK state has no delete, so an evicted key is tombstoned: set to None, which
+drops its value and tells the session service to remove it. The SQLite
+session service (`AI_SESSION_DB_PATH`, see session_store.py), which
+persists memories with the rest of the session, compacts tombstones away on
+its next flush; with in-memory sessions only the bare keys remain until the
+session ends.
+
+Article context: `load_context` fills `article_segments` with a window of
+the stored document around the request's block before each root-agent turn,
+and `fetch_article_segments` lets the agent read the rest on demand.
+"""
+
+import os
+import time
+from typing import Any, Optional
+
 from google.adk.agents.llm_agent import ToolContext
 from google.adk.agents.callback_context import CallbackContext
 
+from ai_journalist.context_builder import find_block_index, segment_window
+from ai_journalist.document_cache import get_document_cache
+
+MEMORY_INDEX_KEY = 'memory_index'
+MEMORY_KEY_PREFIX = 'memory:'
+MEMORY_MAX_KEYS = int(os.getenv('AI_MEMORY_MAX_KEYS', 256))
+MEMORY_MAX_VALUES = int(os.getenv('AI_MEMORY_MAX_VALUES', 100))
+MEMORY_TTL_SECONDS = float(os.getenv('AI_MEMORY_TTL_SECONDS', 0))
+
+# Set per request by the runner pool, read by load_context
+DOCUMENT_ID_KEY = 'document_id'
+SELECTED_BLOCK_KEY = 'selected_block_id'
+ARTICLE_SEGMENTS_KEY = 'article_segments'
+SEGMENT_WINDOW_KEY = 'article_segments_window'
+SEGMENT_FIELDS = ('id', 'type', 'level', 'content', 'position')
+MAX_FETCH_SEGMENTS = 50
+
+
+def memory_key(key: str) -> str:
+  """State key of the memory labelled `key`."""
+  return MEMORY_KEY_PREFIX + key
+
+
+def _touch(state, key: str) -> None:
+  """Mark `key` most recently used and evict (tombstone) keys over the caps."""
+  now = time.time()
+  index = dict(state.get(MEMORY_INDEX_KEY) or {})
+  index.pop(key, None)
+  index[key] = now
+  # The index is ordered by last use, so evictions come off the front
+  for old_key, last_used in list(index.items()):
+    expired = MEMORY_TTL_SECONDS and now - last_used > MEMORY_TTL_SECONDS
+    if old_key == key or not (expired or len(index) > MEMORY_MAX_KEYS):
+      break
+    del index[old_key]
+    state[memory_key(old_key)] = None
+  state[MEMORY_INDEX_KEY] = index
+
+
+def recall(state, key: str) -> Any:
+  """
+  A memorized value; list memories come back as a list, oldest first.
+
+  Args:
+      state: Session state (ADK `State` or a plain dict).
+      key: the label the memory was stored under.
+  """
+  value = state.get(memory_key(key))
+  return list(value) if isinstance(value, dict) else value
+
+
+def recall_memory(key: str, tool_context: ToolContext) -> dict:
+  """
+  Recall a memorized piece of information.
+
+  Args:
+      key: the label the memory was stored under.
+      tool_context: The ADK tool context.
+
+  Returns:
+      The stored value (a list for memorize_list memories), or a not_found status.
+  """
+  value = recall(tool_context.state, key)
+  if value is None:
+    return {"status": "not_found", "key": key}
+  _touch(tool_context.state, key)
+  return {"status": "ok", "key": key, "value": value}
+
+
 def memorize_list(key: str, value: str, tool_context: ToolContext) -> dict:
   """
   Memorize pieces of information.
@@ -14,10 +116,14 @@ def memorize_list(key: str, value: str, tool_context: ToolContext) -> dict:
       A status message.
   """
   mem_dict = tool_context.state
-  if key not in mem_dict:
-    mem_dict[key] = []
-  if value not in mem_dict[key]:
-    mem_dict[key].append(value)
+  stored = mem_dict.get(memory_key(key))
+  values = dict(stored) if isinstance(stored, dict) else {}
+  values.pop(value, None)
+  values[value] = time.time()
+  while len(values) > MEMORY_MAX_VALUES:
+    del values[next(iter(values))]
+  mem_dict[memory_key(key)] = values
+  _touch(mem_dict, key)
   return {"status": f'Stored "{key}": "{value}"'}
 
 
@@ -34,108 +140,86 @@ def memorize(key: str, value: str, tool_context: ToolContext) -> dict:
       A status message.
   """
   mem_dict = tool_context.state
-  mem_dict[key] = value
-  mem_dict[key] = value
+  mem_dict[memory_key(key)] = value
+  _touch(mem_dict, key)
   return {"status": f'Stored "{key}": "{value}"'}
-  
+
+
+def _segment(block: dict) -> dict:
+  return {field: block.get(field) for field in SEGMENT_FIELDS}
+
+
 def load_context(callback_context: CallbackContext, llm_request=None) -> None:
     """
-    Load article blocks and marked article from the tool context state.
+    Put the window of article segments around the selected block into state.
+
+    The document comes from the document store (document_cache.py) by the
+    `document_id` in session state, the target from `selected_block_id`
+    (both set by the runner pool per request). Only the segments around the
+    target that fit `AI_CONTEXT_TOKEN_BUDGET` go into `article_segments`;
+    the agent reads further ones with `fetch_article_segments`. State is only
+    written when the window moves (another block or document version).
 
     Args:
         callback_context: The ADK callback context.
     """
-    article_segments = callback_context.state.get('article_segments', [
-      {
-        "id": "block_506ec105",
-        "type": "heading_h1",
-        "level": 1,
-        "content": "# BlockJam 2025: Уникальный хакатон Theta Network с программой инкубатора",
-        "position": 0
-      },
-      {
-        "id": "block_0e987eda",
-        "type": "paragraph",
-        "level": None,
-        "content": "**ASRP.media** беседует с Саймоном Пиазоло о европейской конференции Theta Network и хакатоне BlockJam 2025 в Берлине.",
-        "position": 1
-      },
-      {
-        "id": "block_ff0aa9a7",
-        "type": "horizontal_rule",
-        "level": None,
-        "content": "---",
-        "position": 2
-      },
-      {
-        "id": "block_3440e41b",
-        "type": "paragraph",
-        "level": None,
-        "content": "**ASRP.media:** Привет всем с [THETA EuroCon](https://www.linkedin.com/company/theta-eurocon/) — Европейская конференция Theta Network и хакатон BlockJam 2025 в Берлине. Сегодня мы здесь с Саймоном Пиазоло, одним из соучредителей и организаторов конференции Theta Euro, и он любезно согласился ответить на некоторые наши вопросы. Привет, Саймон. Давайте поговорим о хакатоне. На ваш взгляд, что делает BlockJam уникальным среди других мероприятий, и что участники должны вынести из него?",
-        "position": 3
-      },
-      {
-        "id": "block_b0e717c8",
-        "type": "paragraph",
-        "level": None,
-        "content": "**[Саймон Пиазоло](https://www.linkedin.com/in/simon-piazolo/):** Одно из ключевых отличий заключается в том, что вместо 24- или 48-часового хакатона это мероприятие длится 5 дней. Это дает участникам время действительно создать что-то значимое с использованием технологии Theta и применить это к реальным концепциям. А после этого у нас также есть программа инкубатора, предназначенная для того, чтобы помочь превратить проекты в реальные стартапы, а не просто в прототипы хакатона.",
-        "position": 4
-      },
-      {
-        "id": "block_114ebcaa",
-        "type": "paragraph",
-        "level": None,
-        "content": "**ASRP.media:** Говоря об участниках, как вы думаете, какова была ключевая выгода для них от участия в хакатоне?",
-        "position": 5
-      },
-      {
-        "id": "block_d94e85f6",
-        "type": "paragraph",
-        "level": None,
-        "content": "**Саймон Пиазоло:** Да, я думаю, что основная выгода, очевидно, заключается в нетворкинге на хакатоне — встреча с другими разработчиками и наблюдение за новыми идеями, развивающимися в экосистеме Theta. Но также программа инкубатора после этого является огромным преимуществом. Если они победят, они получат шесть месяцев в инкубаторе с финансированием и нашей поддержкой, так что проект хакатона действительно может превратиться в стартап.",
-        "position": 6
-      },
-      {
-        "id": "block_b73b79d1",
-        "type": "paragraph",
-        "level": None,
-        "content": "**ASRP.media:** И наконец, глядя в будущее, вы упомянули ваш инкубатор. Каковы ваши планы по дальнейшему развитию конференции Theta и платформ Theta Cloud?",
-        "position": 7
-      },
-      {
-        "id": "block_c404add1",
-        "type": "paragraph",
-        "level": None,
-        "content": "**Саймон Пиазоло:** Да, что касается Theta Edge Cloud, наша цель — продолжать привлекать больше пользователей и позволять стартапам строить непосредственно на платформе. Что касается конференции Theta EuroCon, наш акцент сделан на рост. Хакатон этого года был нашим первым, и наша амбиция на следующий год — удвоить количество участников. В идеале мы хотим видеть, как команды развиваются за пределами стадии хакатона и превращают свои проекты в реальные, устойчивые стартапы.",
-        "position": 8
-      },
-      {
-        "id": "block_42470c5a",
-        "type": "paragraph",
-        "level": None,
-        "content": "**ASRP.media:** Саймон, большое спасибо. Оставайтесь с нами и следите за нашими обновлениями на официальных каналах ASRP и в социальных сетях. А для Theta Edge и Симона — увидимся скоро на сцене, открывая конференцию. Спасибо за ваше время.",
-        "position": 9
-      },
-      {
-        "id": "block_9a2c6c30",
-        "type": "horizontal_rule",
-        "level": None,
-        "content": "---",
-        "position": 10
-      },
-      {
-        "id": "block_2990e920",
-        "type": "paragraph",
-        "level": None,
-        "content": "*Источник: [ASRP.media](http://ASRP.media)*",
-        "position": 11
-      }
-    ])
-
-    callback_context.state['article_segments'] = article_segments
-
-    
-    
-    
-
-        
+    state = callback_context.state
+    document_id = state.get(DOCUMENT_ID_KEY)
+    document = get_document_cache().get(document_id) if document_id else None
+    if document is None:
+        # Nothing stored for this document; the instructions template needs the key
+        if ARTICLE_SEGMENTS_KEY not in state:
+            state[ARTICLE_SEGMENTS_KEY] = []
+        return
+
+    block_id = state.get(SELECTED_BLOCK_KEY)
+    window_id = f"{document_id}@{document.version}:{block_id or ''}"
+    if (state.get(SEGMENT_WINDOW_KEY) or {}).get('id') == window_id:
+        return
+    start, end = segment_window(document.blocks, find_block_index(document.blocks, block_id) or 0)
+    state[ARTICLE_SEGMENTS_KEY] = [_segment(block) for block in document.blocks[start:end]]
+    state[SEGMENT_WINDOW_KEY] = {
+        'id': window_id,
+        'start': start,
+        'end': end,
+        'total_blocks': len(document.blocks),
+        'document_version': document.version,
+    }
+
+
+def fetch_article_segments(
+    tool_context: ToolContext,
+    block_ids: Optional[list[str]] = None,
+    start: int = 0,
+    limit: int = 20,
+) -> dict:
+  """
+  Fetch article segments that are not in the current article_segments window.
+
+  Args:
+      tool_context: The ADK tool context.
+      block_ids: IDs of the segments to fetch; when given, start and limit are ignored.
+      start: Position of the first segment to fetch.
+      limit: Maximum number of segments to return (at most 50).
+
+  Returns:
+      The segments, the total number of segments and the document version,
+      or an error status if the document is not available.
+  """
+  document_id = tool_context.state.get(DOCUMENT_ID_KEY)
+  document = get_document_cache().get(document_id) if document_id else None
+  if document is None:
+    return {"status": "error", "error": "No stored document for this session; work from article_segments."}
+
+  if block_ids:
+    wanted = set(block_ids)
+    blocks = [block for block in document.blocks if block.get('id') in wanted]
+  else:
+    start = max(start, 0)
+    blocks = document.blocks[start:start + min(max(limit, 1), MAX_FETCH_SEGMENTS)]
+  return {
+      "status": "ok",
+      "segments": [_segment(block) for block in blocks],
+      "total_blocks": len(document.blocks),
+      "document_version": document.version,
+  }
@@ -0,0 +1,185 @@
+"""
+Per-run cost of event logging in the runner: print dumps vs structured logging.
+
+"legacy" is the previous print-based path, kept here verbatim: a dump of
+every event while the run loop is going, then a second walk over all
+events that prints every part while collecting the response text. "info"
+is the current path at the default INFO level. "debug" is the current path
+with DEBUG on and every run sampled (AI_LOG_EVENT_SAMPLE_RATE=1). Output goes
+to /dev/null so only formatting and write cost is measured.
+
+Events are synthetic ADK events: text turns of a few hundred characters
+plus tool calls and tool responses, as in a typical agent run.
+
+Usage:
+    python -m benchmarks.event_logging [-n 2000] [--events 12]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import time
+
+from google.adk.events import Event
+from google.genai import types
+
+from ai_journalist import runner
+from ai_journalist.log import event_dump_enabled
+
+
+def synthetic_events(count: int) -> list:
+    events = []
+    for i in range(count):
+        if i % 3 == 1:
+            part = types.Part(function_call=types.FunctionCall(name='markup_article_blocks', args={'article_content': 'x' * 200}))
+        elif i % 3 == 2:
+            part = types.Part(function_response=types.FunctionResponse(name='markup_article_blocks', response={'status': 'success'}))
+        else:
+            part = types.Part(text=f"Turn {i}: " + "The article reads well but the lead could be tighter. " * 6)
+        events.append(Event(author='journalist_agent', content=types.Content(role='model', parts=[part])))
+    return events
+
+
+def legacy_log_event(i: int, event) -> None:
+    event_type = type(event).__name__
+    print(f"📨 Event #{i+1}: {event_type}")
+    
+    # Log event details
+    if hasattr(event, 'content'):
+        if isinstance(event.content, list):
+            for j, content_item in enumerate(event.content):
+                if hasattr(content_item, 'text'):
+                    text_preview = content_item.text[:100] if content_item.text else "None"
+                    print(f"   Content[{j}]: {text_preview}...")
+        elif hasattr(event.content, 'text'):
+            text_preview = event.content.text[:100] if event.content.text else "None"
+            print(f"   Content: {text_preview}...")
+    
+    if hasattr(event, 'tool_calls'):
+        print(f"   🔧 Tool calls: {len(event.tool_calls) if event.tool_calls else 0}")
+        if event.tool_calls:
+            for tool_call in event.tool_calls[:3]:  # Show first 3
+                tool_name = getattr(tool_call, 'name', 'unknown')
+                print(f"      - {tool_name}")
+
+
+def legacy_collect_response_text(events: list) -> str:
+    """Concatenate the text parts of all events (tool calls are skipped)."""
+    # Collect response text from events
+    print("\n📥 Collecting response from events...")
+    response_text = ""
+    for i, event in enumerate(events):
+        event_type = type(event).__name__
+        print(f"\n   Event #{i+1} ({event_type}):")
+        
+        if hasattr(event, 'content') and event.content:
+            print(f"      ✅ Has content (type: {type(event.content).__name__})")
+            
+            # Handle Content object with parts
+            if hasattr(event.content, 'parts'):
+                parts = event.content.parts
+                print(f"      Content has {len(parts)} parts")
+                for j, part in enumerate(parts):
+                    part_type = type(part).__name__
+                    print(f"         Part[{j}] type: {part_type}")
+                    
+                    # Check for text in part
+                    if hasattr(part, 'text') and part.text:
+                        text = part.text
+                        response_text += text + "\n"
+                        print(f"         ✅ Text found in part[{j}]: {len(text)} chars")
+                        print(f"         Text preview: {text[:150]}...")
+                    
+                    # Check for function_call (tool calls) - skip these
+                    if hasattr(part, 'function_call'):
+                        print(f"         ⚙️  Part[{j}] is a function_call (tool call), skipping")
+                    
+                    # Check for function_response (tool responses) - skip these
+                    if hasattr(part, 'function_response'):
+                        print(f"         ⚙️  Part[{j}] is a function_response (tool response), skipping")
+            
+            # Fallback: check if content has text directly
+            elif hasattr(event.content, 'text') and event.content.text:
+                text = event.content.text
+                response_text += text + "\n"
+                print(f"      ✅ Text found directly: {len(text)} chars")
+            
+            # Handle list of content items
+            elif isinstance(event.content, list):
+                print(f"      Content is list with {len(event.content)} items")
+                for j, content_item in enumerate(event.content):
+                    if hasattr(content_item, 'text') and content_item.text:
+                        text = content_item.text
+                        response_text += text + "\n"
+                        print(f"         ✅ Text found in item[{j}]: {len(text)} chars")
+            else:
+                print(f"      ⚠️  Content exists but structure unknown")
+                print(f"      Content type: {type(event.content).__name__}")
+                print(f"      Content attributes: {[attr for attr in dir(event.content) if not attr.startswith('_')][:10]}")
+        else:
+            print(f"      ⚠️  No content or content is None")
+        
+        # Check for other possible response fields
+        if hasattr(event, 'text') and event.text:
+            text = event.text
+            response_text += text + "\n"
+            print(f"      ✅ Found 'text' attribute directly: {len(text)} chars")
+    
+    return response_text
+
+
+def legacy_run(events: list) -> str:
+    for i, event in enumerate(events):
+        legacy_log_event(i, event)
+    return legacy_collect_response_text(events)
+
+
+def current_run(events: list) -> str:
+    dump = event_dump_enabled(runner.logger)
+    for i, event in enumerate(events):
+        if dump:
+            runner._log_event(i, event)
+    return runner._collect_response_text(events)
+
+
+def measure(fn, events: list, iterations: int) -> float:
+    """Median microseconds per run."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(events)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event logging overhead per agent run")
+    parser.add_argument("-n", "--iterations", type=int, default=2000, help="Runs per variant")
+    parser.add_argument("--events", type=int, default=12, help="Events per run")
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events)
+    os.environ['AI_LOG_EVENT_SAMPLE_RATE'] = '1'
+    root = logging.getLogger('ai_journalist')
+    handler = root.handlers[0]
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        handler.setStream(devnull)
+        assert legacy_run(events) == current_run(events)
+        legacy_us = measure(legacy_run, events, args.iterations)
+        root.setLevel(logging.INFO)
+        info_us = measure(current_run, events, args.iterations)
+        root.setLevel(logging.DEBUG)
+        debug_us = measure(current_run, events, args.iterations)
+        root.setLevel(logging.INFO)
+
+    print(f"Runs per variant: {args.iterations}, events per run: {args.events}")
+    print(f"{'legacy':<8} {legacy_us:9.1f} us/run")
+    print(f"{'info':<8} {info_us:9.1f} us/run   ({legacy_us / info_us:.0f}x less)")
+    print(f"{'debug':<8} {debug_us:9.1f} us/run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Import time of the service's entry points, measured with `python -X importtime`.
+
+A cold start (the autoscaler adding a replica, a prefork worker being
+replaced, `python -m ai_journalist.runner --help`) pays for every module
+its entry point imports before it can answer. Each target is imported
+`--runs` times in a fresh interpreter; the report gives the median total
+(everything imported after interpreter startup), whether google.adk was
+among it, and the modules with the largest cumulative time in the fastest
+run.
+
+The script exits with status 1 when a target's median passes `--max-ms`
+(default `AI_IMPORT_BUDGET_MS`, 1000 ms), so a heavy import creeping back
+into the startup path fails CI. For reference, importing google.adk and
+building the agents (`ai_journalist.agent`) takes about 2.5 s.
+
+Usage:
+    python -m benchmarks.import_time [--targets ai_journalist.api_server,...]
+        [--runs 5] [--top 8] [--max-ms 1000] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TARGETS = 'ai_journalist.api_server,ai_journalist.asgi_server,ai_journalist.prefork,ai_journalist.runner'
+IMPORT_BUDGET_MS = float(os.getenv('AI_IMPORT_BUDGET_MS', 1000))
+
+# "import time:  self [us] | cumulative | imported package", nesting shown by indentation
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Modules imported after interpreter startup (everything after `site`),
+    in the order `-X importtime` reports them.
+    """
+    entries, started = [], False
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        depth = len(indent) // 2
+        if not started:
+            started = depth == 0 and module == 'site'
+            continue
+        entries.append({'module': module, 'depth': depth,
+                        'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return entries
+
+
+def measure(module: str) -> List[Dict]:
+    """Import `module` in a fresh interpreter and return its parsed import times."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.getenv('PYTHONPATH')])))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(entries: List[Dict]) -> float:
+    return sum(entry['cumulative_ms'] for entry in entries if entry['depth'] == 0)
+
+
+def run_target(module: str, runs: int, top: int) -> dict:
+    samples = [measure(module) for _ in range(runs)]
+    totals = [total_ms(entries) for entries in samples]
+    fastest = samples[totals.index(min(totals))]
+    heaviest = sorted(fastest, key=lambda entry: entry['cumulative_ms'], reverse=True)[:top]
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(totals), 1),
+        'min_ms': round(min(totals), 1),
+        'modules': len(fastest),
+        'google_adk': any(entry['module'] == 'google.adk' for entry in fastest),
+        'top': [{'module': entry['module'], 'cumulative_ms': round(entry['cumulative_ms'], 1)} for entry in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the service entry points")
+    parser.add_argument("--targets", default=DEFAULT_TARGETS, help="Comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest modules listed per target")
+    parser.add_argument("--max-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="Budget for each target's median import time (0: no check)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results, over_budget = [], []
+    for module in args.targets.split(","):
+        result = run_target(module.strip(), max(1, args.runs), args.top)
+        results.append(result)
+        print(f"{result['module']:<28} median {result['median_ms']:>8.1f} ms  min {result['min_ms']:>8.1f} ms  "
+              f"modules {result['modules']:>5}  google.adk {'yes' if result['google_adk'] else 'no'}")
+        for entry in result['top']:
+            print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+        if args.max_ms and result['median_ms'] > args.max_ms:
+            over_budget.append(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({'budget_ms': args.max_ms, 'targets': results}, indent=2))
+        print(f"\nSaved {args.output}")
+    for result in over_budget:
+        print(f"\n{result['module']}: {result['median_ms']:.1f} ms exceeds the {args.max_ms:.0f} ms import budget",
+              file=sys.stderr)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
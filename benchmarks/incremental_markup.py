@@ -0,0 +1,101 @@
+"""
+Cost of re-marking an article after a one-paragraph edit: full re-parse with
+parse_article_blocks vs remarkup_article_blocks on the edited range.
+
+Articles are synthetic (headings, paragraphs, lists, quotes, rules) and grow
+from ~30 KB to several MB; each iteration rewrites one paragraph in the
+middle, alternating between a same-length and a line-adding edit. The
+"diff ms" column is changed_line_range locating the edit from the two texts;
+"incr ms" is remarkup_article_blocks alone.
+
+Usage:
+    python -m benchmarks.incremental_markup [--sizes 30000,300000,3000000] [-n 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from ai_journalist.tools.markup_blocks import (
+    changed_line_range,
+    parse_article_blocks,
+    remarkup_article_blocks,
+)
+
+SECTION = """## Section {i}
+
+Paragraph {i} opens the section with a few sentences of ordinary prose so the
+block spans more than one line and looks like a real longread paragraph.
+
+- first point of section {i}
+- second point of section {i}
+
+> A quote from interview {i}.
+
+---
+"""
+
+
+def synthetic_article(target_chars: int) -> str:
+    parts = ["# Synthetic article\n"]
+    size = 0
+    i = 0
+    while size < target_chars:
+        section = SECTION.format(i=i)
+        parts.append(section)
+        size += len(section)
+        i += 1
+    return "\n".join(parts)
+
+
+def edit_middle(content: str, iteration: int) -> str:
+    lines = content.split("\n")
+    middle = len(lines) // 2
+    while not lines[middle].startswith("Paragraph"):
+        middle += 1
+    replacement = [f"Paragraph rewritten by edit {iteration}."]
+    if iteration % 2:
+        replacement.append("It now has an extra line.")
+    return "\n".join(lines[:middle] + replacement + lines[middle + 2:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental re-markup against full re-parse")
+    parser.add_argument("--sizes", default="30000,300000,3000000", help="Comma-separated article sizes in characters")
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="Edits per size")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'blocks':>8} {'full ms':>10} {'diff ms':>9} {'incr ms':>9} {'speedup':>8} {'reparsed':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        content = synthetic_article(size)
+        blocks, _ = parse_article_blocks(content)
+        used_ids = {block["id"] for block in blocks}
+        full_times, diff_times, incr_times, reparsed = [], [], [], []
+
+        for iteration in range(args.iterations):
+            new_content = edit_middle(content, iteration)
+
+            start = time.perf_counter()
+            parse_article_blocks(new_content)
+            full_times.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            span = changed_line_range(content, new_content)
+            diff_times.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            update = remarkup_article_blocks(blocks, new_content, *span, used_ids=used_ids)
+            incr_times.append((time.perf_counter() - start) * 1000)
+            reparsed.append(update["reparsed_lines"])
+
+            content, blocks = new_content, update["blocks"]
+
+        full_ms = statistics.median(full_times)
+        diff_ms = statistics.median(diff_times)
+        incr_ms = statistics.median(incr_times)
+        print(f"{len(content):>10} {len(blocks):>8} {full_ms:>10.2f} {diff_ms:>9.3f} {incr_ms:>9.3f} "
+              f"{full_ms / incr_ms:>7.0f}x {statistics.median(reparsed):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
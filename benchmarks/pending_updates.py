@@ -0,0 +1,81 @@
+"""
+Cost of queueing segment updates over a long editing session: the old
+`pending_segment_updates` list (linear scan + full copy written back) vs the
+keyed store in ai_journalist/pending_updates.py.
+
+Each step enqueues one update into an ADK `State`, cycling over `--segments`
+segment IDs so later steps merge into existing entries. "delta KB" is the
+JSON size of the state delta one enqueue produces (what every event carries)
+at the end of the session; "poll ms" lists the updates newer than the last
+50.
+
+Usage:
+    python -m benchmarks.pending_updates [--steps 500,2000,8000] [--segments 400]
+"""
+
+import argparse
+import json
+import time
+
+from google.adk.sessions.state import State
+
+from ai_journalist.pending_updates import enqueue_update, list_pending_updates
+
+
+def enqueue_list(state: State, new_entry: dict) -> None:
+    """Previous enqueue_segment_update body."""
+    queue = state.setdefault("pending_segment_updates", [])
+    for entry in queue:
+        if entry.get("segment_id") == new_entry.get("segment_id"):
+            entry.setdefault("actions", []).extend(new_entry.get("actions", []))
+            entry["status"] = new_entry.get("status", entry.get("status"))
+            entry["handoff"] = new_entry.get("handoff", entry.get("handoff", {}))
+            entry["updated_at"] = new_entry["updated_at"]
+            break
+    else:
+        queue.append(new_entry)
+    state["pending_segment_updates"] = queue.copy()
+    state["has_pending_segment_updates"] = True
+
+
+def make_update(step: int, segments: int) -> dict:
+    return {
+        "segment_id": f"segment_{step % segments:05d}",
+        "status": "updated",
+        "actions": [{"type": "rewrite_segment", "result": {"content": f"Edit {step} of the paragraph."}}],
+        "handoff": {"needs_review": False, "comments": []},
+        "updated_at": None,
+    }
+
+
+def run(enqueue, steps: int, segments: int):
+    state = State({}, {})
+    start = time.perf_counter()
+    for step in range(steps - 1):
+        enqueue(state, make_update(step, segments))
+    total_ms = (time.perf_counter() - start) * 1000
+    delta = {}
+    enqueue(State(state._value, delta), make_update(steps - 1, segments))
+    return total_ms, len(json.dumps(delta)) / 1024, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pending segment update queueing")
+    parser.add_argument("--steps", default="500,2000,8000", help="Comma-separated session lengths (updates)")
+    parser.add_argument("--segments", type=int, default=400, help="Distinct segments edited")
+    args = parser.parse_args()
+
+    print(f"{'steps':>7} {'list ms':>9} {'keyed ms':>9} {'speedup':>8} {'list delta KB':>14} "
+          f"{'keyed delta KB':>15} {'poll ms':>8}")
+    for steps in (int(s) for s in args.steps.split(",")):
+        list_ms, list_kb, _ = run(enqueue_list, steps, args.segments)
+        keyed_ms, keyed_kb, state = run(enqueue_update, steps, args.segments)
+        start = time.perf_counter()
+        list_pending_updates(state, since=steps - 50)
+        poll_ms = (time.perf_counter() - start) * 1000
+        print(f"{steps:>7} {list_ms:>9.1f} {keyed_ms:>9.1f} {list_ms / keyed_ms:>7.1f}x {list_kb:>14.1f} "
+              f"{keyed_kb:>15.2f} {poll_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
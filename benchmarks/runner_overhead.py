@@ -0,0 +1,79 @@
+"""
+Per-request orchestration overhead of process_article: fresh Runner vs pool.
+
+Both variants go through process_article with a zero-latency stub model, so
+the numbers are pure setup + event-loop overhead. "before" hands every
+request a brand-new RunnerPool, i.e. a fresh InMemorySessionService and
+Runner (the original process_article behaviour); "after" reuses one pool.
+
+Usage:
+    python -m benchmarks.runner_overhead [-n 200]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import statistics
+import time
+
+from ai_journalist.agent import root_agent
+from ai_journalist.runner import process_article
+from ai_journalist.runner_pool import RunnerPool
+from benchmarks.stub_model import install_stub_model
+
+
+def run_fresh(message: str) -> None:
+    """One request the old way: session service and Runner built from scratch."""
+    process_article(message, pool=RunnerPool())
+
+
+def run_pooled(message: str, pool: RunnerPool) -> None:
+    """One request through process_article with a shared pool."""
+    process_article(message, pool=pool)
+
+
+def measure(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<8} mean {statistics.mean(timings):7.2f} ms   "
+          f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark runner setup overhead per request")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Requests per variant")
+    args = parser.parse_args()
+
+    # ADK logs a deprecation warning for every *_sync session call
+    logging.disable(logging.WARNING)
+    install_stub_model(root_agent)
+    message = "Tighten this paragraph."
+    pool = RunnerPool()
+
+    # Warm imports and lazy clients before timing either variant
+    measure(lambda: run_fresh(message), 5)
+    measure(lambda: run_pooled(message, pool), 5)
+
+    before = measure(lambda: run_fresh(message), args.iterations)
+    after = measure(lambda: run_pooled(message, pool), args.iterations)
+
+    print(f"Requests per variant: {args.iterations}")
+    report("before", before)
+    report("after", after)
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"Saved per request: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
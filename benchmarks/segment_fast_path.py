@@ -0,0 +1,97 @@
+"""
+Block rewrite through the root agent vs directly on segment_editor.
+
+"root" is the /api/v1/rewrite-block route: process_article wraps the
+rewrite prompt, journalist_agent calls AgentTool(segment_editor), then
+answers with the tool result. "direct" is /api/v1/rewrite-block/direct:
+edit_segment sends a SegmentEditorInput straight to segment_editor. Both
+use stub models with the same per-call latency, so the difference is
+model round-trips, prompt size and orchestration.
+
+Prompt tokens are approximated as prompt UTF-8 bytes / 4, including system
+instructions and tool declarations.
+
+Usage:
+    python -m benchmarks.segment_fast_path [-n 20] [--latency-ms 200]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import statistics
+import time
+
+from ai_journalist.agent import root_agent
+from ai_journalist.prompts import build_rewrite_prompt
+from ai_journalist.runner import process_article
+from ai_journalist.runner_pool import RunnerPool
+from ai_journalist.segment_editing import build_segment_editor_input, edit_segment
+from ai_journalist.sub_agents.segment_editor.agent import segment_editor
+from benchmarks.stub_model import stub_llm
+
+CONTENT = (
+    "The council met on Tuesday evening and, after a long and at times heated "
+    "discussion that ran well past the scheduled hour, decided to postpone the vote."
+)
+CONTEXT = "Residents had gathered outside the town hall since the afternoon."
+INSTRUCTION = "Tighten this paragraph"
+EDITED = "After a heated debate on Tuesday, the council postponed the vote."
+
+
+def measure(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the direct segment_editor fast path")
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="Requests per route")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Simulated latency of each model call")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    editor_input = build_segment_editor_input(CONTENT, INSTRUCTION, CONTEXT, block_id="block_demo")
+    editor_reply = {
+        "segment_id": "block_demo",
+        "status": "updated",
+        "actions": [{"type": "tighten", "result": {"content": EDITED}}],
+    }
+    latency_s = args.latency_ms / 1000
+    editor_model = stub_llm(reply=json.dumps(editor_reply), latency_s=latency_s)
+    root_model = stub_llm(
+        reply=EDITED,
+        latency_s=latency_s,
+        tool_call=segment_editor.name,
+        tool_args=editor_input.model_dump(exclude_none=True),
+    )
+    segment_editor.model = editor_model
+    root_agent.model = root_model
+    pool = RunnerPool()
+    prompt = build_rewrite_prompt(CONTENT, INSTRUCTION, CONTEXT)
+
+    routes = {
+        "root": lambda: process_article(prompt, pool=pool),
+        "direct": lambda: edit_segment(editor_input, pool=pool),
+    }
+    print(f"Requests per route: {args.iterations}, model latency {args.latency_ms:.0f} ms/call")
+    print(f"{'route':<8} {'p50 ms':>9} {'mean ms':>9} {'calls/req':>10} {'prompt tok/req':>15}")
+    for name, fn in routes.items():
+        measure(fn, 2)
+        editor_model.reset_counters()
+        root_model.reset_counters()
+        timings = measure(fn, args.iterations)
+        calls = (editor_model.calls + root_model.calls) / args.iterations
+        tokens = (editor_model.prompt_tokens + root_model.prompt_tokens) / args.iterations
+        print(f"{name:<8} {statistics.median(timings):>9.1f} {statistics.mean(timings):>9.1f} "
+              f"{calls:>10.1f} {tokens:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Offline stand-in for Gemini used by the benchmarks.
+
+`stub_llm()` builds a `LocalLlm` (see ai_journalist/model_backend.py) whose
+script answers every request with a fixed text reply, optionally after
+calling one tool first. Latency, streamed partial chunks and the
+`calls` / `prompt_tokens` counters come from `LocalLlm`, so benchmarks and
+`AI_MODEL_BACKEND=local` load tests run the same model code.
+"""
+
+from typing import Optional
+
+from google.adk.tools.agent_tool import AgentTool
+
+from ai_journalist.model_backend import LocalLlm
+
+
+def stub_llm(
+    reply: str = 'Stub response.',
+    latency_s: float = 0.0,
+    tool_call: Optional[str] = None,
+    tool_args: Optional[dict] = None,
+) -> LocalLlm:
+    """
+    `LocalLlm` that always replies with `reply` after `latency_s` seconds.
+
+    Args:
+        reply: Text of every final answer
+        latency_s: Delay before each model call
+        tool_call: Call this tool (with `tool_args`) first, then reply once
+            its result is back
+        tool_args: Arguments of the tool call
+    """
+    if tool_call:
+        script = [
+            {'after_tool': tool_call, 'reply': reply},
+            {'function_call': {'name': tool_call, 'args': tool_args or {}}},
+        ]
+    else:
+        script = [{'reply': reply}]
+    return LocalLlm(latency_s=latency_s, script=script)
+
+
+def install_stub_model(agent, **kwargs) -> None:
+    """Point `agent`, its sub-agents and the agents behind its `AgentTool`s at stub models."""
+    agent.model = stub_llm(**kwargs)
+    for sub_agent in getattr(agent, 'sub_agents', []):
+        install_stub_model(sub_agent, **kwargs)
+    for tool in getattr(agent, 'tools', []):
+        if isinstance(tool, AgentTool):
+            install_stub_model(tool.agent, **kwargs)
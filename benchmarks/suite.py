@@ -0,0 +1,327 @@
+"""
+Benchmark suite: markup, agent orchestration and HTTP throughput, saved as JSON.
+
+Three groups, all offline (agents run on `LocalLlm`, see
+ai_journalist/model_backend.py):
+
+    markup         `markup_article_blocks` on the real ai_journalist/article.md
+                   and synthetic 100 KB / 1 MB / 10 MB articles (ms, MB/s)
+    orchestration  `process_article` (root agent + segment_editor tool call)
+                   and `edit_segment` with a zero-latency model: pure
+                   Runner/agent overhead per request (ms)
+    http           concurrent load on every /api/v1/* route of a real server
+                   (Flask or ASGI) on localhost: p50/p95/p99 latency and
+                   requests/sec; the response cache is bypassed
+
+Results go to `benchmarks/results/<commit>.json` (or `--output`).
+`--compare` prints the change of every number against an earlier file, so
+runs from two commits can be diffed.
+
+Usage:
+    python -m benchmarks.suite [--only markup,orchestration,http]
+        [--server flask|asgi] [--concurrency 8] [--requests 200]
+        [--latency-ms 0] [--output FILE] [--compare OLD.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from ai_journalist.agent import root_agent
+from ai_journalist.llm_scheduler import scheduled
+from ai_journalist.model_backend import LocalLlm
+from ai_journalist.prompts import build_rewrite_prompt
+from ai_journalist.runner import process_article
+from ai_journalist.runner_pool import RunnerPool
+from ai_journalist.segment_editing import build_segment_editor_input, edit_segment
+from ai_journalist.sub_agents.segment_editor.agent import segment_editor
+from ai_journalist.tools.markup_blocks import markup_article_blocks
+from benchmarks.markup_throughput import synthetic_article
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+REAL_ARTICLE = Path(__file__).parent.parent / 'ai_journalist' / 'article.md'
+
+CONTENT = (
+    "The council met on Tuesday evening and, after a really long and at times heated "
+    "discussion that ran well past the scheduled hour, decided to postpone the vote."
+)
+CONTEXT = "Residents had gathered outside the town hall since the afternoon."
+INSTRUCTION = "Tighten this paragraph"
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(timings_ms: list) -> dict:
+    return {
+        'n': len(timings_ms),
+        'p50_ms': round(percentile(timings_ms, 50), 3),
+        'p95_ms': round(percentile(timings_ms, 95), 3),
+        'p99_ms': round(percentile(timings_ms, 99), 3),
+        'mean_ms': round(statistics.mean(timings_ms), 3) if timings_ms else 0.0,
+    }
+
+
+def measure(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def install_local_model(latency_s: float) -> None:
+    root_agent.model = scheduled(LocalLlm(latency_s=latency_s))
+    segment_editor.model = scheduled(LocalLlm(latency_s=latency_s))
+
+
+def bench_markup(iterations: int) -> list:
+    articles = [('real article.md', REAL_ARTICLE.read_text(encoding='utf-8'))]
+    for label, size in (('synthetic 100 KB', 100 * 1024), ('synthetic 1 MB', 1024 * 1024),
+                        ('synthetic 10 MB', 10 * 1024 * 1024)):
+        articles.append((label, synthetic_article(size)))
+
+    results = []
+    for label, content in articles:
+        megabytes = len(content.encode('utf-8')) / (1024 * 1024)
+        # Fewer repeats on the huge article; the median is stable enough
+        runs = iterations if megabytes < 5 else max(1, iterations // 10)
+        timings = measure(lambda: markup_article_blocks(content), runs)
+        stats = summarize(timings)
+        results.append({
+            'article': label,
+            'bytes': len(content.encode('utf-8')),
+            'blocks': markup_article_blocks(content)['total_blocks'],
+            'mb_per_s': round(megabytes / (stats['p50_ms'] / 1000), 2),
+            **stats,
+        })
+    return results
+
+
+def bench_orchestration(iterations: int) -> dict:
+    pool = RunnerPool()
+    prompt = build_rewrite_prompt(CONTENT, INSTRUCTION, CONTEXT)
+    editor_input = build_segment_editor_input(CONTENT, INSTRUCTION, CONTEXT, block_id='block_bench', kind='tighten')
+    routes = {
+        'process_article': lambda: process_article(prompt, pool=pool),
+        'edit_segment': lambda: edit_segment(editor_input, pool=pool),
+    }
+    results = {}
+    for name, fn in routes.items():
+        measure(fn, 3)
+        results[name] = summarize(measure(fn, iterations))
+    return results
+
+
+def http_scenarios() -> list:
+    """(route, body) pairs exercising every /api/v1/* route."""
+    document = REAL_ARTICLE.read_text(encoding='utf-8')
+    rewrite = {'blockId': 'block_bench', 'content': CONTENT, 'instruction': INSTRUCTION, 'context': CONTEXT}
+    insert = {'insertAfter': 'block_bench', 'instruction': 'Add a closing line', 'context': CONTEXT}
+    chat = {'documentContent': document, 'message': 'Improve the opening'}
+    return [
+        ('/api/v1/rewrite-block', rewrite),
+        ('/api/v1/rewrite-block/stream', rewrite),
+        ('/api/v1/rewrite-block/direct', {**rewrite, 'kind': 'tighten'}),
+        ('/api/v1/rewrite-blocks', {'instruction': INSTRUCTION, 'items': [
+            {'blockId': f'block_{i}', 'content': f'{CONTENT} ({i})'} for i in range(4)]}),
+        ('/api/v1/insert-block', insert),
+        ('/api/v1/insert-block/stream', insert),
+        ('/api/v1/chat', chat),
+        ('/api/v1/chat/stream', chat),
+        ('/api/v1/improve-article', {'documentId': 'doc-bench', 'content': document}),
+    ]
+
+
+@contextlib.contextmanager
+def serve(server: str):
+    """Run the Flask or ASGI app on a free localhost port; yields the base URL."""
+    if server == 'asgi':
+        import socket
+        import uvicorn
+        from ai_journalist.asgi_server import app
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        uv_server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+        thread = threading.Thread(target=uv_server.run, daemon=True)
+        thread.start()
+        while not uv_server.started:
+            time.sleep(0.01)
+        try:
+            yield f'http://127.0.0.1:{port}'
+        finally:
+            uv_server.should_exit = True
+            thread.join()
+    else:
+        from werkzeug.serving import make_server
+        from ai_journalist.api_server import app
+
+        wsgi_server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=wsgi_server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f'http://127.0.0.1:{wsgi_server.server_port}'
+        finally:
+            wsgi_server.shutdown()
+            thread.join()
+
+
+def post(url: str, body: bytes) -> float:
+    """POST `body`, read the whole response; returns the latency in ms."""
+    request = urllib.request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-Cache-Bypass': '1',
+    })
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{url}: HTTP {response.status}")
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_http(server: str, requests: int, concurrency: int) -> list:
+    results = []
+    with serve(server) as base_url:
+        for route, body in http_scenarios():
+            url, payload = base_url + route, json.dumps(body).encode('utf-8')
+            post(url, payload)
+            errors = 0
+            timings = []
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for future in [executor.submit(post, url, payload) for _ in range(requests)]:
+                    try:
+                        timings.append(future.result())
+                    except Exception:
+                        errors += 1
+            elapsed = time.perf_counter() - start
+            results.append({
+                'route': route,
+                'server': server,
+                'concurrency': concurrency,
+                'errors': errors,
+                'rps': round(len(timings) / elapsed, 2),
+                **summarize(timings),
+            })
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Numbers worth comparing between runs (counts and settings are skipped)
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'rps', 'mb_per_s')
+
+
+def flatten(results: dict) -> dict:
+    """`{'group label metric': number}` for every compared metric in a results file."""
+    flat = {}
+    for group, value in results.items():
+        rows = value.items() if isinstance(value, dict) else (
+            (row.get('article') or row.get('route'), row) for row in value)
+        for label, row in rows:
+            for metric in COMPARED_METRICS:
+                if metric in row:
+                    flat[f'{group} {label} {metric}'] = row[metric]
+    return flat
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print every metric present in both runs with its relative change."""
+    old_flat, new_flat = flatten(old['results']), flatten(new['results'])
+    print(f"\nvs {old['meta']['commit']} ({old['meta']['timestamp']}):")
+    print(f"{'metric':<60} {'old':>12} {'new':>12} {'change':>9}")
+    for key, value in new_flat.items():
+        if key not in old_flat:
+            continue
+        before = old_flat[key]
+        change = f"{(value - before) / before * 100:+.1f}%" if before else 'n/a'
+        print(f"{key:<60} {before:>12} {value:>12} {change:>9}")
+
+
+def print_results(results: dict) -> None:
+    for row in results.get('markup', []):
+        print(f"markup  {row['article']:<18} {row['blocks']:>8} blocks  p50 {row['p50_ms']:>10.2f} ms  "
+              f"{row['mb_per_s']:>8.1f} MB/s")
+    for name, row in results.get('orchestration', {}).items():
+        print(f"orch    {name:<18} p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms")
+    for row in results.get('http', []):
+        print(f"http    {row['route']:<30} {row['rps']:>8.1f} req/s  p50 {row['p50_ms']:>8.1f}  "
+              f"p95 {row['p95_ms']:>8.1f}  p99 {row['p99_ms']:>8.1f} ms  errors {row['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AI service benchmark suite")
+    parser.add_argument("--only", default="markup,orchestration,http", help="Comma-separated groups to run")
+    parser.add_argument("-n", "--iterations", type=int, default=50, help="Runs per markup/orchestration case")
+    parser.add_argument("--server", choices=("flask", "asgi"), default="flask", help="Server for the HTTP group")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per HTTP route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent HTTP clients")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated latency of each model call")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    install_local_model(args.latency_ms / 1000)
+    groups = set(args.only.split(","))
+
+    results = {}
+    if 'markup' in groups:
+        results['markup'] = bench_markup(args.iterations)
+    if 'orchestration' in groups:
+        results['orchestration'] = bench_orchestration(args.iterations)
+    if 'http' in groups:
+        results['http'] = bench_http(args.server, args.requests, args.concurrency)
+
+    commit = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    print_results(results)
+    print(f"\nSaved {output}")
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding='utf-8')), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Shared setup: every test runs offline on the local model backend, with the
+response cache in memory only and no rate limit.
+"""
+
+import logging
+import os
+
+os.environ['AI_MODEL_BACKEND'] = 'local'
+os.environ['AI_LLM_RPM'] = '0'
+os.environ.pop('AI_CACHE_DB_PATH', None)
+os.environ.pop('AI_SESSION_DB_PATH', None)
+os.environ.pop('AI_LAZY_INIT', None)
+
+logging.disable(logging.WARNING)
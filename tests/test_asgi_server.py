@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import httpx
+
+from ai_journalist import asgi_server
+from ai_journalist.cache import ResponseCache, get_or_run_async
+
+
+def test_slow_request_parsing_does_not_block_the_event_loop(monkeypatch):
+    def slow_context(data, *args):
+        time.sleep(0.5)
+        return ''
+
+    async def fake_agent(prompt, document_id=None, block_id=None, **kwargs):
+        return {'status': 'success', 'response': 'Rewritten.', 'tokens_used': 1}
+
+    monkeypatch.setattr(asgi_server, 'request_context', slow_context)
+    monkeypatch.setattr(asgi_server, 'run_agent', fake_agent)
+    monkeypatch.setattr(asgi_server, 'is_warm', lambda: True)
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            rewrite = asyncio.create_task(client.post(
+                '/api/v1/rewrite-block',
+                json={'blockId': 'b1', 'content': 'Slow text.', 'instruction': 'fix'},
+                headers={'X-Cache-Bypass': '1'},
+            ))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            health = await client.get('/health')
+            health_seconds = time.perf_counter() - started
+            return (await rewrite), health, health_seconds
+
+    rewrite, health, health_seconds = asyncio.run(main())
+    assert rewrite.status_code == 200
+    assert health.status_code == 200
+    assert health_seconds < 0.3
+
+
+def test_sqlite_tier_is_used_off_the_event_loop(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / 'cache.db'))
+    runs = []
+
+    async def run():
+        runs.append(1)
+        return {'status': 'success', 'response': 'ok', 'tokens_used': 3}
+
+    async def main():
+        first = await get_or_run_async(cache, 'key', run)
+        cache._memory.clear()  # force the disk tier
+        second = await get_or_run_async(cache, 'key', run)
+        return first, second
+
+    (first, first_status), (second, second_status) = asyncio.run(main())
+    assert (first_status, second_status) == ('MISS', 'HIT')
+    assert second['response'] == 'ok'
+    assert len(runs) == 1
+    assert cache.disk_hits == 1
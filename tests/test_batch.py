@@ -0,0 +1,95 @@
+import asyncio
+import re
+import threading
+
+import pytest
+
+from ai_journalist import batch
+from ai_journalist.cache import ResponseCache
+from ai_journalist.tools.markup_blocks import parse_article_blocks
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(batch, 'get_response_cache', lambda: cache)
+    return cache
+
+
+def test_items_keep_block_identity_and_document_neighbors():
+    article = 'First.\n\nSecond.\n\nThird.'
+    blocks, _ = parse_article_blocks(article)
+    items, document_id, max_parallel = batch.parse_batch_request({
+        'documentId': 'doc-1',
+        'instruction': 'Tighten',
+        'maxParallel': 1000,
+        'documentContent': article,
+        'items': [{'blockId': blocks[1]['id'], 'content': 'Second.'}, {'blockId': 'x', 'content': 'Loose.', 'context': 'ctx'}],
+    })
+    assert document_id == 'doc-1'
+    assert max_parallel == batch.BATCH_PARALLELISM
+    assert items[0]['blockType'] == 'paragraph'
+    assert items[0]['neighbors'].previous.content == 'First.'
+    assert items[0]['neighbors'].next.content == 'Third.'
+    assert items[1]['neighbors'] is None
+    assert items[1]['context'] == 'ctx'
+
+
+def test_batch_runs_segment_edits_with_block_ids():
+    seen = []
+
+    async def run_edit(editor_input):
+        seen.append(editor_input)
+        return {'status': 'success', 'response': editor_input.segment.content.upper(), 'tokens_used': 2,
+                'segment_update': {'segment_id': editor_input.segment.id}}
+
+    items, _, _ = batch.parse_batch_request({
+        'instruction': 'Shout',
+        'items': [{'blockId': 'a', 'content': 'one'}, {'blockId': 'b', 'content': 'two'}, {'blockId': 'c'}],
+    })
+    body = asyncio.run(batch.rewrite_blocks_async(items, max_parallel=2, run_edit=run_edit))
+
+    assert sorted(editor_input.segment.id for editor_input in seen) == ['a', 'b']
+    assert [r['blockId'] for r in body['results']] == ['a', 'b', 'c']
+    assert body['results'][0]['newContent'] == 'ONE'
+    assert body['results'][0]['segmentUpdate'] == {'segment_id': 'a'}
+    assert body['results'][2]['status'] == 'error'
+    assert (body['succeeded'], body['failed'], body['tokensUsed']) == (2, 1, 4)
+
+
+def test_blocking_variant_uses_threads_not_an_event_loop(monkeypatch):
+    import ai_journalist.segment_editing as segment_editing
+
+    def edit_segment(editor_input):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return {'status': 'success', 'response': editor_input.segment.id, 'tokens_used': 1,
+                'thread': threading.current_thread().name}
+
+    monkeypatch.setattr(segment_editing, 'edit_segment', edit_segment)
+    items, _, _ = batch.parse_batch_request({
+        'instruction': 'Fix',
+        'items': [{'blockId': f'b{i}', 'content': f'text {i}'} for i in range(4)],
+    })
+    body = batch.rewrite_blocks(items, max_parallel=2)
+
+    assert [r['newContent'] for r in body['results']] == ['b0', 'b1', 'b2', 'b3']
+    assert body['succeeded'] == 4
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'items': [{'blockId': 'a', 'content': 'x'}, 'b'], 'instruction': 'fix'}, "'items[1]' must be an object"),
+    ({'items': [None]}, "'items[0]' must be an object"),
+    ({'items': [{'blockId': 'a'}], 'maxParallel': 'many'}, "'maxParallel' must be a number"),
+    ({'items': [{'blockId': 'a'}], 'maxParallel': [2]}, "'maxParallel' must be a number"),
+])
+def test_malformed_bodies_are_validation_errors(body, message):
+    with pytest.raises(batch.BatchValidationError, match=re.escape(message)):
+        batch.parse_batch_request(body)
+
+
+def test_flask_route_answers_malformed_items_with_400():
+    from ai_journalist.api_server import app
+
+    response = app.test_client().post('/api/v1/rewrite-blocks', json={'items': ['b'], 'instruction': 'fix'})
+    assert response.status_code == 400
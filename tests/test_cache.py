@@ -0,0 +1,149 @@
+import asyncio
+import threading
+
+import pytest
+
+from ai_journalist import cache as cache_module
+from ai_journalist.cache import ResponseCache, get_or_run, get_or_run_async, response_cache_key
+from ai_journalist.responses import rewrite_block_response
+
+
+@pytest.fixture(autouse=True)
+def fixed_model(monkeypatch):
+    monkeypatch.setattr(cache_module, '_model_name', lambda: 'test-model')
+
+
+def test_key_ignores_line_endings_and_trailing_whitespace():
+    assert (response_cache_key('rewrite', 'Text  \r\nmore\n', 'Fix', '', 'doc', 'b1')
+            == response_cache_key('rewrite', 'Text\nmore', 'Fix ', None, 'doc', 'b1'))
+
+
+@pytest.mark.parametrize('other', [
+    ('insert', 'Text', 'Fix', '', 'doc', 'b1'),
+    ('rewrite', 'Text', 'Fix', 'ctx', 'doc', 'b1'),
+    ('rewrite', 'Text', 'Fix', '', 'other-doc', 'b1'),
+    ('rewrite', 'Text', 'Fix', '', 'doc', 'b2'),
+    ('rewrite', 'Text', 'Fix', '', None, None),
+])
+def test_key_separates_kind_context_document_and_block(other):
+    assert response_cache_key('rewrite', 'Text', 'Fix', '', 'doc', 'b1') != response_cache_key(*other)
+
+
+def test_hit_reports_no_tokens_and_a_cached_flag():
+    cache = ResponseCache()
+    runs = []
+
+    def run():
+        runs.append(1)
+        return {'status': 'success', 'response': 'New text', 'tokens_used': 42}
+
+    first, first_status = get_or_run(cache, 'key', run)
+    second, second_status = get_or_run(cache, 'key', run)
+
+    assert (first_status, second_status) == ('MISS', 'HIT')
+    assert len(runs) == 1
+    assert rewrite_block_response(first, 'b1', 'Fix')['tokensUsed'] == 42
+    assert rewrite_block_response(first, 'b1', 'Fix')['cached'] is False
+    body = rewrite_block_response(second, 'b1', 'Fix')
+    assert (body['newContent'], body['tokensUsed'], body['cached']) == ('New text', 0, True)
+
+
+def test_failures_are_not_cached():
+    cache = ResponseCache()
+    get_or_run(cache, 'key', lambda: {'status': 'error', 'error': 'quota'})
+    assert cache.get('key') is None
+
+
+def test_bypass_skips_the_lookup_but_stores_the_result():
+    cache = ResponseCache()
+    cache.set('key', {'response': 'old', 'tokens_used': 1})
+    result, status = get_or_run(cache, 'key', lambda: {'status': 'success', 'response': 'new'}, bypass=True)
+    assert (result['response'], status) == ('new', 'BYPASS')
+    assert cache.get('key')['response'] == 'new'
+
+
+def test_expired_entries_and_lru_eviction():
+    cache = ResponseCache(max_entries=2, ttl_seconds=-1)
+    cache.set('old', {'response': 'x'})
+    assert cache.get('old') is None
+
+    cache = ResponseCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, {'response': key})
+    assert cache.get('a') is None
+    assert cache.get('c') == {'response': 'c'}
+
+
+def test_concurrent_misses_share_one_run():
+    cache = ResponseCache()
+    started, release = threading.Event(), threading.Event()
+    runs, results = [], []
+
+    def run():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {'status': 'success', 'response': 'shared', 'tokens_used': 7}
+
+    shared_before = cache_module.get_single_flight().shared
+    leader = threading.Thread(target=lambda: results.append(get_or_run(cache, 'flight-key', run)))
+    leader.start()
+    started.wait(5)
+    # A follower that misses the cache while the leader runs
+    cache.clear()
+    follower = threading.Thread(target=lambda: results.append(get_or_run(None, 'flight-key', run)))
+    follower.start()
+    while cache_module.get_single_flight().shared == shared_before and follower.is_alive():
+        follower.join(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(runs) == 1
+    by_status = {status: result for result, status in results}
+    assert by_status['MISS']['tokens_used'] == 7
+    assert by_status['COALESCED']['tokens_used'] == 0
+    assert by_status['COALESCED']['cached'] is True
+
+
+def test_concurrent_async_misses_share_one_run():
+    runs = []
+
+    async def run():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {'status': 'success', 'response': 'shared', 'tokens_used': 5}
+
+    async def main():
+        return await asyncio.gather(*(get_or_run_async(None, 'async-flight-key', run) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert sorted(status for _, status in results) == ['BYPASS', 'COALESCED', 'COALESCED']
+    assert sum(result['tokens_used'] for result, _ in results) == 5
+
+
+def test_expired_sqlite_rows_are_swept_on_set(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'cache.db')
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: clock[0])
+    cache = ResponseCache(ttl_seconds=10, db_path=db_path, sweep_seconds=60)
+
+    def rows():
+        return [key for (key,) in cache._db.execute("SELECT key FROM responses ORDER BY key")]
+
+    cache.set('old', {'response': 'a'})
+    clock[0] += 30
+    cache.set('within-interval', {'response': 'b'})
+    assert rows() == ['old', 'within-interval']  # next sweep not due yet
+
+    clock[0] += 31
+    cache.set('new', {'response': 'c'})
+    assert rows() == ['new']
+    assert cache.stats()['expiredDeleted'] == 2
+
+    # Another process's expired rows go on its first write
+    clock[0] += 11
+    other = ResponseCache(ttl_seconds=10, db_path=db_path)
+    other.set('fresh', {'response': 'd'})
+    assert rows() == ['fresh']
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ai_journalist.context_builder import CONTEXT_TOKEN_BUDGET, estimate_tokens, segment_window
+from ai_journalist.document_cache import get_document_cache
+from ai_journalist.tools.memory import (
+    ARTICLE_SEGMENTS_KEY, DOCUMENT_ID_KEY, SEGMENT_WINDOW_KEY, SELECTED_BLOCK_KEY,
+    fetch_article_segments, load_context,
+)
+
+# 30 paragraphs of about 250 estimated tokens each, so a window holds a handful
+ARTICLE = '# Title\n\n' + '\n\n'.join(f'Paragraph {i} ' + 'word ' * 200 for i in range(30))
+
+
+class CountingState(dict):
+    """Session state stand-in that counts writes."""
+
+    writes = 0
+
+    def __setitem__(self, key, value):
+        self.writes += 1
+        super().__setitem__(key, value)
+
+
+@pytest.fixture
+def document():
+    cache = get_document_cache()
+    yield cache.put('window-doc', ARTICLE)
+    cache.drop('window-doc')
+
+
+def blocks_of(*sizes):
+    return [{'id': f'b{i}', 'content': 'x' * (4 * size)} for i, size in enumerate(sizes)]
+
+
+def test_segment_window_grows_alternately_around_the_target():
+    blocks = blocks_of(10, 10, 10, 10, 10, 10, 10)
+    # Target plus two neighbors on each side: 10 + 4 * (10 + 1) = 54 tokens
+    assert segment_window(blocks, 3, budget=54) == (1, 6)
+    assert segment_window(blocks, 3, budget=53) == (1, 5)
+
+
+def test_segment_window_always_includes_the_target():
+    blocks = blocks_of(10, 500, 10)
+    assert segment_window(blocks, 1, budget=100) == (1, 2)
+    assert segment_window(blocks, 99, budget=100) == (2, 3)
+    assert segment_window([], 0) == (0, 0)
+
+
+def test_segment_window_stops_at_the_first_neighbor_that_does_not_fit():
+    # The window stays contiguous and balanced: a big block on one side ends it
+    blocks = blocks_of(10, 100, 10, 10, 10)
+    assert segment_window(blocks, 2, budget=40) == (2, 3)
+    assert segment_window(blocks, 3, budget=40) == (2, 5)
+
+
+def test_load_context_writes_the_window_around_the_selected_block(document):
+    target = document.blocks[15]
+    state = CountingState({DOCUMENT_ID_KEY: 'window-doc', SELECTED_BLOCK_KEY: target['id']})
+    load_context(SimpleNamespace(state=state))
+
+    segments = state[ARTICLE_SEGMENTS_KEY]
+    window = state[SEGMENT_WINDOW_KEY]
+    assert target['id'] in [segment['id'] for segment in segments]
+    assert 1 < len(segments) < len(document.blocks)
+    assert sum(estimate_tokens(segment['content']) for segment in segments) <= CONTEXT_TOKEN_BUDGET
+    assert (window['start'], window['end'], window['total_blocks']) == (
+        segments[0]['position'], segments[-1]['position'] + 1, len(document.blocks))
+    assert 'line_start' not in segments[0]
+
+
+def test_load_context_writes_only_when_the_window_moves(document):
+    state = CountingState({DOCUMENT_ID_KEY: 'window-doc', SELECTED_BLOCK_KEY: document.blocks[5]['id']})
+    context = SimpleNamespace(state=state)
+    load_context(context)
+    writes = state.writes
+
+    load_context(context)
+    assert state.writes == writes
+
+    state[SELECTED_BLOCK_KEY] = document.blocks[25]['id']
+    load_context(context)
+    assert document.blocks[25]['id'] in [segment['id'] for segment in state[ARTICLE_SEGMENTS_KEY]]
+
+    writes = state.writes
+    get_document_cache().put('window-doc', ARTICLE + '\n\nOne more paragraph.')
+    load_context(context)
+    assert state.writes > writes
+    assert state[SEGMENT_WINDOW_KEY]['document_version'] == 2
+
+
+def test_load_context_without_a_stored_document_leaves_an_empty_window():
+    state = {DOCUMENT_ID_KEY: 'unknown-doc'}
+    load_context(SimpleNamespace(state=state))
+    assert state == {DOCUMENT_ID_KEY: 'unknown-doc', ARTICLE_SEGMENTS_KEY: []}
+
+
+def test_fetch_article_segments_by_id_and_by_position(document):
+    context = SimpleNamespace(state={DOCUMENT_ID_KEY: 'window-doc'})
+    wanted = [document.blocks[2]['id'], document.blocks[28]['id']]
+    by_id = fetch_article_segments(context, block_ids=wanted)
+    assert [segment['id'] for segment in by_id['segments']] == wanted
+
+    page = fetch_article_segments(context, start=10, limit=500)
+    assert page['segments'][0]['position'] == 10
+    assert len(page['segments']) == len(document.blocks) - 10
+    assert page['total_blocks'] == len(document.blocks)
+
+    missing = fetch_article_segments(SimpleNamespace(state={}))
+    assert missing['status'] == 'error'
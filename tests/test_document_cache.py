@@ -0,0 +1,62 @@
+import pytest
+
+from ai_journalist.document_cache import DocumentCache, DocumentDeltaError, InvalidDeltaError
+
+ARTICLE = '# Title\n\nFirst paragraph.\n\nSecond paragraph.'
+
+
+@pytest.fixture
+def cache():
+    cache = DocumentCache()
+    cache.put('doc', ARTICLE)
+    return cache
+
+
+def test_delta_ops_replace_insert_and_delete(cache):
+    blocks = cache.get('doc').blocks
+    document = cache.apply_delta('doc', 1, [
+        {'op': 'replace', 'blockId': blocks[1]['id'], 'content': 'First, rewritten.'},
+        {'op': 'insert', 'after': blocks[2]['id'], 'content': 'Third paragraph.'},
+        {'op': 'delete', 'blockId': blocks[0]['id']},
+    ])
+    assert document.version == 2
+    assert document.content == 'First, rewritten.\n\nSecond paragraph.\n\nThird paragraph.'
+    assert document.blocks[1]['id'] == blocks[2]['id']
+
+
+@pytest.mark.parametrize('ops', [
+    ['x'],
+    [None],
+    [{'op': 'replace', 'blockId': ['b'], 'content': 'x'}],
+    [{'op': 'insert', 'after': None, 'content': {'text': 'x'}}],
+    [{'op': 'move'}],
+    {'op': 'delete'},
+])
+def test_malformed_ops_are_invalid_deltas_and_leave_the_document(cache, ops):
+    with pytest.raises(InvalidDeltaError) as error:
+        cache.apply_delta('doc', 1, ops)
+    assert error.value.current_version == 1
+    assert error.value.status == 400
+    assert cache.get('doc').content == ARTICLE
+
+
+def test_unknown_blocks_and_stale_versions_are_conflicts(cache):
+    for version, ops in ((1, [{'op': 'delete', 'blockId': 'block_gone'}]), (0, [])):
+        with pytest.raises(DocumentDeltaError) as error:
+            cache.apply_delta('doc', version, ops)
+        assert error.value.status == 409
+        assert not isinstance(error.value, InvalidDeltaError)
+
+
+def test_chat_route_answers_malformed_ops_with_400():
+    from ai_journalist.api_server import app
+    from ai_journalist.document_cache import get_document_cache
+
+    get_document_cache().put('delta-doc', ARTICLE)
+    try:
+        response = app.test_client().post('/api/v1/chat', json={
+            'documentId': 'delta-doc', 'baseVersion': 1, 'documentDelta': ['x'], 'message': 'Hi',
+        })
+    finally:
+        get_document_cache().drop('delta-doc')
+    assert response.status_code == 400
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from ai_journalist.context_builder import document_blocks, request_context
+from ai_journalist.document_cache import get_document_cache, resolve_document_blocks
+from ai_journalist.document_content import document_markdown
+from ai_journalist.tools.markup_blocks import parse_article_blocks
+
+# DocumentContent as stored by the back-end; it sends JSON.stringify(content) as documentContent
+CONTENT = {
+    'blocks': [{
+        'type': 'tiptap',
+        'data': {'type': 'doc', 'content': [
+            {'type': 'heading', 'attrs': {'level': 1}, 'content': [{'type': 'text', 'text': 'Council vote'}]},
+            {'type': 'paragraph', 'content': [{'type': 'text', 'text': 'The council postponed the vote.'}]},
+            {'type': 'paragraph', 'content': [{'type': 'text', 'text': 'A new date is expected in May.'}]},
+        ]},
+    }],
+    'metadata': {'description': 'Local politics'},
+}
+MARKDOWN = '# Council vote\n\nThe council postponed the vote.\n\nA new date is expected in May.'
+
+
+@pytest.fixture
+def cached_document():
+    yield 'content-doc'
+    get_document_cache().drop('content-doc')
+
+
+def test_document_markdown_decodes_the_json_string():
+    assert document_markdown(json.dumps(CONTENT)) == MARKDOWN
+    assert document_markdown(MARKDOWN) == MARKDOWN
+    assert document_markdown('{not json') == '{not json'
+
+
+def test_cached_blocks_are_built_from_the_articles_text(cached_document):
+    blocks, version = resolve_document_blocks({'documentId': cached_document, 'documentContent': json.dumps(CONTENT)})
+    expected, _ = parse_article_blocks(MARKDOWN)
+    assert version == 1
+    assert [(b['id'], b['type'], b['content']) for b in blocks] == [
+        (b['id'], b['type'], b['content']) for b in expected]
+    assert get_document_cache().get(cached_document).content == MARKDOWN
+
+    # Re-sending the same document keeps the block IDs
+    again, _ = resolve_document_blocks({'documentId': cached_document, 'documentContent': json.dumps(CONTENT)})
+    assert [b['id'] for b in again] == [b['id'] for b in blocks]
+
+
+def test_uncached_requests_and_context_windows_decode_it_too():
+    payload = {'documentContent': json.dumps(CONTENT)}
+    blocks, version = resolve_document_blocks(payload)
+    assert version is None
+    assert [b['type'] for b in blocks] == ['heading_h1', 'paragraph', 'paragraph']
+    assert [b['content'] for b in document_blocks(payload)] == [b['content'] for b in blocks]
+
+    context = request_context({**payload, 'blockId': blocks[1]['id']})
+    assert context == '# Council vote\n\n[…the block being edited…]\n\nA new date is expected in May.'
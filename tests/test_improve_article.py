@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+import time
+
+from ai_journalist.improve_article import (
+    article_text,
+    improve_sections,
+    improve_sections_async,
+    rank_updates,
+    section_inputs,
+    split_sections,
+)
+from ai_journalist.tools.markup_blocks import parse_article_blocks
+
+# What back-end/src/ai/ai.service.ts sends: the stored DocumentContent as saved by asrp-editor
+BACKEND_PAYLOAD = {
+    'documentId': 'doc-1',
+    'content': {
+        'blocks': [{
+            'type': 'tiptap',
+            'data': {'type': 'doc', 'content': [
+                {'type': 'heading', 'attrs': {'level': 1}, 'content': [{'type': 'text', 'text': 'Council vote'}]},
+                {'type': 'paragraph', 'content': [
+                    {'type': 'text', 'text': 'The council '},
+                    {'type': 'text', 'text': 'postponed', 'marks': [{'type': 'bold'}]},
+                    {'type': 'text', 'text': ' the vote.'},
+                ]},
+                {'type': 'bulletList', 'content': [
+                    {'type': 'listItem', 'content': [{'type': 'paragraph', 'content': [{'type': 'text', 'text': 'Budget'}]}]},
+                ]},
+            ]},
+        }],
+        'metadata': {'html': '<h1>Stale</h1>', 'description': 'Local politics'},
+    },
+}
+
+
+def test_backend_document_content_is_unwrapped():
+    assert article_text(BACKEND_PAYLOAD) == '# Council vote\n\nThe council **postponed** the vote.\n\n- Budget'
+
+
+def test_document_content_sent_as_json_string():
+    assert article_text({'documentContent': json.dumps(BACKEND_PAYLOAD['content'])}).startswith('# Council vote')
+
+
+def test_metadata_html_then_text_when_blocks_are_empty():
+    html = {'blocks': [], 'metadata': {'html': '<h2>Lead</h2><p>First <em>line</em></p><ol><li>a</li><li>b</li></ol>'}}
+    assert article_text({'content': html}) == '## Lead\n\nFirst line\n\n1. a\n\n2. b'
+    assert article_text({'content': {'blocks': [{'type': 'tiptap', 'data': None}], 'metadata': {'text': 'Plain.'}}}) == 'Plain.'
+    assert article_text({'content': {'blocks': []}}) == ''
+
+
+def test_markdown_content_passes_through():
+    assert article_text({'content': '# Title\n\nBody.'}) == '# Title\n\nBody.'
+
+
+def test_sections_start_at_headings_and_respect_the_budget():
+    blocks, _ = parse_article_blocks('# One\n\nShort.\n\n---\n\n## Two\n\n' + 'word ' * 40 + '\n\n' + 'more ' * 40)
+    sections = split_sections(blocks, max_tokens=60)
+    assert [[block['type'] for block in section] for section in sections] == [
+        ['heading_h1', 'paragraph', 'horizontal_rule'],
+        ['heading_h2', 'paragraph'],
+        ['paragraph'],
+    ]
+    assert split_sections(parse_article_blocks('---')[0]) == []
+
+
+def test_section_inputs_carry_neighbors_and_low_priority():
+    blocks, _ = parse_article_blocks('# One\n\nFirst.\n\n## Two\n\nSecond.')
+    inputs = section_inputs(blocks, split_sections(blocks))
+    assert [editor_input.segment.id for editor_input in inputs] == [blocks[0]['id'], blocks[2]['id']]
+    assert inputs[0].neighbors.previous is None
+    assert inputs[0].neighbors.next.content == '## Two'
+    assert inputs[1].neighbors.previous.content == 'First.'
+
+
+def result(response, actions=(), status='updated', segment_id='s'):
+    return {'status': 'success', 'response': response, 'tokens_used': 1,
+            'segment_update': {'segment_id': segment_id, 'status': status, 'actions': list(actions)}}
+
+
+def test_updates_are_ranked_by_how_much_they_change():
+    blocks, _ = parse_article_blocks('Alpha beta gamma.\n\n# H\n\nDelta epsilon.\n\n# I\n\nZeta eta.\n\n# J\n\nTheta.')
+    inputs = section_inputs(blocks, split_sections(blocks))
+    ranked = rank_updates(inputs, [
+        result('Alpha beta gamma!', segment_id='small'),
+        result('ZZZZ!', segment_id='large'),
+        result(inputs[2].segment.content, actions=[{'type': 'fact_check'}], segment_id='note'),
+        result('Skipped.', status='skipped', segment_id='skipped'),
+    ])
+    assert [entry['segment_id'] for entry in ranked] == ['large', 'note', 'small']
+    assert ranked[0]['score'] > ranked[1]['score'] == 0.5 > ranked[2]['score'] > 0
+
+
+def test_improve_sections_runs_every_section_within_the_cap():
+    running, peak = 0, 0
+
+    async def run_edit(editor_input):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if editor_input.segment.content.startswith('# Broken'):
+            raise RuntimeError('model down')
+        return result(editor_input.segment.content.upper(), segment_id=editor_input.segment.id)
+
+    text = article_text(BACKEND_PAYLOAD) + '\n\n# Second\n\nMore.\n\n# Broken\n\nText.'
+    body = asyncio.run(improve_sections_async(text, max_parallel=2, run_edit=run_edit))
+    assert peak == 2
+    assert (body['sections'], body['failed'], len(body['updates'])) == (3, 1, 2)
+    assert body['status'] == 'success'
+    assert body['tokens_used'] == 2
+
+
+def test_blocking_improve_sections_runs_on_a_bounded_thread_pool():
+    running, peak, loops = 0, 0, []
+    lock = threading.Lock()
+
+    def run_edit(editor_input):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            asyncio.get_running_loop()
+            loops.append(editor_input.segment.id)
+        except RuntimeError:
+            pass
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return result(editor_input.segment.content.upper(), segment_id=editor_input.segment.id)
+
+    text = article_text(BACKEND_PAYLOAD) + '\n\n# Second\n\nMore.\n\n# Third\n\nText.'
+    body = improve_sections(text, max_parallel=2, run_edit=run_edit)
+    assert peak == 2
+    assert loops == []
+    assert (body['sections'], body['failed'], len(body['updates'])) == (3, 0, 3)
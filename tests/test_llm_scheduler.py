@@ -0,0 +1,119 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from ai_journalist.llm_scheduler import LlmScheduler, ScheduledLlm, highest_priority
+
+
+class FlakyLlm(BaseLlm):
+    """Answers with 429 `failures` times, then with 'ok'."""
+
+    failures: int = 1
+    error: str = '429 RESOURCE_EXHAUSTED'
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError(self.error)
+        yield LlmResponse(content=types.Content(role='model', parts=[types.Part(text='ok')]))
+
+
+def test_waiters_are_served_by_priority_then_in_arrival_order():
+    scheduler = LlmScheduler(rpm=6000, burst=1, backoff_base=0)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire('m', priority)
+        order.append(name)
+
+    async def main():
+        await scheduler.acquire('m')
+        # Close the bucket so every call below queues before the first is served
+        scheduler.rate_limited('m', 0, RuntimeError("429 {'retryDelay': '0.05s'}"))
+        await asyncio.gather(
+            call('low', 'low'), call('normal-1', 'normal'), call('high', 'high'),
+            call('normal-2', 'normal'), call('unknown', 'urgent'),
+        )
+
+    asyncio.run(main())
+    assert order == ['high', 'normal-1', 'normal-2', 'unknown', 'low']
+
+
+def test_unlimited_bucket_releases_every_waiter_when_it_reopens():
+    scheduler = LlmScheduler(rpm=0, burst=2, backoff_base=0)
+
+    async def main():
+        scheduler.rate_limited('m', 0, RuntimeError("429 {'retryDelay': '0.05s'}"))
+        await asyncio.wait_for(asyncio.gather(*(scheduler.acquire('m') for _ in range(5))), 2)
+
+    asyncio.run(main())
+    assert scheduler.stats()['queued'] == {'m': 0}
+
+
+def test_highest_priority():
+    assert highest_priority(['low', 'high', 'normal']) == 'high'
+    assert highest_priority(['low', 'bogus']) == 'low'
+    assert highest_priority([]) == 'normal'
+
+
+def test_rate_limited_closes_the_bucket_for_the_servers_retry_delay():
+    scheduler = LlmScheduler(rpm=0, burst=5, backoff_base=0.01)
+    started = time.monotonic()
+    delay = scheduler.rate_limited('m', 0, RuntimeError("429 RESOURCE_EXHAUSTED {'retryDelay': '2s'}"))
+    assert 2 <= delay <= 2.01
+    bucket = scheduler._buckets['m']
+    assert bucket.tokens == 0
+    assert bucket.closed_until >= started + 2
+    assert bucket.wait_time(time.monotonic()) > 1.9
+
+
+def test_backoff_is_capped_and_retries_stop_at_max_retries():
+    scheduler = LlmScheduler(max_retries=2, backoff_base=1, backoff_max=3, retry_budget=10)
+    error = RuntimeError('429')
+    assert all(0 <= scheduler.rate_limited('m', attempt, error) <= 3 for attempt in (0, 1))
+    assert scheduler.rate_limited('m', 2, error) is None
+
+
+def test_retry_budget_runs_out_and_is_earned_back():
+    scheduler = LlmScheduler(backoff_base=0, retry_ratio=0.5, retry_budget=1)
+    error = RuntimeError('429')
+    assert scheduler.rate_limited('m', 0, error) is not None
+    assert scheduler.rate_limited('m', 0, error) is None
+    scheduler.succeeded()
+    scheduler.succeeded()
+    assert scheduler.rate_limited('m', 0, error) is not None
+
+
+def test_scheduled_llm_retries_a_429_before_the_first_chunk():
+    scheduler = LlmScheduler(rpm=0, backoff_base=0.01)
+    flaky = FlakyLlm(model='m', failures=2)
+    llm = ScheduledLlm(model='m', llm=flaky, scheduler=scheduler)
+
+    async def main():
+        return [response async for response in llm.generate_content_async(LlmRequest())]
+
+    responses = asyncio.run(main())
+    assert flaky.calls == 3
+    assert responses[0].content.parts[0].text == 'ok'
+
+
+def test_scheduled_llm_does_not_retry_other_errors():
+    scheduler = LlmScheduler(rpm=0, backoff_base=0.01)
+    flaky = FlakyLlm(model='m', error='500 INTERNAL')
+    llm = ScheduledLlm(model='m', llm=flaky, scheduler=scheduler)
+
+    async def main():
+        return [response async for response in llm.generate_content_async(LlmRequest())]
+
+    with pytest.raises(RuntimeError, match='500'):
+        asyncio.run(main())
+    assert flaky.calls == 1
@@ -0,0 +1,120 @@
+import pytest
+
+from ai_journalist.tools.markup_blocks import changed_line_range, parse_article_blocks, remarkup_article_blocks
+
+ARTICLE = '''# Title
+
+Intro paragraph.
+Second line.
+
+- item one
+- item two
+
+> quote
+
+```
+code
+
+more
+```
+
+## Sub
+
+Para.
+
+Para.'''
+
+
+def shape(blocks):
+    """Everything a full parse determines except IDs."""
+    return [(b['type'], b['level'], b['content'], b['position'], b['line_start'], b['line_end']) for b in blocks]
+
+
+def test_blocks_carry_type_position_and_line_span():
+    blocks, marked = parse_article_blocks(ARTICLE)
+    assert [(b['type'], b['line_start'], b['line_end']) for b in blocks] == [
+        ('heading_h1', 0, 1), ('paragraph', 2, 4), ('list_item', 5, 7), ('blockquote', 8, 9),
+        ('code_block', 10, 15), ('heading_h2', 16, 17), ('paragraph', 18, 19), ('paragraph', 20, 21),
+    ]
+    assert [b['position'] for b in blocks] == list(range(len(blocks)))
+    # The blank line inside the fence does not split the code block
+    assert blocks[4]['content'] == '```\ncode\n\nmore\n```'
+    assert marked.startswith(f"<!-- block_id:{blocks[0]['id']} block_type:heading_h1 -->\n# Title\n\n")
+
+
+def test_ids_are_stable_across_parses_and_unique_for_repeated_blocks():
+    first, _ = parse_article_blocks(ARTICLE)
+    second, _ = parse_article_blocks(ARTICLE)
+    assert [b['id'] for b in first] == [b['id'] for b in second]
+    assert first[6]['content'] == first[7]['content']
+    assert len({b['id'] for b in first}) == len(first)
+
+
+# The range covers every changed line, plus the line a pure insertion or
+# deletion touches at its end
+@pytest.mark.parametrize('old, new, expected', [
+    ('a\nb\nc', 'a\nB\nc', (1, 2, 2)),
+    ('a\nb\nc', 'a\nb\nx\nc', (2, 3, 4)),
+    ('a\nb\nc', 'a\nc', (1, 3, 2)),
+    ('a\nb\nc', 'a\nb\nc', (2, 3, 3)),
+    ('a', 'x\na', (0, 1, 2)),
+])
+def test_changed_line_range(old, new, expected):
+    start, old_end, new_end = changed_line_range(old, new)
+    assert (start, old_end, new_end) == expected
+    old_lines, new_lines = old.split('\n'), new.split('\n')
+    assert old_lines[:start] + new_lines[start:new_end] + old_lines[old_end:] == new_lines
+
+
+EDITS = {
+    'edit a paragraph': ('Intro paragraph.', 'Intro, rewritten.'),
+    'add a line to a paragraph': ('Second line.', 'Second line.\nThird line.'),
+    'insert a paragraph': ('> quote\n', '> quote\n\nA new paragraph.\n'),
+    'delete a block': ('> quote\n\n', ''),
+    'merge two blocks': ('Second line.\n\n- item one', 'Second line.\n- item one'),
+    'split a block': ('Intro paragraph.\nSecond line.', 'Intro paragraph.\n\nSecond line.'),
+    'turn a paragraph into a heading': ('Intro paragraph.', '## Intro paragraph.'),
+    'open a fence': ('> quote', '```\n> quote'),
+    'edit the first line': ('# Title', '# New title'),
+    'append at the end': ('## Sub\n\nPara.\n\nPara.', '## Sub\n\nPara.\n\nPara.\n\nThe end.'),
+}
+
+
+@pytest.mark.parametrize('old, new', EDITS.values(), ids=EDITS.keys())
+def test_remarkup_matches_a_full_parse(old, new):
+    assert ARTICLE.count(old) == 1
+    edited = ARTICLE.replace(old, new)
+    previous, _ = parse_article_blocks(ARTICLE)
+
+    result = remarkup_article_blocks(previous, edited, *changed_line_range(ARTICLE, edited))
+    full, _ = parse_article_blocks(edited)
+
+    assert shape(result['blocks']) == shape(full)
+    previous_ids = {b['id'] for b in previous}
+    new_ids = {b['id'] for b in result['blocks']}
+    assert set(result['added']) == new_ids - previous_ids
+    assert set(result['removed']) == previous_ids - new_ids
+    assert len(new_ids) == len(result['blocks'])
+
+
+def test_untouched_blocks_keep_their_ids():
+    previous, _ = parse_article_blocks(ARTICLE)
+    edited = ARTICLE.replace('> quote\n', '> quote\n\nA new paragraph.\n')
+    result = remarkup_article_blocks(previous, edited, *changed_line_range(ARTICLE, edited))
+
+    blocks = result['blocks']
+    assert [b['id'] for b in blocks[:4]] == [b['id'] for b in previous[:4]]
+    assert [b['id'] for b in blocks[5:]] == [b['id'] for b in previous[4:]]
+    assert result['added'] == [blocks[4]['id']] and result['removed'] == []
+    # Blocks before the edit are reused, the shifted tail is copied
+    assert blocks[0] is previous[0]
+    assert blocks[5]['line_start'] == previous[4]['line_start'] + 2
+    assert previous[4]['position'] == 4
+
+
+def test_remarkup_keeps_the_used_id_set_current():
+    previous, _ = parse_article_blocks(ARTICLE)
+    used_ids = {b['id'] for b in previous}
+    edited = ARTICLE.replace('> quote', '> other quote')
+    result = remarkup_article_blocks(previous, edited, *changed_line_range(ARTICLE, edited), used_ids=used_ids)
+    assert used_ids >= {b['id'] for b in result['blocks']}
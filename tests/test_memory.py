@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.state import State
+
+from ai_journalist.session_store import SqliteSessionService
+from ai_journalist.tools import memory
+from ai_journalist.tools.memory import MEMORY_INDEX_KEY, memorize, memorize_list, memory_key, recall, recall_memory
+
+
+def context(state=None):
+    return SimpleNamespace(state={} if state is None else state)
+
+
+def test_list_memories_are_ordered_sets():
+    ctx = context()
+    for value in ('a', 'b', 'a', 'c'):
+        memorize_list('terms', value, ctx)
+    assert recall(ctx.state, 'terms') == ['b', 'a', 'c']
+    assert recall_memory('terms', ctx) == {'status': 'ok', 'key': 'terms', 'value': ['b', 'a', 'c']}
+    assert recall_memory('missing', ctx)['status'] == 'not_found'
+
+
+def test_values_per_key_are_capped(monkeypatch):
+    monkeypatch.setattr(memory, 'MEMORY_MAX_VALUES', 3)
+    ctx = context()
+    for value in 'abcde':
+        memorize_list('terms', value, ctx)
+    assert recall(ctx.state, 'terms') == ['c', 'd', 'e']
+
+
+def test_least_recently_used_keys_are_tombstoned(monkeypatch):
+    monkeypatch.setattr(memory, 'MEMORY_MAX_KEYS', 2)
+    ctx = context({'document_id': 'doc'})
+    memorize('tone', 'formal', ctx)
+    memorize('author', 'Ann', ctx)
+    recall_memory('tone', ctx)  # now more recent than 'author'
+    memorize('city', 'Oslo', ctx)
+
+    assert list(ctx.state[MEMORY_INDEX_KEY]) == ['tone', 'city']
+    assert ctx.state[memory_key('author')] is None
+    assert recall(ctx.state, 'tone') == 'formal'
+    # Memories never touch the service's own keys
+    assert ctx.state['document_id'] == 'doc'
+
+
+def test_tombstones_are_compacted_by_the_session_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, 'MEMORY_MAX_KEYS', 1)
+    service = SqliteSessionService(str(tmp_path / 'sessions.db'), flush_interval=3600)
+    try:
+        async def run():
+            session = await service.create_session(app_name='app', user_id='u', session_id='s')
+            for key in ('first', 'second'):
+                delta = {}
+                memorize(key, 'value', context(State(dict(session.state), delta)))
+                await service.append_event(session, Event(author='agent', actions=EventActions(state_delta=delta)))
+            service.flush()
+            return await service.get_session(app_name='app', user_id='u', session_id='s')
+
+        session = asyncio.run(run())
+        assert memory_key('first') not in session.state
+        assert session.state[memory_key('second')] == 'value'
+        rows = service._db.execute("SELECT key FROM session_state WHERE key = ?", (memory_key('first'),)).fetchall()
+        assert rows == []
+    finally:
+        service.close()
+
+
+def test_root_agent_has_the_memory_tools():
+    from ai_journalist.agent import root_agent
+
+    names = {getattr(tool, '__name__', getattr(tool, 'name', None)) for tool in root_agent.tools}
+    assert {'memorize', 'memorize_list', 'recall_memory'} <= names
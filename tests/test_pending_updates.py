@@ -0,0 +1,83 @@
+from google.adk.sessions.state import State
+
+from ai_journalist.pending_updates import (
+    HAS_PENDING_KEY,
+    PENDING_SEQ_KEY,
+    enqueue_update,
+    list_pending_updates,
+    pending_log_key,
+    pending_update_key,
+)
+
+
+def update(segment_id, content, status='updated'):
+    return {
+        'segment_id': segment_id,
+        'status': status,
+        'actions': [{'type': 'rewrite_segment', 'result': {'content': content}}],
+        'handoff': {'needs_review': False, 'comments': []},
+        'updated_at': None,
+    }
+
+
+def test_entries_merge_per_segment_with_increasing_seq():
+    state = {}
+    enqueue_update(state, update('s1', 'one'))
+    enqueue_update(state, update('s2', 'two'))
+    entry = enqueue_update(state, update('s1', 'three', status='skipped'))
+
+    assert entry['seq'] == 3
+    assert entry['status'] == 'skipped'
+    assert [action['result']['content'] for action in entry['actions']] == ['one', 'three']
+    assert (state[pending_log_key(1)], state[pending_log_key(2)], state[pending_log_key(3)]) == (None, 's2', 's1')
+    assert state[PENDING_SEQ_KEY] == 3
+    assert state[HAS_PENDING_KEY] is True
+
+
+def test_delta_holds_only_the_changed_keys():
+    value, delta = {}, {}
+    state = State(value, delta)
+    enqueue_update(state, update('s1', 'one'))
+    enqueue_update(state, update('s2', 'two'))
+
+    delta.clear()
+    enqueue_update(state, update('s1', 'again'))
+    assert set(delta) == {pending_update_key('s1'), PENDING_SEQ_KEY, pending_log_key(1), pending_log_key(3)}
+    assert delta[pending_log_key(1)] is None
+
+
+def test_listing_follows_the_log_not_the_whole_state():
+    class CountingState(dict):
+        def items(self):
+            raise AssertionError('list_pending_updates scanned the state')
+
+    state = CountingState()
+    for i, segment_id in enumerate(['a', 'b', 'c', 'a']):
+        enqueue_update(state, update(segment_id, str(i)))
+    state['unrelated'] = 'x'
+
+    assert [entry['segment_id'] for entry in list_pending_updates(state)] == ['b', 'c', 'a']
+    assert [entry['segment_id'] for entry in list_pending_updates(state, since=2)] == ['c', 'a']
+    assert [entry['seq'] for entry in list_pending_updates(state, segment_id='a')] == [4]
+    assert list_pending_updates(state, segment_id='missing') == []
+    assert list_pending_updates({}) == []
+
+
+def test_polling_reads_only_the_log_after_since():
+    class CountingState(dict):
+        reads = 0
+
+        def get(self, key, default=None):
+            self.reads += 1
+            return super().get(key, default)
+
+    state = CountingState()
+    for i in range(1000):
+        enqueue_update(state, update(f's{i}', str(i)))
+    enqueue_update(state, update('s3', 'again'))
+
+    state.reads = 0
+    assert [entry['segment_id'] for entry in list_pending_updates(state, since=999)] == ['s999', 's3']
+    # The counter, then the log key and entry of each of the two newer seqs
+    assert state.reads == 5
+    assert list_pending_updates(state, since=1001) == []
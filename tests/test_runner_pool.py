@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+from ai_journalist.llm_scheduler import PRIORITY_KEY
+from ai_journalist.runner_pool import RunnerPool, _DocumentLocks, document_session_id
+
+
+def test_document_sessions_are_reused_and_serialized_across_threads():
+    pool = RunnerPool(reuse_document_sessions=True)
+    first = pool.acquire_session(document_id='doc')
+    assert first == document_session_id('doc')
+
+    acquired = []
+
+    def second_run():
+        acquired.append(pool.acquire_session(document_id='doc'))
+        pool.release_session(acquired[0], document_id='doc')
+
+    thread = threading.Thread(target=second_run)
+    thread.start()
+    time.sleep(0.1)
+    assert acquired == []  # waits for the first run
+    pool.release_session(first, document_id='doc')
+    thread.join(2)
+    assert acquired == [first]
+
+
+def test_other_documents_and_fresh_sessions_do_not_wait():
+    pool = RunnerPool(reuse_document_sessions=True)
+    pool.acquire_session(document_id='a')
+    assert pool.acquire_session(document_id='b') == document_session_id('b')
+    fresh = pool.acquire_session()
+    assert fresh not in (document_session_id('a'), document_session_id('b'))
+    pool.release_session(fresh)
+
+
+def test_reused_document_session_takes_each_runs_priority():
+    pool = RunnerPool(reuse_document_sessions=True)
+    session_id = pool.acquire_session(document_id='doc', priority='high')
+    assert pool.get_state(session_id)[PRIORITY_KEY] == 'high'
+    pool.release_session(session_id, document_id='doc')
+
+    session_id = pool.acquire_session(document_id='doc')
+    assert pool.get_state(session_id)[PRIORITY_KEY] == 'normal'
+    pool.release_session(session_id, document_id='doc')
+
+
+def test_async_runs_on_one_document_take_turns():
+    pool = RunnerPool(reuse_document_sessions=True)
+    order = []
+
+    async def run(name):
+        session_id = await pool.acquire_session_async(document_id='doc', block_id=name)
+        order.append(f'{name}:start')
+        await asyncio.sleep(0.01)
+        order.append(f'{name}:end')
+        await pool.release_session_async(session_id, document_id='doc')
+
+    async def main():
+        await asyncio.gather(run('a'), run('b'), run('c'))
+
+    asyncio.run(main())
+    assert order == ['a:start', 'a:end', 'b:start', 'b:end', 'c:start', 'c:end']
+
+
+def test_cancelled_waiter_passes_the_lock_on():
+    locks = _DocumentLocks()
+
+    async def main():
+        await locks.acquire_async('doc')
+        cancelled = asyncio.create_task(locks.acquire_async('doc'))
+        waiting = asyncio.create_task(locks.acquire_async('doc'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        locks.release('doc')
+        await asyncio.wait_for(waiting, 1)
+        locks.release('doc')
+
+    asyncio.run(main())
+    assert locks._waiters == {}
+
+
+def test_lock_is_handed_across_event_loops():
+    locks = _DocumentLocks()
+    locks.acquire('doc')
+    done = threading.Event()
+
+    def other_loop():
+        async def wait():
+            await locks.acquire_async('doc')
+            locks.release('doc')
+        asyncio.run(wait())
+        done.set()
+
+    thread = threading.Thread(target=other_loop)
+    thread.start()
+    time.sleep(0.05)
+    assert not done.is_set()
+    locks.release('doc')
+    assert done.wait(2)
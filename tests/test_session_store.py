@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+
+from ai_journalist.pending_updates import pending_update_key
+from ai_journalist.session_store import SqliteSessionService
+
+APP, USER = 'app', 'user'
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two services on one file, as two prefork workers would open it."""
+    path = str(tmp_path / 'sessions.db')
+    services = [SqliteSessionService(path, flush_interval=3600), SqliteSessionService(path, flush_interval=3600)]
+    yield services
+    for service in services:
+        service.close()
+
+
+def write(service, session_id, **delta):
+    async def append():
+        session = await service.get_session(app_name=APP, user_id=USER, session_id=session_id)
+        await service.append_event(session, Event(author='test', actions=EventActions(state_delta=delta)))
+    asyncio.run(append())
+
+
+def state(service, session_id):
+    session = asyncio.run(service.get_session(app_name=APP, user_id=USER, session_id=session_id))
+    return session.state if session else None
+
+
+def test_workers_writing_different_keys_keep_both(workers):
+    a, b = workers
+    asyncio.run(a.create_session(app_name=APP, user_id=USER, session_id='doc', state={'documentId': 'd1'}))
+    a.flush()
+
+    # Both load the session, then write different keys before either flushes
+    state(a, 'doc'), state(b, 'doc')
+    write(a, 'doc', title='From A')
+    write(b, 'doc', summary='From B')
+    a.flush()
+    b.flush()
+
+    assert state(a, 'doc') == {'documentId': 'd1', 'title': 'From A', 'summary': 'From B'}
+    assert state(b, 'doc') == state(a, 'doc')
+    assert len(asyncio.run(a.get_session(app_name=APP, user_id=USER, session_id='doc')).events) == 2
+
+
+def test_unflushed_changes_win_locally(workers):
+    a, b = workers
+    asyncio.run(a.create_session(app_name=APP, user_id=USER, session_id='doc'))
+    write(a, 'doc', title='Draft')
+    assert state(a, 'doc') == {'title': 'Draft'}
+    assert state(b, 'doc') is None
+    a.flush()
+    assert state(b, 'doc') == {'title': 'Draft'}
+
+
+def test_pending_update_seq_comes_from_sqlite(workers):
+    a, b = workers
+    asyncio.run(a.create_session(app_name=APP, user_id=USER, session_id='doc'))
+    a.flush()
+    state(b, 'doc')
+
+    # Each worker's in-state counter hands out seq 1; the index must not
+    write(a, 'doc', **{pending_update_key('s1'): {'segment_id': 's1', 'status': 'updated', 'seq': 1}})
+    write(b, 'doc', **{pending_update_key('s2'): {'segment_id': 's2', 'status': 'updated', 'seq': 1}})
+    a.flush()
+    b.flush()
+
+    updates = a.pending_segment_updates(APP, session_id='doc')
+    assert [update['segment_id'] for update in updates] == ['s1', 's2']
+    first, second = (update['seq'] for update in updates)
+    assert first < second
+    assert [update['segment_id'] for update in b.pending_segment_updates(APP, session_id='doc', since=first)] == ['s2']
+
+    # A changed entry moves to the end with a new seq
+    write(a, 'doc', **{pending_update_key('s1'): {'segment_id': 's1', 'status': 'skipped', 'seq': 2}})
+    updates = a.pending_segment_updates(APP, session_id='doc', since=second)
+    assert [(update['segment_id'], update['status']) for update in updates] == [('s1', 'skipped')]
+    assert updates[0]['seq'] > second
+
+
+def test_short_lived_sessions_never_reach_the_disk(workers):
+    a, b = workers
+    session = asyncio.run(a.create_session(app_name=APP, user_id=USER))
+    write(a, session.id, scratch=True)
+    asyncio.run(a.delete_session(app_name=APP, user_id=USER, session_id=session.id))
+    a.flush()
+
+    assert a.flushes == 0
+    assert asyncio.run(b.list_sessions(app_name=APP)).sessions == []
+
+
+def test_deletes_reach_other_workers(workers):
+    a, b = workers
+    asyncio.run(a.create_session(app_name=APP, user_id=USER, session_id='doc', state={'x': 1}))
+    a.flush()
+    assert state(b, 'doc') == {'x': 1}
+
+    asyncio.run(a.delete_session(app_name=APP, user_id=USER, session_id='doc'))
+    a.flush()
+    assert state(b, 'doc') is None
+    assert b.pending_segment_updates(APP, session_id='doc') == []
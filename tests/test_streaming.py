@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.tools.agent_tool import AgentTool
+
+from ai_journalist.runner import stream_article, stream_article_async
+from ai_journalist.runner_pool import RunnerPool
+from ai_journalist.streaming import format_sse, sse_stream
+from benchmarks.stub_model import stub_llm
+
+
+def stub_pool(**kwargs) -> RunnerPool:
+    """Runner pool whose runner drives a stub root agent calling a stub editor tool."""
+    editor = LlmAgent(name='editor', model=stub_llm(reply='Edited text.'), instruction='Edit.')
+    root = LlmAgent(
+        name='root', instruction='Route.', tools=[AgentTool(agent=editor)],
+        model=stub_llm(reply='All done here.', tool_call='editor', tool_args={'request': 'Fix it.'}),
+    )
+    pool = RunnerPool(**kwargs)
+    runner = Runner(agent=root, app_name=pool.app_name, session_service=pool.session_service)
+    pool.get_runner = lambda agent=None: runner
+    return pool
+
+
+def test_format_sse_names_the_event_after_the_payload_type():
+    frame = format_sse({'type': 'text', 'text': 'Grüße', 'partial': True})
+    assert frame.startswith('event: text\ndata: ')
+    assert frame.endswith('\n\n')
+    assert json.loads(frame.split('data: ', 1)[1]) == {'type': 'text', 'text': 'Grüße', 'partial': True}
+
+
+def test_done_payload_is_replaced_by_the_route_body():
+    payloads = [{'type': 'text', 'text': 'a', 'partial': True}, {'type': 'done', 'result': {'response': 'a'}}]
+    frames = list(sse_stream(payloads, lambda result: {'content': result['response'].upper()}))
+    assert frames[1] == format_sse({'type': 'done', 'content': 'A'})
+
+
+def test_stream_reports_tool_progress_partial_text_then_done():
+    payloads = list(stream_article('Some article text.', pool=stub_pool()))
+    types_seen = [payload['type'] for payload in payloads]
+
+    assert types_seen[-1] == 'done'
+    assert types_seen.index('tool_call') < types_seen.index('tool_result') < types_seen.index('done')
+    partial = ''.join(p['text'] for p in payloads if p['type'] == 'text' and p['partial'] and p['author'] == 'root')
+    complete = [p['text'] for p in payloads if p['type'] == 'text' and not p['partial'] and p['author'] == 'root']
+    assert partial == complete[-1] == 'All done here.'
+    assert payloads[-1]['result']['status'] == 'success'
+
+
+def test_async_stream_matches_the_sync_one():
+    async def collect():
+        return [payload async for payload in stream_article_async('Some article text.', pool=stub_pool())]
+
+    async_payloads = asyncio.run(collect())
+    sync_payloads = list(stream_article('Some article text.', pool=stub_pool()))
+    assert [p['type'] for p in async_payloads] == [p['type'] for p in sync_payloads]
+    assert async_payloads[-1]['result']['response'] == sync_payloads[-1]['result']['response']
+
+
+def test_stream_releases_the_document_when_the_run_fails():
+    pool = stub_pool(reuse_document_sessions=True)
+
+    class Broken:
+        def run(self, **kwargs):
+            raise RuntimeError('model down')
+
+    pool.get_runner = lambda agent=None: Broken()
+    payloads = list(stream_article('Text.', document_id='doc', pool=pool))
+    assert payloads == [{'type': 'error', 'error': payloads[0]['error']}]
+    assert 'model down' in payloads[0]['error']
+    assert pool._document_locks._waiters == {}
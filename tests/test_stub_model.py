@@ -0,0 +1,43 @@
+import asyncio
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from ai_journalist.model_backend import LocalLlm
+from benchmarks.stub_model import install_stub_model, stub_llm
+
+
+def test_install_reaches_sub_agents_and_agent_tools():
+    editor = LlmAgent(name='editor', model='gemini-2.5-flash', instruction='Edit.')
+    helper = LlmAgent(name='helper', model='gemini-2.5-flash', instruction='Help.')
+    root = LlmAgent(name='root', model='gemini-2.5-flash', instruction='Route.',
+                    tools=[AgentTool(agent=editor)], sub_agents=[helper])
+
+    install_stub_model(root, reply='Done.')
+
+    for agent in (root, editor, helper):
+        assert isinstance(agent.model, LocalLlm)
+
+
+def test_stub_calls_its_tool_then_replies():
+    editor = LlmAgent(name='editor', model=stub_llm(reply='Edited.'), instruction='Edit.')
+    root_model = stub_llm(reply='All done.', tool_call='editor', tool_args={'request': 'Fix it.'})
+    root = LlmAgent(name='root', model=root_model, instruction='Route.', tools=[AgentTool(agent=editor)])
+    runner = InMemoryRunner(agent=root)
+
+    async def main():
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id='u')
+        texts = []
+        async for event in runner.run_async(user_id='u', session_id=session.id,
+                                            new_message=types.UserContent(parts=[types.Part(text='Go.')])):
+            if event.content and event.content.parts:
+                texts.extend(part.text for part in event.content.parts if part.text)
+        return texts
+
+    texts = asyncio.run(main())
+    assert texts[-1] == 'All done.'
+    assert root_model.calls == 2
+    assert editor.model.calls == 1
+    assert root_model.prompt_tokens > 0